@@ -0,0 +1,464 @@
+"""
+Mock Overpass and Nominatim server module for POI-Harvester benchmarks
+
+The server replays synthetic, deterministic OSM data without any network
+access. The number of elements is part of the URL, so one server serves
+datasets of every size:
+
+    http://127.0.0.1:PORT/<size>/api/interpreter   Overpass queries (JSON or CSV output)
+    http://127.0.0.1:PORT/<size>/api/status        Overpass slot status
+    http://127.0.0.1:PORT/search?q=...             Nominatim search
+
+Responses are generated and streamed while they are written, so even
+datasets with millions of elements never exist in the server's memory.
+Only the standard library is used, the module can be run as a script.
+"""
+
+import argparse
+import json
+import random
+import re
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+# Area the synthetic elements are spread over (south, west, north, east)
+DATASET_BBOX = (50.0, 8.5, 50.3, 8.9)
+
+# The area is divided into a grid of cells of this edge length in degrees
+CELL_SIZE = 0.01
+GRID_ROWS = 30
+GRID_COLUMNS = 40
+
+DEFAULT_SEED = 42
+
+# Elements serialized per write to the socket
+WRITE_BATCH = 1000
+
+# Main tag of an element and its relative frequency, modeled on a central European city
+POI_TAGS: List[Tuple[Tuple[str, str], int]] = [
+    (("amenity", "bench"), 24),
+    (("amenity", "parking"), 14),
+    (("amenity", "restaurant"), 12),
+    (("amenity", "cafe"), 6),
+    (("amenity", "toilets"), 4),
+    (("amenity", "pharmacy"), 3),
+    (("amenity", "school"), 3),
+    (("amenity", "atm"), 3),
+    (("leisure", "playground"), 8),
+    (("leisure", "park"), 5),
+    (("shop", "supermarket"), 6),
+    (("shop", "bakery"), 6),
+    (("shop", "clothes"), 6),
+]
+
+# Tags every element may carry, with the probability of carrying them
+COMMON_TAGS: List[Tuple[str, float]] = [
+    ("name", 0.75),
+    ("addr:street", 0.5),
+    ("addr:housenumber", 0.45),
+    ("addr:postcode", 0.4),
+    ("addr:city", 0.4),
+    ("opening_hours", 0.3),
+    ("wheelchair", 0.25),
+    ("website", 0.2),
+    ("phone", 0.18),
+    ("operator", 0.15),
+    ("check_date", 0.1),
+    ("name:en", 0.05),
+    ("note", 0.02),
+    ("fixme", 0.01),
+]
+
+# Tags only found on some kinds of POIs
+SPECIFIC_TAGS: Dict[Tuple[str, str], List[Tuple[str, float]]] = {
+    ("amenity", "bench"): [("backrest", 0.6), ("material", 0.3), ("seats", 0.2)],
+    ("amenity", "parking"): [("capacity", 0.5), ("fee", 0.4), ("parking", 0.6), ("access", 0.5)],
+    ("amenity", "restaurant"): [("cuisine", 0.8), ("outdoor_seating", 0.4), ("diet:vegetarian", 0.2)],
+    ("amenity", "cafe"): [("cuisine", 0.4), ("outdoor_seating", 0.5), ("internet_access", 0.3)],
+    ("shop", "supermarket"): [("brand", 0.7), ("brand:wikidata", 0.6)],
+    ("shop", "bakery"): [("brand", 0.2)],
+}
+
+STREETS = ["Hauptstraße", "Bahnhofstraße", "Schillerstraße", "Goethestraße", "Mainzer Landstraße",
+           "Berger Straße", "Königsteiner Straße", "Am Römerberg"]
+NAMES = ["Zum Löwen", "Café Central", "O'Reilly's", "Rosengarten", "Lindenhof", "Alte Mühle",
+         "Stadtpark", "Marktplatz", "Sonnenschein", "Zur \"Krone\""]
+VALUES = {
+    "wheelchair": ["yes", "no", "limited"],
+    "cuisine": ["italian", "german", "pizza", "asian", "burger", "coffee_shop", "regional;german"],
+    "opening_hours": ["Mo-Fr 08:00-18:00", "Mo-Sa 09:00-20:00; Su off", "24/7", "Tu-Su 11:30-22:00"],
+    "fee": ["yes", "no"],
+    "access": ["yes", "customers", "private"],
+    "parking": ["surface", "underground", "multi-storey", "street_side"],
+    "backrest": ["yes", "no"],
+    "material": ["wood", "metal", "stone", "concrete"],
+    "outdoor_seating": ["yes", "no"],
+    "internet_access": ["wlan", "no"],
+    "diet:vegetarian": ["yes", "only", "no"],
+    "brand": ["REWE", "EDEKA", "Aldi Süd", "Lidl", "tegut"],
+    "operator": ["Stadt Frankfurt", "APCOA", "Deutsche Bahn", "privat"],
+}
+
+# Share of nodes and ways, the remaining elements are relations
+NODE_SHARE = 0.75
+WAY_SHARE = 0.22
+
+_MAIN_TAGS = [tag for tag, _ in POI_TAGS]
+_CUMULATIVE_WEIGHTS = [sum(weight for _, weight in POI_TAGS[:i + 1]) for i in range(len(POI_TAGS))]
+
+
+def _element_point(element: Dict) -> Tuple[float, float]:
+    """Get the coordinates of a node or the center of a way or relation"""
+    if "lat" in element:
+        return element["lat"], element["lon"]
+    return element["center"]["lat"], element["center"]["lon"]
+
+
+def _tag_value(rng: random.Random, key: str, index: int) -> str:
+    """
+    Pick a plausible value for a tag
+
+    Args:
+        rng: Random generator of the dataset
+        key: Tag key
+        index: Running number of the element, used for unique values
+
+    Returns:
+        Tag value
+    """
+    if key in VALUES:
+        return rng.choice(VALUES[key])
+    if key in ("name", "name:en"):
+        return f"{rng.choice(NAMES)} {index % 997}"
+    if key == "addr:street":
+        return rng.choice(STREETS)
+    if key == "addr:housenumber":
+        return str(rng.randint(1, 250))
+    if key == "addr:postcode":
+        return str(rng.randint(60306, 60599))
+    if key == "addr:city":
+        return "Frankfurt am Main"
+    if key == "website":
+        return f"https://example.com/poi/{index}"
+    if key == "phone":
+        return f"+49 69 {rng.randint(1000000, 9999999)}"
+    if key in ("capacity", "seats"):
+        return str(rng.randint(2, 400))
+    if key == "check_date":
+        return f"202{rng.randint(0, 5)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+    if key == "brand:wikidata":
+        return f"Q{rng.randint(10000, 999999)}"
+    if key == "note":
+        return "multi-line\nvalue with\ttab and \\ backslash"
+    return "check"
+
+
+def _iter_cell(size: int, seed: int, row: int, column: int) -> Iterator[Dict]:
+    """
+    Generate the elements of one grid cell of a dataset
+
+    Every cell has its own random generator, so a cell is generated the same
+    way no matter which query asks for it.
+
+    Args:
+        size: Number of elements of the whole dataset
+        seed: Seed of the dataset
+        row: Row of the cell, counted from the south
+        column: Column of the cell, counted from the west
+
+    Yields:
+        Elements in Overpass JSON format, ways and relations with a center
+    """
+    cell = row * GRID_COLUMNS + column
+    cells = GRID_ROWS * GRID_COLUMNS
+    # Elements are spread evenly, the first cells take one more if the size is not divisible
+    count = size // cells + (1 if cell < size % cells else 0)
+    first_id = cell * (size // cells) + min(cell, size % cells) + 1
+
+    rng = random.Random(seed * 1000003 + cell)
+    s = DATASET_BBOX[0] + row * CELL_SIZE
+    w = DATASET_BBOX[1] + column * CELL_SIZE
+
+    for index in range(first_id, first_id + count):
+        main_tag = rng.choices(_MAIN_TAGS, cum_weights=_CUMULATIVE_WEIGHTS)[0]
+        element_tags = {main_tag[0]: main_tag[1]}
+        for key, probability in COMMON_TAGS + SPECIFIC_TAGS.get(main_tag, []):
+            if rng.random() < probability:
+                element_tags[key] = _tag_value(rng, key, index)
+
+        lat = round(s + rng.random() * CELL_SIZE, 7)
+        lon = round(w + rng.random() * CELL_SIZE, 7)
+        kind = rng.random()
+        if kind < NODE_SHARE:
+            yield {"type": "node", "id": index, "lat": lat, "lon": lon, "tags": element_tags}
+        else:
+            osm_type = "way" if kind < NODE_SHARE + WAY_SHARE else "relation"
+            yield {"type": osm_type, "id": index, "center": {"lat": lat, "lon": lon}, "tags": element_tags}
+
+
+def iter_dataset(size: int, seed: int = DEFAULT_SEED,
+                 bbox: Tuple[float, float, float, float] = DATASET_BBOX) -> Iterator[Dict]:
+    """
+    Generate the synthetic elements of a dataset inside a bounding box
+
+    The same size and seed always produce the same elements. Only the grid
+    cells intersecting bbox are generated, so small queries stay cheap.
+
+    Args:
+        size: Number of elements of the whole dataset
+        seed: Seed of the random generator
+        bbox: Bounding box (south, west, north, east) the elements must lie in
+
+    Yields:
+        Elements in Overpass JSON format, ways and relations with a center
+    """
+    s, w, n, e = bbox
+    first_row = max(0, int((s - DATASET_BBOX[0]) // CELL_SIZE))
+    last_row = min(GRID_ROWS - 1, int((n - DATASET_BBOX[0]) // CELL_SIZE))
+    first_column = max(0, int((w - DATASET_BBOX[1]) // CELL_SIZE))
+    last_column = min(GRID_COLUMNS - 1, int((e - DATASET_BBOX[1]) // CELL_SIZE))
+
+    for row in range(first_row, last_row + 1):
+        for column in range(first_column, last_column + 1):
+            for element in _iter_cell(size, seed, row, column):
+                lat, lon = _element_point(element)
+                if s <= lat <= n and w <= lon <= e:
+                    yield element
+
+
+def poi_type_tags() -> List[Tuple[str, str]]:
+    """
+    Get the main tags used by the synthetic data
+
+    Returns:
+        List of (key, value) tuples
+    """
+    return list(_MAIN_TAGS)
+
+
+def parse_bbox(query: str) -> Optional[Tuple[float, float, float, float]]:
+    """
+    Extract the global bbox of an Overpass query
+
+    Args:
+        query: Overpass query string
+
+    Returns:
+        Bounding box (south, west, north, east) or None if the query has none
+    """
+    match = re.search(r"\[bbox:([-\d.e]+),([-\d.e]+),([-\d.e]+),([-\d.e]+)\]", query)
+    return tuple(float(value) for value in match.groups()) if match else None
+
+
+def parse_filters(query: str) -> Tuple[List[Tuple[str, "re.Pattern"]], List[str]]:
+    """
+    Extract the tag filters and requested OSM types of an Overpass query
+
+    Args:
+        query: Overpass query string as built by POI-Harvester
+
+    Returns:
+        Tuple of (key and value pattern of every filter, OSM types)
+    """
+    filters = []
+    for key, operator, value in re.findall(r'\["((?:[^"\\]|\\.)*)"(=|~)"((?:[^"\\]|\\.)*)"\]', query):
+        key = key.replace('\\"', '"').replace("\\\\", "\\")
+        value = value.replace('\\"', '"').replace("\\\\", "\\")
+        filters.append((key, re.compile(value if operator == "~" else re.escape(value) + "$")))
+    osm_types = [osm_type for osm_type in ("node", "way", "relation") if f"{osm_type}.pois" in query]
+    return filters, osm_types
+
+
+def matches(element: Dict, filters: List[Tuple[str, "re.Pattern"]], osm_types: List[str]) -> bool:
+    """
+    Check whether an element is selected by a query
+
+    Args:
+        element: Synthetic element
+        filters: Tag filters, any of which must match
+        osm_types: Requested OSM types
+
+    Returns:
+        True if the element is part of the query result
+    """
+    if element["type"] not in osm_types:
+        return False
+    tags = element["tags"]
+    return any(key in tags and pattern.match(tags[key]) for key, pattern in filters)
+
+
+def parse_csv_columns(query: str) -> Optional[List[str]]:
+    """
+    Extract the columns of a projected (out:csv) Overpass query
+
+    Args:
+        query: Overpass query string
+
+    Returns:
+        Column names or None for JSON output
+    """
+    match = re.search(r"\[out:csv\((.*?);\s*true;", query)
+    if match is None:
+        return None
+    return [column.strip().strip('"').replace('\\"', '"') for column in match.group(1).split(",")]
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    """Request handler answering Overpass and Nominatim requests with synthetic data"""
+
+    # Connections are closed after each response, whose end marks the end of the body
+    protocol_version = "HTTP/1.0"
+    latency = 0.0
+    seed = DEFAULT_SEED
+    verbose = False
+
+    def log_message(self, format, *args):
+        if self.verbose:
+            super().log_message(format, *args)
+
+    def _send_body(self, status: int, content_type: str, body: bytes) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _parse_size(self, path: str) -> Optional[int]:
+        match = re.match(r"/(\d+)/api/", path)
+        return int(match.group(1)) if match else None
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        time.sleep(self.latency)
+
+        if url.path == "/search":
+            # Every location but "unknown" resolves to the center of the dataset
+            query = parse_qs(url.query).get("q", [""])[0]
+            s, w, n, e = DATASET_BBOX
+            result = [] if query.strip().lower() == "unknown" else [
+                {"lat": str((s + n) / 2), "lon": str((w + e) / 2), "display_name": query}
+            ]
+            self._send_body(200, "application/json", json.dumps(result).encode("utf-8"))
+        elif self._parse_size(url.path) is not None and url.path.endswith("/api/status"):
+            body = b"Connected as: 1\nCurrent time: 2026-01-01T00:00:00Z\nRate limit: 0\n4 slots available now.\n"
+            self._send_body(200, "text/plain", body)
+        else:
+            self._send_body(404, "text/plain", b"Not found\n")
+
+    def do_POST(self):
+        size = self._parse_size(self.path)
+        length = int(self.headers.get("Content-Length", 0))
+        query = parse_qs(self.rfile.read(length).decode("utf-8")).get("data", [""])[0]
+        bbox = parse_bbox(query)
+        if size is None or not self.path.endswith("/api/interpreter") or bbox is None:
+            self._send_body(400, "text/plain", b"Bad request\n")
+            return
+
+        time.sleep(self.latency)
+        filters, osm_types = parse_filters(query)
+        elements = (element for element in iter_dataset(size, self.seed, bbox)
+                    if matches(element, filters, osm_types))
+
+        columns = parse_csv_columns(query)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/csv" if columns is not None else "application/json")
+        self.end_headers()
+
+        try:
+            if columns is not None:
+                self._write_csv(elements, columns)
+            else:
+                self._write_json(elements)
+        except (BrokenPipeError, ConnectionResetError):
+            # Clients drop the rest of a response they cannot use, e.g. malformed CSV
+            pass
+
+    def _write_json(self, elements: Iterator[Dict]) -> None:
+        self.wfile.write(b'{\n  "version": 0.6,\n  "generator": "POI-Harvester mock server",\n'
+                         b'  "osm3s": {"timestamp_osm_base": "2026-01-01T00:00:00Z"},\n  "elements": [\n')
+        separator = ""
+        batch = []
+        for element in elements:
+            batch.append(separator + json.dumps(element, ensure_ascii=False))
+            separator = ",\n"
+            if len(batch) >= WRITE_BATCH:
+                self.wfile.write("".join(batch).encode("utf-8"))
+                batch = []
+        batch.append("\n  ]\n}\n")
+        self.wfile.write("".join(batch).encode("utf-8"))
+
+    def _write_csv(self, elements: Iterator[Dict], columns: List[str]) -> None:
+        lines = ["\t".join(columns)]
+        for element in elements:
+            lat, lon = _element_point(element)
+            row = []
+            for column in columns:
+                if column == "::type":
+                    row.append(element["type"])
+                elif column == "::id":
+                    row.append(str(element["id"]))
+                elif column == "::lat":
+                    row.append(str(lat))
+                elif column == "::lon":
+                    row.append(str(lon))
+                else:
+                    # Overpass writes values as they are, tabs and line breaks are not escaped
+                    row.append(element["tags"].get(column, ""))
+            lines.append("\t".join(row))
+            if len(lines) >= WRITE_BATCH:
+                self.wfile.write(("\n".join(lines) + "\n").encode("utf-8"))
+                lines = []
+        if lines:
+            self.wfile.write(("\n".join(lines) + "\n").encode("utf-8"))
+
+
+def create_server(host: str = "127.0.0.1", port: int = 0, latency: float = 0.0,
+                  seed: int = DEFAULT_SEED, verbose: bool = False) -> ThreadingHTTPServer:
+    """
+    Create a mock server
+
+    Args:
+        host: Interface to listen on
+        port: Port to listen on (0 for a free port)
+        latency: Seconds every response is delayed before its first byte
+        seed: Seed of the synthetic data
+        verbose: Log every request
+
+    Returns:
+        Server, not yet serving
+    """
+    handler = type("ConfiguredMockHandler", (MockHandler,),
+                   {"latency": latency, "seed": seed, "verbose": verbose})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Mock Overpass and Nominatim server for POI-Harvester benchmarks")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=0, help="Port to listen on (default: a free port)")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="Seconds every response is delayed (default: 0)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED,
+                        help=f"Seed of the synthetic data (default: {DEFAULT_SEED})")
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    args = parser.parse_args()
+
+    server = create_server(args.host, args.port, args.latency, args.seed, args.verbose)
+    host, port = server.server_address[:2]
+    # The benchmark runner reads the address from this line
+    print(f"Listening on http://{host}:{port}", flush=True)
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,566 @@
+"""
+Benchmark runner module for POI-Harvester benchmarks
+
+Times and memory-profiles the query builder, geocoding, fetching, cleaning,
+key extraction and every exporter against a local mock server, and writes
+the results as JSON so they can be compared across commits.
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+from poi_harvester.cache import ResponseCache
+from poi_harvester import geocoding, network
+from poi_harvester.export import export_csv, export_json, export_sql, export_sqlite, export_parquet, \
+    get_all_keys_from_data
+from poi_harvester.geocoding import configure_geocode_cache, geocode_location
+from poi_harvester.overpass import build_overpass_query, configure_cache, configure_endpoints, fetch_poi_data, \
+    iter_poi_data
+from poi_harvester.poi_types import POI_DISPLAY_MAPPING
+from poi_harvester.utils import clean_poi_data
+
+from .mock_server import DATASET_BBOX, DEFAULT_SEED, poi_type_tags
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+# Default directory of result files, relative to the current directory
+RESULTS_DIR = "benchmark-results"
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+DEFAULT_REPEAT = 3
+
+OSM_TYPES = ["node", "way", "relation"]
+# Keys exported by the exporter benchmarks and requested by the projected fetch
+EXPORT_KEYS = ["name", "addr:street", "addr:housenumber", "addr:postcode", "opening_hours", "website",
+               "cuisine", "note"]
+# addr:* keys stay unmapped, so the SQL exports have to quote them
+COLUMN_MAP = {"opening_hours": "hours", "website": "url"}
+# The mock writes note values with tabs and line breaks like Overpass, which breaks projected CSV responses
+PROJECTED_KEYS = [key for key in EXPORT_KEYS if key != "note"]
+
+# Calls per repetition of benchmarks too fast to time one by one
+QUERY_BUILD_CALLS = 1000
+CACHED_GEOCODE_CALLS = 200
+
+# Benchmarks run once, the others once per dataset size
+GLOBAL_BENCHMARKS = ["build_overpass_query", "build_overpass_query_projected", "geocode_location",
+                     "geocode_location_cached"]
+SIZE_BENCHMARKS = ["fetch_poi_data", "fetch_poi_data_tiled", "fetch_poi_data_cached", "iter_poi_data_streamed",
+                   "iter_poi_data_projected", "iter_poi_data_projected_fallback", "clean_poi_data",
+                   "get_all_keys_from_data", "export_csv", "export_csv_gzip", "export_json", "export_sql",
+                   "export_sql_batched", "export_sql_copy", "export_sqlite", "export_parquet"]
+
+# Peak memory a streamed single request may use beyond twice that of the smallest dataset
+STREAM_MEMORY_SLACK = 1024 * 1024
+
+# Tile edge length and workers of the tiled fetch
+TILE_SIZE = 0.1
+TILE_WORKERS = 4
+
+
+class BenchmarkError(Exception):
+    """Raised when a benchmarked function does not produce the expected result"""
+    pass
+
+
+def get_poi_types() -> List[str]:
+    """
+    Get the POI types matching the main tags of the synthetic data
+
+    Returns:
+        List of POI type names
+    """
+    tags = set(poi_type_tags())
+    return [poi_type for poi_type, pairs in POI_DISPLAY_MAPPING.items() if any(pair in tags for pair in pairs)]
+
+
+@contextlib.contextmanager
+def mock_server(latency: float, seed: int, verbose: bool = False):
+    """
+    Run the mock server in a separate process, so it does not compete with the benchmarks for the GIL
+
+    Args:
+        latency: Seconds every response is delayed
+        seed: Seed of the synthetic data
+        verbose: Log every request
+
+    Yields:
+        Base URL of the server
+    """
+    command = [sys.executable, os.path.join(BENCHMARK_DIR, "mock_server.py"),
+               "--latency", str(latency), "--seed", str(seed)]
+    if verbose:
+        command.append("--verbose")
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=None if verbose else subprocess.DEVNULL,
+                               text=True)
+
+    try:
+        line = process.stdout.readline()
+        if not line.startswith("Listening on "):
+            raise BenchmarkError("Mock server did not start")
+        yield line[len("Listening on "):].strip()
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def measure(function: Callable, repeat: int, memory: bool, calls: int = 1,
+            setup: Optional[Callable] = None) -> Tuple[Dict, object]:
+    """
+    Time a function and measure its peak memory use
+
+    Timing and memory are measured in separate runs, as tracing allocations
+    slows the code down considerably.
+
+    Args:
+        function: Function to benchmark, called without arguments
+        repeat: Number of timed runs
+        memory: Add a run measuring the peak of Python allocations
+        calls: Number of operations one run performs, times are reported per operation
+        setup: Function called before every run, outside of the measurement
+
+    Returns:
+        Tuple of (measurements, return value of the last run)
+    """
+    times = []
+    result = None
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        result = function()
+        times.append((time.perf_counter() - start) / calls)
+
+    peak = None
+    if memory:
+        if setup:
+            setup()
+        tracemalloc.start()
+        try:
+            result = function()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    measurements = {
+        "seconds": {
+            "min": min(times),
+            "median": statistics.median(times),
+            "mean": statistics.mean(times),
+            "max": max(times)
+        },
+        "repeat": repeat,
+        "calls": calls,
+        "peak_memory_bytes": peak
+    }
+    return measurements, result
+
+
+def check(condition: bool, message: str) -> None:
+    """Raise a BenchmarkError unless the condition holds"""
+    if not condition:
+        raise BenchmarkError(message)
+
+
+class BenchmarkRunner:
+    """Runs the selected benchmarks against one mock server and collects their results"""
+
+    def __init__(self, server_url: str, repeat: int, memory: bool, selected: List[str], verbose: bool = False):
+        """
+        Args:
+            server_url: Base URL of the mock server
+            repeat: Number of timed runs per benchmark
+            memory: Measure the peak memory of every benchmark
+            selected: Names of the benchmarks to run
+            verbose: Keep the output of the library on stderr
+        """
+        self.server_url = server_url
+        self.repeat = repeat
+        self.memory = memory
+        self.selected = selected
+        self.verbose = verbose
+        self.poi_types = get_poi_types()
+        self.results: List[Dict] = []
+        self.work_dir = tempfile.mkdtemp(prefix="poi-harvester-bench-")
+
+    def close(self) -> None:
+        """Remove all files written by the benchmarks"""
+        configure_cache(None)
+        configure_geocode_cache(None)
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.work_dir, name)
+
+    def _configure_size(self, size: int) -> None:
+        """Point the Overpass client at the dataset of the given size, without cache or rate limit"""
+        configure_endpoints([f"{self.server_url}/{size}/api/interpreter"], max_retries=0)
+        configure_cache(None)
+        network.configure_rate_limit(1e9)
+
+    def run(self, name: str, size: Optional[int], function: Callable, calls: int = 1,
+            setup: Optional[Callable] = None, output: Optional[str] = None, **extra):
+        """
+        Run one benchmark and record its result
+
+        Args:
+            name: Benchmark name
+            size: Number of elements processed (None for size independent benchmarks)
+            function: Function to benchmark
+            calls: Number of operations one run performs
+            setup: Function called before every run, outside of the measurement
+            output: File written by the benchmark, its size is recorded
+            extra: Further values stored with the result
+
+        Returns:
+            Return value of the last run, None if the benchmark was skipped
+        """
+        if name not in self.selected:
+            return None
+
+        print(f"  {name}" + (f" ({size} elements)" if size is not None else ""), file=sys.stderr, flush=True)
+        log = io.StringIO()
+        with contextlib.redirect_stderr(sys.stderr if self.verbose else log):
+            measurements, result = measure(function, self.repeat, self.memory, calls, setup)
+
+        entry = {"benchmark": name, "size": size}
+        entry.update(measurements)
+        if size:
+            entry["elements_per_second"] = size / measurements["seconds"]["median"]
+        if output is not None:
+            entry["output_bytes"] = os.path.getsize(output)
+        entry.update(extra)
+        self.results.append(entry)
+        return result
+
+    def skip(self, name: str, size: Optional[int], reason: str) -> None:
+        """Record a benchmark that cannot run in this environment"""
+        if name in self.selected:
+            print(f"  {name} skipped: {reason}", file=sys.stderr)
+            self.results.append({"benchmark": name, "size": size, "skipped": reason})
+
+    def check_streamed_memory(self) -> None:
+        """Check that the peak memory of a streamed single request does not grow with the dataset size"""
+        peaks = {entry["size"]: entry["peak_memory_bytes"] for entry in self.results
+                 if entry["benchmark"] == "iter_poi_data_streamed" and entry.get("peak_memory_bytes") is not None}
+        if not peaks:
+            return
+        limit = 2 * peaks[min(peaks)] + STREAM_MEMORY_SLACK
+        for size, peak in peaks.items():
+            check(peak <= limit, f"Streaming {size} elements peaked at {peak} bytes, "
+                                 f"{peaks[min(peaks)]} bytes for {min(peaks)} elements")
+
+    def run_global(self) -> None:
+        """Run the benchmarks that do not depend on the dataset size"""
+        bbox = DATASET_BBOX
+
+        def build_queries(keys=None):
+            for _ in range(QUERY_BUILD_CALLS):
+                build_overpass_query(bbox, self.poi_types, OSM_TYPES, keys=keys)
+
+        self.run("build_overpass_query", None, build_queries, calls=QUERY_BUILD_CALLS)
+        self.run("build_overpass_query_projected", None, lambda: build_queries(EXPORT_KEYS),
+                 calls=QUERY_BUILD_CALLS)
+
+        geocoding.NOMINATIM_URL = f"{self.server_url}/search"
+        configure_geocode_cache(None)
+
+        def geocode():
+            check(geocode_location("Frankfurt am Main") is not None, "Geocoding failed")
+
+        # Nominatim allows one request per second, the wait happens outside of the measurement
+        self.run("geocode_location", None, geocode, setup=lambda: time.sleep(1.0))
+
+        configure_geocode_cache(ResponseCache(self._path("geocode.sqlite3")))
+        geocode()
+
+        def geocode_cached():
+            for _ in range(CACHED_GEOCODE_CALLS):
+                geocode()
+
+        self.run("geocode_location_cached", None, geocode_cached, calls=CACHED_GEOCODE_CALLS)
+        configure_geocode_cache(None)
+
+    def run_size(self, size: int) -> None:
+        """Run the benchmarks processing a dataset of the given size"""
+        self._configure_size(size)
+        bbox = DATASET_BBOX
+
+        def fetch(**options):
+            data = fetch_poi_data(bbox, self.poi_types, OSM_TYPES, **options)
+            check(len(data) == size, f"Fetched {len(data)} of {size} elements")
+            return data
+
+        data = self.run("fetch_poi_data", size, fetch)
+        self.run("fetch_poi_data_tiled", size, lambda: fetch(max_tile_size=TILE_SIZE, workers=TILE_WORKERS),
+                 tile_size=TILE_SIZE, workers=TILE_WORKERS)
+
+        if "fetch_poi_data_cached" in self.selected:
+            configure_cache(ResponseCache(self._path(f"overpass-{size}.sqlite3")))
+            with contextlib.redirect_stderr(io.StringIO()):
+                fetch()
+            self.run("fetch_poi_data_cached", size, fetch)
+            configure_cache(None)
+
+        def fetch_streamed():
+            # Elements are dropped right away, so only the fetch itself holds memory
+            count = sum(1 for _ in iter_poi_data(bbox, self.poi_types, OSM_TYPES))
+            check(count == size, f"Fetched {count} of {size} elements")
+
+        self.run("iter_poi_data_streamed", size, fetch_streamed)
+        self.check_streamed_memory()
+
+        def fetch_projected(keys):
+            elements = list(iter_poi_data(bbox, self.poi_types, OSM_TYPES, keys=keys))
+            check(len(elements) == size, f"Fetched {len(elements)} of {size} elements")
+
+        self.run("iter_poi_data_projected", size, lambda: fetch_projected(PROJECTED_KEYS), keys=len(PROJECTED_KEYS))
+        # Malformed CSV responses are fetched again as JSON
+        self.run("iter_poi_data_projected_fallback", size, lambda: fetch_projected(EXPORT_KEYS),
+                 keys=len(EXPORT_KEYS))
+
+        if data is None:
+            with contextlib.redirect_stderr(io.StringIO()):
+                data = fetch()
+
+        cleaned = self.run("clean_poi_data", size, lambda: clean_poi_data(data))
+        if cleaned is None:
+            cleaned = clean_poi_data(data)
+        self.run("get_all_keys_from_data", size, lambda: get_all_keys_from_data(cleaned))
+
+        def exporter(function, path, *args, **options):
+            def run_export():
+                check(function(cleaned, EXPORT_KEYS, path, *args, **options), f"{function.__name__} failed")
+            return run_export
+
+        def remove(path):
+            return lambda: os.path.exists(path) and os.remove(path)
+
+        for name, path, function, args, options in (
+                ("export_csv", "out.csv", export_csv, (), {}),
+                ("export_csv_gzip", "out.csv.gz", export_csv, (), {}),
+                ("export_json", "out.json", export_json, (), {}),
+                ("export_sql", "out.sql", export_sql, ("poi_data", COLUMN_MAP), {}),
+                ("export_sql_batched", "out_batched.sql", export_sql, ("poi_data", COLUMN_MAP),
+                 {"batch_size": 1000}),
+                ("export_sql_copy", "out_copy.sql", export_sql, ("poi_data", COLUMN_MAP), {"copy": True}),
+                ("export_sqlite", "out.db", export_sqlite, ("poi_data", COLUMN_MAP), {})):
+            path = self._path(path)
+            self.run(name, size, exporter(function, path, *args, **options), setup=remove(path), output=path)
+
+        if importlib.util.find_spec("pyarrow") is None:
+            self.skip("export_parquet", size, "pyarrow is not installed")
+        else:
+            path = self._path("out.parquet")
+            self.run("export_parquet", size, exporter(export_parquet, path), setup=remove(path), output=path)
+
+
+def get_environment() -> Dict:
+    """
+    Describe the commit, interpreter and machine the benchmarks ran on
+
+    Returns:
+        Dictionary of environment details
+    """
+    def git(*args: str) -> Optional[str]:
+        try:
+            return subprocess.run(["git", *args], cwd=BENCHMARK_DIR, capture_output=True, text=True,
+                                  check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    status = git("status", "--porcelain")
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": git("rev-parse", "HEAD"),
+        "dirty": bool(status) if status is not None else None,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        # Optional dependencies switch to faster code paths
+        "optional_dependencies": {
+            module: importlib.util.find_spec(module) is not None
+            for module in ("numpy", "pyarrow", "zstandard", "yaml")
+        }
+    }
+
+
+def compare_results(results: List[Dict], baseline: Dict) -> None:
+    """
+    Print the change of every median time against an earlier run
+
+    Args:
+        results: Results of this run
+        baseline: Document written by an earlier run
+    """
+    previous = {(entry["benchmark"], entry["size"]): entry for entry in baseline.get("results", [])
+                if "seconds" in entry}
+    print(f"Compared to {(baseline.get('environment') or {}).get('commit') or 'baseline'}:", file=sys.stderr)
+
+    for entry in results:
+        before = previous.get((entry["benchmark"], entry["size"]))
+        if "seconds" not in entry or before is None:
+            continue
+        ratio = entry["seconds"]["median"] / before["seconds"]["median"]
+        label = entry["benchmark"] + (f" [{entry['size']}]" if entry["size"] is not None else "")
+        print(f"  {label:<45} {before['seconds']['median']:>12.6f}s -> {entry['seconds']['median']:>12.6f}s "
+              f"({(ratio - 1) * 100:+.1f}%)", file=sys.stderr)
+
+
+def print_summary(results: List[Dict]) -> None:
+    """
+    Print a table of the results
+
+    Args:
+        results: Benchmark results
+    """
+    print(f"  {'benchmark':<45} {'median':>12} {'peak memory':>14}", file=sys.stderr)
+    for entry in results:
+        label = entry["benchmark"] + (f" [{entry['size']}]" if entry["size"] is not None else "")
+        if "skipped" in entry:
+            print(f"  {label:<45} skipped ({entry['skipped']})", file=sys.stderr)
+            continue
+        peak = entry["peak_memory_bytes"]
+        memory = f"{peak / (1024 * 1024):.1f} MiB" if peak is not None else "-"
+        print(f"  {label:<45} {entry['seconds']['median']:>11.6f}s {memory:>14}", file=sys.stderr)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Offline benchmarks of POI-Harvester against a local mock Overpass and Nominatim server"
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=DEFAULT_SIZES,
+        metavar="N",
+        help=f"Number of elements of the synthetic datasets (default: {' '.join(map(str, DEFAULT_SIZES))})"
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=DEFAULT_REPEAT,
+        help=f"Timed runs per benchmark, the median is reported (default: {DEFAULT_REPEAT})"
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.0,
+        help="Seconds the mock server delays every response (default: 0)"
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=DEFAULT_SEED,
+        help=f"Seed of the synthetic data (default: {DEFAULT_SEED})"
+    )
+    parser.add_argument(
+        "--only",
+        nargs="+",
+        choices=GLOBAL_BENCHMARKS + SIZE_BENCHMARKS,
+        metavar="NAME",
+        help="Run only these benchmarks: " + ", ".join(GLOBAL_BENCHMARKS + SIZE_BENCHMARKS)
+    )
+    parser.add_argument(
+        "--no-memory",
+        action="store_true",
+        help="Skip the peak memory measurement, which runs every benchmark once more"
+    )
+    parser.add_argument(
+        "-o", "--output",
+        help="JSON results file (default: benchmark-results/<timestamp>_<commit>.json)"
+    )
+    parser.add_argument(
+        "--compare",
+        metavar="FILE",
+        help="Results file of an earlier run to compare the median times with"
+    )
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Show the output of POI-Harvester and the mock server"
+    )
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+
+    if any(size < 1 for size in args.sizes) or args.repeat < 1 or args.latency < 0:
+        print("Error: sizes and repeat must be positive, latency must not be negative", file=sys.stderr)
+        return 1
+
+    baseline = None
+    if args.compare:
+        try:
+            with open(args.compare, encoding="utf-8") as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error reading {args.compare}: {e}", file=sys.stderr)
+            return 1
+
+    selected = args.only or GLOBAL_BENCHMARKS + SIZE_BENCHMARKS
+    environment = get_environment()
+
+    with mock_server(args.latency, args.seed, args.verbose) as server_url:
+        runner = BenchmarkRunner(server_url, args.repeat, not args.no_memory, selected, args.verbose)
+        try:
+            print("Size independent benchmarks", file=sys.stderr)
+            runner.run_global()
+            for size in args.sizes:
+                print(f"Dataset of {size} elements", file=sys.stderr)
+                runner.run_size(size)
+        except BenchmarkError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+        finally:
+            runner.close()
+
+    document = {
+        "environment": environment,
+        "settings": {
+            "sizes": args.sizes,
+            "repeat": args.repeat,
+            "latency": args.latency,
+            "seed": args.seed,
+            "memory": not args.no_memory,
+            "poi_types": runner.poi_types,
+            "export_keys": EXPORT_KEYS
+        },
+        "results": runner.results
+    }
+
+    output = args.output
+    if output is None:
+        commit = (environment["commit"] or "unknown")[:10]
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
+        output = os.path.join(RESULTS_DIR, f"{stamp}_{commit}.json")
+    directory = os.path.dirname(output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2)
+        f.write("\n")
+
+    print_summary(runner.results)
+    if baseline is not None:
+        compare_results(runner.results, baseline)
+    print(f"Results written to: {output}", file=sys.stderr)
+    return 0
@@ -0,0 +1,280 @@
+"""
+Batch job runner for POI-Harvester CLI
+"""
+
+import argparse
+import json
+import os
+import shlex
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from .geocoding import geocode_locations
+from .main_cli import add_runtime_arguments, build_parser, configure_runtime, get_fetch_options, \
+    get_projection, resolve_area, run_job, validate_args
+from .overpass import report_fetch_error, validate_poi_types
+from .planner import CoveragePlanner
+
+
+def _to_argv(job: Dict) -> List[str]:
+    """
+    Convert a job description into command line arguments
+
+    Keys are option names without the leading dashes, e.g. "poi-types" or
+    "poi_types". True adds a flag, lists add several values. A job may
+    instead give its complete command line as "args".
+
+    Args:
+        job: Job dictionary from the manifest
+
+    Returns:
+        Argument list for the harvest parser
+    """
+    if "args" in job:
+        args = job["args"]
+        return shlex.split(args) if isinstance(args, str) else [str(arg) for arg in args]
+
+    argv = []
+    for key, value in job.items():
+        if key == "name" or value is None or value is False:
+            continue
+
+        option = "--" + key.replace("_", "-")
+        if value is True:
+            argv.append(option)
+        elif isinstance(value, (list, tuple)):
+            argv.append(option)
+            argv.extend(str(item) for item in value)
+        else:
+            argv.extend([option, str(value)])
+
+    return argv
+
+
+def load_manifest(path: str) -> List[Dict]:
+    """
+    Load the jobs of a batch manifest
+
+    JSON Lines manifests hold one job object per line. JSON and YAML manifests
+    hold either a list of jobs or an object with "jobs" and optional
+    "defaults" applied to every job. YAML requires the optional PyYAML package.
+
+    Args:
+        path: Path of a .jsonl, .json, .yaml or .yml file
+
+    Returns:
+        List of job dictionaries with defaults applied
+
+    Raises:
+        ValueError: If the manifest cannot be read
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            content = [json.loads(line) for line in f if line.strip() and not line.lstrip().startswith("#")]
+        elif path.endswith((".yaml", ".yml")):
+            try:
+                import yaml
+            except ImportError:
+                raise ValueError("PyYAML is not installed (install with: pip install poi-harvester[yaml])")
+            content = yaml.safe_load(f)
+        else:
+            content = json.load(f)
+
+    if isinstance(content, dict):
+        defaults = content.get("defaults", {})
+        jobs = content.get("jobs", [])
+    else:
+        defaults = {}
+        jobs = content
+
+    if not isinstance(jobs, list) or not all(isinstance(job, dict) for job in jobs):
+        raise ValueError("Manifest must contain a list of job objects")
+
+    return [{**defaults, **job} for job in jobs]
+
+
+def _area(bbox: Tuple[float, float, float, float]) -> float:
+    """Size of a bounding box in square degrees"""
+    return (bbox[2] - bbox[0]) * (bbox[3] - bbox[1])
+
+
+def _run_job(job: Dict, planner: CoveragePlanner, output_dir: str) -> None:
+    """
+    Fetch the part of a job's area not downloaded by other jobs and export the job
+
+    Args:
+        job: Prepared job with "args" and "area"
+        planner: Planner shared by all jobs of the batch
+        output_dir: Directory for auto-generated output file names
+    """
+    args = job["args"]
+    started = time.monotonic()
+    elements = None
+
+    # Jobs with a harvest state of their own fetch their changes themselves
+    if not args.incremental:
+        print(f"Fetching data for job {job['name']} from Overpass API...", file=sys.stderr)
+        try:
+            elements = planner.fetch(job["area"][0], validate_poi_types(args.poi_types), args.osm_types,
+                                     keys=get_projection(args), **get_fetch_options(args))
+        except Exception as e:
+            # Keep the real reason in the report instead of an empty result
+            report_fetch_error(e)
+            job["result"] = {"status": "failed", "pois": 0, "output": None, "error": f"Fetching failed: {e}"}
+            job["seconds"] = time.monotonic() - started
+            return
+
+    job["result"] = run_job(args, area=job["area"], elements=elements, output_dir=output_dir)
+    job["seconds"] = time.monotonic() - started
+
+
+def run_batch(jobs: List[Dict], output_dir: str = "", workers: int = 2) -> Dict:
+    """
+    Run many harvests in one process
+
+    Locations are geocoded once each, and jobs run on a pool of worker
+    threads. Jobs with the same filters share a coverage planner, so areas
+    overlapping between jobs are downloaded only once. The HTTP session, rate limits and caches configured
+    for the process are shared by all jobs.
+
+    Args:
+        jobs: Job dictionaries as returned by load_manifest
+        output_dir: Directory for auto-generated output file names
+        workers: Number of jobs running concurrently
+
+    Returns:
+        Summary report with one entry per job
+    """
+    started = time.monotonic()
+    parser = build_parser()
+    results: List[Optional[Dict]] = [None] * len(jobs)
+    prepared = []
+
+    def fail(index: int, name: str, error: str) -> None:
+        print(f"Error: Job {name}: {error}", file=sys.stderr)
+        results[index] = {"name": name, "status": "failed", "pois": 0, "output": None, "error": error}
+
+    for index, job in enumerate(jobs):
+        name = str(job.get("name", f"job-{index + 1}"))
+        try:
+            args = parser.parse_args(_to_argv(job))
+        except SystemExit:
+            # argparse already printed the reason
+            fail(index, name, "Invalid job arguments")
+            continue
+
+        error = validate_args(args)
+        if error:
+            fail(index, name, error)
+            continue
+
+        prepared.append({"index": index, "name": name, "args": args})
+
+    # Geocode every distinct location once, at Nominatim's pace
+    locations = geocode_locations(job["args"].location for job in prepared if job["args"].location)
+
+    ready = []
+    for job in prepared:
+        args = job["args"]
+        try:
+            job["area"] = resolve_area(args, locations.get(args.location) if args.location else None)
+        except ValueError as e:
+            fail(job["index"], job["name"], str(e))
+            continue
+        ready.append(job)
+
+    print(f"Running {len(jobs)} jobs", file=sys.stderr)
+    planner = CoveragePlanner()
+
+    # Larger areas first, so smaller ones are likely to find their area downloaded
+    ready.sort(key=lambda job: -_area(job["area"][0]))
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = [(job, executor.submit(_run_job, job, planner, output_dir)) for job in ready]
+        for job, future in futures:
+            try:
+                future.result()
+            except Exception as e:
+                # One broken job must not stop the others or the report
+                fail(job["index"], job["name"], f"Unexpected error: {e}")
+                continue
+            results[job["index"]] = {"name": job["name"], **job["result"], "seconds": round(job["seconds"], 3)}
+
+    return {
+        "jobs": results,
+        "succeeded": sum(1 for result in results if result["status"] == "ok"),
+        "failed": sum(1 for result in results if result["status"] != "ok"),
+        "fetches": planner.stats["downloads"],
+        "seconds": round(time.monotonic() - started, 3),
+    }
+
+
+def main_batch(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="poi-harvester batch",
+        description="Run many harvests from a job manifest in one process",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Each job takes the same options as a single harvest, e.g. one JSON Lines entry:
+  {"name": "berlin-cafes", "location": "Berlin", "radius": 2, "poi_types": ["cafe"], "format": "csv"}
+Rate limit, endpoint and cache options are taken from the batch command line.
+        """
+    )
+
+    parser.add_argument("manifest", help="Job manifest (.jsonl, .json, .yaml or .yml)")
+
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=2,
+        help="Number of jobs running concurrently (default: 2)"
+    )
+
+    parser.add_argument(
+        "--output-dir",
+        default=".",
+        help="Directory for outputs without an explicit output path (default: current directory)"
+    )
+
+    parser.add_argument(
+        "--report",
+        help="Path of the JSON summary report (default: batch-report.json in the output directory)"
+    )
+
+    parser.add_argument(
+        "--quiet", "-q",
+        action="store_true",
+        help="Suppress status messages"
+    )
+
+    add_runtime_arguments(parser)
+
+    args = parser.parse_args(argv)
+
+    if args.quiet:
+        sys.stderr = open(os.devnull, 'w')
+
+    if args.jobs < 1 or args.rate_limit <= 0:
+        print("Error: --jobs and --rate-limit must be positive", file=sys.stderr)
+        return 1
+
+    try:
+        jobs = load_manifest(args.manifest)
+    except (OSError, ValueError) as e:
+        print(f"Error: Cannot read manifest: {e}", file=sys.stderr)
+        return 1
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    cache = configure_runtime(args)
+
+    report = run_batch(jobs, output_dir=args.output_dir, workers=args.jobs)
+    if cache is not None:
+        report["cache"] = cache.stats()
+
+    report_file = args.report or os.path.join(args.output_dir, "batch-report.json")
+    with open(report_file, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    print(f"{report['succeeded']} of {len(report['jobs'])} jobs succeeded, report written to {report_file}",
+          file=sys.stderr)
+    return 0 if report["failed"] == 0 else 1
@@ -0,0 +1,366 @@
+"""
+Persistent response cache module for POI-Harvester CLI
+"""
+
+import hashlib
+import io
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from typing import IO, Dict, Iterator, List, Optional, Tuple
+
+# Size of the chunks a cached value is decompressed in
+CHUNK_SIZE = 64 * 1024
+
+# Compressed values are stored in rows of at most this size, so no value is ever held in memory as a whole
+STORE_CHUNK_SIZE = 1024 * 1024
+
+# Version of the cache schema, caches written with an older layout are discarded
+SCHEMA_VERSION = 1
+
+# Cached responses expire after one day by default
+DEFAULT_CACHE_TTL = 24 * 3600
+
+# Least recently used entries are evicted once the cache exceeds this size
+DEFAULT_CACHE_MAX_SIZE = 512 * 1024 * 1024
+
+
+def get_default_cache_dir() -> str:
+    """
+    Get the platform specific default cache directory
+
+    Returns:
+        Path of the POI-Harvester cache directory
+    """
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+
+    return os.path.join(base, "poi-harvester")
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize a query string so formatting differences map to the same cache key
+
+    Args:
+        query: Query string
+
+    Returns:
+        Query with surrounding whitespace and empty lines removed
+    """
+    return "\n".join(line.strip() for line in query.splitlines() if line.strip())
+
+
+def make_cache_key(*parts: str) -> str:
+    """
+    Build a content-addressed cache key
+
+    Args:
+        parts: Strings identifying the cached content
+
+    Returns:
+        SHA-256 hex digest of all parts
+    """
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    SQLite-backed store of compressed responses with TTL and LRU eviction
+
+    Values are compressed and stored as a sequence of chunk rows. Values
+    written in chunks are spilled to a temporary file until they are
+    complete, and cached values are read back one chunk row at a time, so
+    responses of any size are cached in constant memory.
+    """
+
+    def __init__(self, path: str, ttl: float = DEFAULT_CACHE_TTL,
+                 max_size: int = DEFAULT_CACHE_MAX_SIZE):
+        """
+        Args:
+            path: Path of the SQLite cache file
+            ttl: Default lifetime of an entry in seconds
+            max_size: Maximum total size of all compressed entries in bytes
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            # Older caches kept every value in a single row, their entries are simply dropped
+            self._conn.execute("DROP TABLE IF EXISTS entries")
+            self._conn.execute("DROP TABLE IF EXISTS chunks")
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                chunks INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                expires REAL NOT NULL,
+                accessed REAL NOT NULL
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS chunks (
+                key TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                data BLOB NOT NULL,
+                PRIMARY KEY (key, seq)
+            ) WITHOUT ROWID
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+        self._conn.commit()
+
+    def _load(self, key: str) -> Optional[int]:
+        """
+        Look up an entry and mark it as recently used
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Number of chunk rows of the entry or None if missing or expired
+        """
+        now = time.time()
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT chunks, expires FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None or row[1] < now:
+                if row is not None:
+                    self._delete([(key,)])
+                    self._conn.commit()
+                self.misses += 1
+                return None
+
+            self._conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+
+        return row[0]
+
+    def _iter_compressed(self, key: str, chunks: int) -> Iterator[bytes]:
+        """
+        Read the chunk rows of an entry one at a time
+
+        Args:
+            key: Cache key
+            chunks: Number of chunk rows
+
+        Yields:
+            Compressed chunks
+
+        Raises:
+            ValueError: If the entry was evicted while it was being read
+        """
+        for seq in range(chunks):
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT data FROM chunks WHERE key = ? AND seq = ?", (key, seq)
+                ).fetchone()
+            if row is None:
+                raise ValueError("Cache entry was evicted while being read")
+            yield row[0]
+
+    def _store(self, key: str, compressed: IO[bytes], size: int, ttl: Optional[float]) -> None:
+        """
+        Store a compressed value, evicting least recently used entries if the cache is full
+
+        Values larger than the whole cache are not stored.
+
+        Args:
+            key: Cache key
+            compressed: Binary file holding the zlib compressed value, positioned at its start
+            size: Size of the compressed value in bytes
+            ttl: Lifetime of the entry in seconds (defaults to the cache TTL)
+        """
+        if size > self.max_size:
+            return
+
+        now = time.time()
+        expires = now + (self.ttl if ttl is None else ttl)
+
+        with self._lock:
+            self._conn.execute("DELETE FROM chunks WHERE key = ?", (key,))
+            seq = 0
+            while True:
+                data = compressed.read(STORE_CHUNK_SIZE)
+                if not data and seq:
+                    break
+                self._conn.execute("INSERT INTO chunks (key, seq, data) VALUES (?, ?, ?)", (key, seq, data))
+                seq += 1
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, chunks, size, expires, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, seq, size, expires, now)
+            )
+            self._evict()
+            self._conn.commit()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Look up a cached value
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Cached value or None if missing or expired
+        """
+        chunks = self.iter_chunks(key)
+        return None if chunks is None else b"".join(chunks)
+
+    def iter_chunks(self, key: str) -> Optional[Iterator[bytes]]:
+        """
+        Look up a cached value and decompress it incrementally
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Iterator over chunks of the cached value or None if missing or expired
+        """
+        chunks = self._load(key)
+        if chunks is None:
+            return None
+
+        def decompress() -> Iterator[bytes]:
+            decompressor = zlib.decompressobj()
+            for compressed in self._iter_compressed(key, chunks):
+                view = memoryview(compressed)
+                for offset in range(0, len(view), CHUNK_SIZE):
+                    yield decompressor.decompress(view[offset:offset + CHUNK_SIZE])
+            yield decompressor.flush()
+
+        return decompress()
+
+    def put(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        """
+        Store a value, evicting least recently used entries if the cache is full
+
+        Args:
+            key: Cache key
+            value: Value to store
+            ttl: Lifetime of the entry in seconds (defaults to the cache TTL)
+        """
+        compressed = zlib.compress(value)
+        self._store(key, io.BytesIO(compressed), len(compressed), ttl)
+
+    def writer(self, key: str, ttl: Optional[float] = None) -> "CacheWriter":
+        """
+        Start storing a value that arrives in chunks
+
+        Args:
+            key: Cache key
+            ttl: Lifetime of the entry in seconds (defaults to the cache TTL)
+
+        Returns:
+            Writer that compresses chunks as they are written
+        """
+        return CacheWriter(self, key, ttl)
+
+    def _evict(self) -> None:
+        """Drop expired entries, then least recently used ones until under the size limit"""
+        expired = self._conn.execute("SELECT key FROM entries WHERE expires < ?", (time.time(),)).fetchall()
+        self._delete(expired)
+
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_size:
+            return
+
+        stale_keys = []
+        for key, size in self._conn.execute("SELECT key, size FROM entries ORDER BY accessed"):
+            if total <= self.max_size:
+                break
+            stale_keys.append((key,))
+            total -= size
+
+        self._delete(stale_keys)
+        self.evictions += len(stale_keys)
+
+    def _delete(self, keys: List[Tuple[str]]) -> None:
+        """Delete entries together with their chunk rows"""
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", keys)
+        self._conn.executemany("DELETE FROM chunks WHERE key = ?", keys)
+
+    def clear(self) -> None:
+        """Remove all entries"""
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.execute("DELETE FROM chunks")
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get hit/miss statistics of this cache instance
+
+        Returns:
+            Dictionary with hits, misses, evictions, entries and size in bytes
+        """
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": entries,
+            "size": size,
+        }
+
+    def close(self) -> None:
+        """Close the underlying database connection"""
+        with self._lock:
+            self._conn.close()
+
+
+class CacheWriter:
+    """Compresses a value chunk by chunk into a temporary file and stores it once complete"""
+
+    def __init__(self, cache: ResponseCache, key: str, ttl: Optional[float]):
+        self._cache = cache
+        self._key = key
+        self._ttl = ttl
+        self._compressor = zlib.compressobj()
+        self._spill = tempfile.TemporaryFile()
+        self._size = 0
+
+    def write(self, chunk: bytes) -> None:
+        """Compress the next chunk of the value and spill it to disk"""
+        compressed = self._compressor.compress(chunk)
+        self._spill.write(compressed)
+        self._size += len(compressed)
+
+    def commit(self) -> None:
+        """Store the complete value in the cache"""
+        with self._spill:
+            compressed = self._compressor.flush()
+            self._spill.write(compressed)
+            self._size += len(compressed)
+            self._spill.seek(0)
+            self._cache._store(self._key, self._spill, self._size, self._ttl)
+
+    def discard(self) -> None:
+        """Drop the value written so far"""
+        self._spill.close()
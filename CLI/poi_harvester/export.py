@@ -2,11 +2,34 @@
 Export module for POI-Harvester CLI
 """
 
+import contextlib
 import csv
+import gzip
+import io
+import itertools
 import json
+import lzma
 import os
+import shutil
+import sqlite3
 import sys
-from typing import List, Dict
+import tempfile
+from typing import Callable, List, Dict, IO, Iterable, Iterator, Optional, Sequence, Tuple, Union
+from .store import POIStore
+
+# File name suffix of each compression method
+COMPRESSION_SUFFIXES = {"gzip": ".gz", "xz": ".xz", "zstd": ".zst"}
+
+# Level used when no --compress-level is given
+DEFAULT_COMPRESS_LEVELS = {"gzip": 6, "xz": 6, "zstd": 3}
+
+_compress_level: Optional[int] = None
+_compress_threads = 0
+
+# Permissions of newly created output files, mkstemp would restrict them to the owner
+_umask = os.umask(0)
+os.umask(_umask)
+FILE_MODE = 0o666 & ~_umask
 
 
 def get_sql_header() -> str:
@@ -27,61 +50,343 @@ def get_sql_header() -> str:
 """
 
 
-def export_csv(data: List[Dict], keys: List[str], output_file: str) -> bool:
+def iter_export_rows(data: Iterable[Dict], keys: Sequence[str]) -> Iterator[Tuple[float, float, List[Optional[str]]]]:
     """
-    Export POI data to CSV format
+    Iterate over the exportable rows of POI data
+
+    A POIStore is read column-wise without building a dictionary per row.
 
     Args:
-        data: List of POI dictionaries
-        keys: List of OSM keys to include as columns
-        output_file: Output file path
+        data: Iterable of POI dictionaries or a POIStore
+        keys: List of OSM keys to extract
+
+    Yields:
+        Tuples of (lat, lon, values) with None for missing tags
+    """
+    if isinstance(data, POIStore):
+        yield from data.iter_rows(keys)
+        return
+
+    for item in data:
+        # Get coordinates
+        lat = item.get("lat")
+        lon = item.get("lon")
+
+        # Skip items without coordinates
+        if lat is None or lon is None:
+            continue
+
+        tags = item.get("tags", {})
+        yield lat, lon, [tags.get(key) for key in keys]
+
+
+def configure_compression(level: Optional[int] = None, threads: int = 0) -> None:
+    """
+    Set the compression level and zstd worker threads used for compressed outputs
+
+    Args:
+        level: Compression level (None for the default of each method)
+        threads: zstd worker threads (0 for one per CPU core)
+    """
+    global _compress_level, _compress_threads
+    _compress_level = level
+    _compress_threads = threads
+
+
+def get_compression(output: Union[str, IO]) -> Optional[str]:
+    """
+    Detect the compression method from the suffix of an output path
+
+    Args:
+        output: Output file path or writable text stream
 
     Returns:
-        True if export successful, False otherwise
+        Compression method or None for uncompressed output
+    """
+    if isinstance(output, str):
+        for method, suffix in COMPRESSION_SUFFIXES.items():
+            if output.endswith(suffix):
+                return method
+    return None
+
+
+def describe_output(output: Union[str, IO]) -> str:
+    """
+    Get a printable name for an output path or stream
+
+    Args:
+        output: Output file path, "-" for standard output, or writable text stream
+
+    Returns:
+        The path, or the name of the stream
+    """
+    if output == "-":
+        return "standard output"
+    return output if isinstance(output, str) else str(getattr(output, "name", "stream"))
+
+
+class SourceError(Exception):
+    """Raised when the data being exported fails to load, e.g. when a streamed fetch breaks off"""
+
+    def __init__(self, error: Exception):
+        super().__init__(str(error))
+        self.error = error
+
+
+def guard_source(data: Iterable[Dict]) -> Iterator[Dict]:
+    """
+    Wrap errors raised by a data source in SourceError
+
+    Exporters let SourceError pass instead of reporting it as an export
+    error, so callers can report fetch errors on their own.
+
+    Args:
+        data: Iterable of POI dictionaries, e.g. a streamed fetch
+
+    Yields:
+        The POI dictionaries of data
+
+    Raises:
+        SourceError: If iterating data raises an exception
     """
     try:
-        with open(output_file, "w", newline='', encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=["lat", "lon"] + keys)
-            writer.writeheader()
+        yield from data
+    except Exception as e:
+        raise SourceError(e) from e
 
-            for item in data:
-                # Get coordinates
-                lat = item.get("lat")
-                lon = item.get("lon")
 
-                # Skip items without coordinates
-                if lat is None or lon is None:
-                    continue
+@contextlib.contextmanager
+def replace_on_success(output: str) -> Iterator[str]:
+    """
+    Get a temporary path that replaces the output file once writing succeeded
 
-                # Build row
-                row = {"lat": lat, "lon": lon}
+    The temporary file is created next to the output, so os.replace stays
+    atomic and a failed export leaves the previous output in place.
 
-                # Add tag values
-                tags = item.get("tags", {})
-                for key in keys:
-                    row[key] = tags.get(key, "")
+    Args:
+        output: Output file path
 
-                writer.writerow(row)
+    Yields:
+        Path to write the output to
+    """
+    directory, name = os.path.split(os.path.abspath(output))
+    fd, temp_path = tempfile.mkstemp(prefix=f".{name}.", suffix=".tmp", dir=directory)
+    os.close(fd)
+    try:
+        os.chmod(temp_path, FILE_MODE)
+        yield temp_path
+        os.replace(temp_path, output)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+def _get_compressor(compression: str) -> Callable[[IO], IO]:
+    """
+    Get a function wrapping a binary stream in a compressing binary stream
+
+    The returned compressor leaves the wrapped stream open when it is closed.
+
+    Args:
+        compression: Compression method (gzip, xz or zstd)
+
+    Returns:
+        Function taking a writable binary stream and returning the compressing stream
+
+    Raises:
+        RuntimeError: If the module for zstd is not installed
+    """
+    level = _compress_level if _compress_level is not None else DEFAULT_COMPRESS_LEVELS[compression]
+
+    if compression == "gzip":
+        return lambda raw: gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=level)
+    if compression == "xz":
+        return lambda raw: lzma.LZMAFile(raw, "wb", preset=level)
+
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError("zstandard is not installed (install with: pip install poi-harvester[zstd])")
+    # Negative thread counts let zstd start one worker per CPU core
+    compressor = zstandard.ZstdCompressor(level=level, threads=_compress_threads if _compress_threads > 0 else -1)
+    return lambda raw: compressor.stream_writer(raw, closefd=False)
+
+
+@contextlib.contextmanager
+def open_binary_output(output: str, compression: Optional[str] = None) -> Iterator[IO]:
+    """
+    Open an output path or standard output for writing bytes, optionally compressed
+
+    Args:
+        output: Output file path or "-" for standard output
+        compression: Compression method (None to detect it from the suffix)
+
+    Yields:
+        Writable binary stream
+    """
+    compression = compression or get_compression(output)
+    # Fail before an empty output file is created
+    compressor = _get_compressor(compression) if compression else None
+
+    with contextlib.ExitStack() as stack:
+        if output == "-":
+            raw = sys.stdout.buffer
+            stack.callback(raw.flush)
+        else:
+            path = stack.enter_context(replace_on_success(output))
+            raw = stack.enter_context(open(path, "wb"))
+
+        if compressor:
+            yield stack.enter_context(compressor(raw))
+        else:
+            yield raw
+
+
+@contextlib.contextmanager
+def open_output(output: Union[str, IO], newline: Optional[str] = None,
+                compression: Optional[str] = None) -> Iterator[IO]:
+    """
+    Open an output path for writing text, or use an already open text stream
+
+    Paths ending in .gz, .xz or .zst are compressed while writing, as is
+    any path or standard output when a compression method is given.
+    Streams are left open, so callers such as the HTTP server keep control of them.
+
+    Args:
+        output: Output file path, "-" for standard output, or writable text stream
+        newline: Newline translation of the text stream
+        compression: Compression method (None to detect it from the suffix)
 
-        print(f"CSV exported to: {output_file}", file=sys.stderr)
+    Yields:
+        Writable text stream
+    """
+    if hasattr(output, "write"):
+        yield output
+    elif output == "-" and not compression:
+        yield sys.stdout
+        sys.stdout.flush()
+    elif compression or get_compression(output):
+        with open_binary_output(output, compression) as binary:
+            text = io.TextIOWrapper(binary, encoding="utf-8", newline=newline)
+            try:
+                yield text
+            finally:
+                # Flush into the compressor but leave closing it to open_binary_output
+                text.flush()
+                text.detach()
+    else:
+        with replace_on_success(output) as path, open(path, "w", newline=newline, encoding="utf-8") as f:
+            yield f
+
+
+def is_numeric_column(data: Iterable[Dict], key: str) -> bool:
+    """
+    Check whether a column holds computed numbers instead of tag strings
+
+    Args:
+        data: Iterable of POI dictionaries or a POIStore
+        key: Column key
+
+    Returns:
+        True for numeric columns of a POIStore, e.g. distance_km
+    """
+    return isinstance(data, POIStore) and key in data.numeric_columns
+
+
+def export_csv(data: Iterable[Dict], keys: List[str], output_file: Union[str, IO],
+               compression: Optional[str] = None) -> bool:
+    """
+    Export POI data to CSV format
+
+    Args:
+        data: Iterable of POI dictionaries or a POIStore
+        keys: List of OSM keys to include as columns
+        output_file: Output file path, "-" for standard output, or writable text stream
+        compression: Compression method (None to detect it from the suffix)
+
+    Returns:
+        True if export successful, False otherwise
+    """
+    try:
+        with open_output(output_file, newline='', compression=compression) as f:
+            writer = csv.writer(f)
+            writer.writerow(["lat", "lon"] + keys)
+
+            for lat, lon, values in iter_export_rows(data, keys):
+                writer.writerow([lat, lon] + ["" if value is None else value for value in values])
+
+        print(f"CSV exported to: {describe_output(output_file)}", file=sys.stderr)
         return True
 
+    except SourceError:
+        raise
+
     except Exception as e:
         print(f"Error exporting CSV: {e}", file=sys.stderr)
         return False
 
 
-def export_sql(data: List[Dict], keys: List[str], output_file: str,
-               table_name: str, column_map: Dict[str, str]) -> bool:
+def quote_identifier(name: str) -> str:
+    """
+    Quote a table or column name for use in SQL statements
+
+    Args:
+        name: Identifier, e.g. a tag key such as addr:city
+
+    Returns:
+        Identifier in double quotes, with embedded double quotes doubled
+    """
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _sql_literal(value) -> str:
+    """
+    Format a value as SQL literal, leaving numbers unquoted
+
+    Args:
+        value: Column value
+
+    Returns:
+        SQL literal string
+    """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return repr(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _copy_literal(value) -> str:
+    """
+    Format a value for a PostgreSQL COPY text block
+
+    Args:
+        value: Column value
+
+    Returns:
+        Value with backslash, tab and line break characters escaped
+    """
+    return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+def export_sql(data: Iterable[Dict], keys: List[str], output_file: Union[str, IO],
+               table_name: str, column_map: Dict[str, str],
+               batch_size: int = 1, copy: bool = False, compression: Optional[str] = None) -> bool:
     """
     Export POI data to SQL file format
 
+    By default one INSERT statement is written per POI. With a batch size
+    above one, rows are grouped into multi-row INSERT statements, and with
+    copy a PostgreSQL COPY block is written instead. Both bulk variants are
+    wrapped in a single transaction.
+
     Args:
-        data: List of POI dictionaries
+        data: Iterable of POI dictionaries or a POIStore
         keys: List of OSM keys to include as columns
-        output_file: Output file path
+        output_file: Output file path, "-" for standard output, or writable text stream
         table_name: SQL table name
         column_map: Mapping of OSM keys to SQL column names
+        batch_size: Number of rows per INSERT statement
+        copy: Write a PostgreSQL COPY block instead of INSERT statements
+        compression: Compression method (None to detect it from the suffix)
 
     Returns:
         True if export successful, False otherwise
@@ -96,127 +401,370 @@ def export_sql(data: List[Dict], keys: List[str], output_file: str,
         mapped_columns = {}
         for key in keys:
             column_name = column_map.get(key, key)
-            column_definitions[column_name] = "TEXT"
+            column_definitions[column_name] = "REAL" if is_numeric_column(data, key) else "TEXT"
             mapped_columns[key] = column_name
 
         all_columns = list(column_definitions.keys())
+        columns_str = ", ".join(quote_identifier(col) for col in all_columns)
+        table = quote_identifier(table_name)
+
+        # Position in keys of the tag shown in each text column (later keys win on name clashes)
+        key_positions = {mapped_columns[key]: i for i, key in enumerate(keys)}
+        value_positions = [key_positions[col] for col in all_columns[2:]]
 
         # Create table statement
-        create_stmt = f"CREATE TABLE IF NOT EXISTS {table_name} (\n  " + \
-                      ",\n  ".join([f"{col} {typ}" for col, typ in column_definitions.items()]) + \
+        create_stmt = f"CREATE TABLE IF NOT EXISTS {table} (\n  " + \
+                      ",\n  ".join([f"{quote_identifier(col)} {typ}" for col, typ in column_definitions.items()]) + \
                       "\n);"
 
+        bulk = copy or batch_size > 1
+        format_value = _copy_literal if copy else _sql_literal
+        separator = "\t" if copy else ", "
+
         # Write SQL file
-        with open(output_file, "w", encoding="utf-8") as f:
+        with open_output(output_file, compression=compression) as f:
             # Write header
             f.write(get_sql_header())
 
             # Write create table statement
             f.write(create_stmt + "\n\n")
 
-            # Write insert statements
-            for item in data:
-                # Get coordinates
-                lat = item.get("lat")
-                lon = item.get("lon")
+            if bulk:
+                f.write("BEGIN;\n")
+            if copy:
+                f.write(f"COPY {table} ({columns_str}) FROM stdin;\n")
+
+            batch = []
+
+            def flush_batch():
+                f.write(f"INSERT INTO {table} ({columns_str}) VALUES\n  " +
+                        ",\n  ".join(batch) + ";\n")
+                batch.clear()
+
+            # Write rows
+            for lat, lon, values in iter_export_rows(data, keys):
+                row = [lat, lon] + ["" if values[i] is None else values[i] for i in value_positions]
+                values_str = separator.join(format_value(value) for value in row)
+
+                if copy:
+                    f.write(values_str + "\n")
+                elif bulk:
+                    batch.append(f"({values_str})")
+                    if len(batch) >= batch_size:
+                        flush_batch()
+                else:
+                    f.write(f"INSERT INTO {table} ({columns_str}) VALUES ({values_str});\n")
+
+            if batch:
+                flush_batch()
+            if copy:
+                f.write("\\.\n")
+            if bulk:
+                f.write("COMMIT;\n")
+
+        print(f"SQL exported to: {describe_output(output_file)}", file=sys.stderr)
+        return True
 
-                # Skip items without coordinates
-                if lat is None or lon is None:
-                    continue
+    except SourceError:
+        raise
 
-                # Build row data
-                row = {"lat": lat, "lon": lon}
+    except Exception as e:
+        print(f"Error exporting SQL: {e}", file=sys.stderr)
+        return False
 
-                # Add mapped tag values
-                tags = item.get("tags", {})
-                for tag_key, col_name in mapped_columns.items():
-                    row[col_name] = tags.get(tag_key, "")
 
-                # Escape single quotes and build insert statement
-                escaped_values = []
-                for col in all_columns:
-                    value = str(row.get(col, "")).replace("'", "''")
-                    escaped_values.append(f"'{value}'")
+def export_json(data: Iterable[Dict], keys: List[str], output_file: Union[str, IO],
+                compression: Optional[str] = None) -> bool:
+    """
+    Export POI data to JSON format
+
+    Items are written one by one, so the output never has to be held in memory.
 
-                values_str = ", ".join(escaped_values)
-                columns_str = ", ".join(all_columns)
+    Args:
+        data: Iterable of POI dictionaries or a POIStore
+        keys: List of OSM keys to include
+        output_file: Output file path, "-" for standard output, or writable text stream
+        compression: Compression method (None to detect it from the suffix)
+
+    Returns:
+        True if export successful, False otherwise
+    """
+    try:
+        with open_output(output_file, compression=compression) as f:
+            f.write("[")
+            separator = "\n"
 
-                insert_stmt = f"INSERT INTO {table_name} ({columns_str}) VALUES ({values_str});"
-                f.write(insert_stmt + "\n")
+            for lat, lon, values in iter_export_rows(data, keys):
+                # Build JSON object
+                json_item = {
+                    "lat": lat,
+                    "lon": lon
+                }
 
-        print(f"SQL exported to: {output_file}", file=sys.stderr)
+                # Add tag values
+                for key, value in zip(keys, values):
+                    if value is not None and value != "":  # Only include non-empty values
+                        json_item[key] = value
+
+                # Indent the object as an element of the top-level array
+                item_str = json.dumps(json_item, indent=2, ensure_ascii=False)
+                f.write(separator + "  " + item_str.replace("\n", "\n  "))
+                separator = ",\n"
+
+            f.write("]" if separator == "\n" else "\n]")
+
+        print(f"JSON exported to: {describe_output(output_file)}", file=sys.stderr)
         return True
 
+    except SourceError:
+        raise
+
     except Exception as e:
-        print(f"Error exporting SQL: {e}", file=sys.stderr)
+        print(f"Error exporting JSON: {e}", file=sys.stderr)
         return False
 
 
-def export_json(data: List[Dict], keys: List[str], output_file: str) -> bool:
+def export_sqlite(data: Iterable[Dict], keys: List[str], output_file: str,
+                  table_name: str, column_map: Dict[str, str],
+                  batch_size: int = 10000, compression: Optional[str] = None, append: bool = False) -> bool:
     """
-    Export POI data to JSON format
+    Export POI data directly into a SQLite database
+
+    Rows are inserted with a prepared statement in batches inside a single
+    transaction, and an R*Tree index on lat/lon is built for bbox queries.
+    An existing table of the same name and its index are replaced unless
+    rows are appended to it.
+    A compressed database is built in a temporary file first and then
+    compressed into the output.
 
     Args:
-        data: List of POI dictionaries
-        keys: List of OSM keys to include
+        data: Iterable of POI dictionaries or a POIStore
+        keys: List of OSM keys to include as columns
+        output_file: Output database path
+        table_name: SQL table name
+        column_map: Mapping of OSM keys to SQL column names
+        batch_size: Number of rows passed to each executemany call
+        compression: Compression method (None to detect it from the suffix)
+        append: Append rows to an existing table instead of replacing it
+
+    Returns:
+        True if export successful, False otherwise
+    """
+    compression = compression or get_compression(output_file)
+    database = output_file
+    if compression:
+        fd, database = tempfile.mkstemp(suffix=".sqlite3")
+        os.close(fd)
+    # A database created by this export is removed again if the export fails
+    created = not os.path.exists(database)
+    exported = False
+
+    try:
+        # Build column definitions
+        column_definitions = {
+            "lat": "REAL",
+            "lon": "REAL"
+        }
+
+        mapped_columns = {}
+        for key in keys:
+            column_name = column_map.get(key, key)
+            column_definitions[column_name] = "REAL" if is_numeric_column(data, key) else "TEXT"
+            mapped_columns[key] = column_name
+
+        all_columns = list(column_definitions.keys())
+        table = quote_identifier(table_name)
+        rtree = quote_identifier(table_name + "_rtree")
+        column_stmt = ", ".join([f"{quote_identifier(col)} {typ}" for col, typ in column_definitions.items()])
+        insert_stmt = f"INSERT INTO {table} ({', '.join(quote_identifier(col) for col in all_columns)}) " \
+                      f"VALUES ({', '.join(['?'] * len(all_columns))})"
+
+        # Position in keys of the tag shown in each text column (later keys win on name clashes)
+        key_positions = {mapped_columns[key]: i for i, key in enumerate(keys)}
+        value_positions = [key_positions[col] for col in all_columns[2:]]
+
+        def rows():
+            for lat, lon, values in iter_export_rows(data, keys):
+                yield (lat, lon, *["" if values[i] is None else values[i] for i in value_positions])
+
+        conn = sqlite3.connect(database, isolation_level=None)
+        try:
+            # Bulk-load settings trading crash safety for speed while the export runs
+            conn.execute("PRAGMA journal_mode=MEMORY")
+            conn.execute("PRAGMA synchronous=OFF")
+
+            conn.execute("BEGIN")
+            if not append:
+                # Rerunning an export replaces the rows of the previous run
+                conn.execute(f"DROP TABLE IF EXISTS {rtree}")
+                conn.execute(f"DROP TABLE IF EXISTS {table}")
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {table} ({column_stmt})")
+
+            row_iter = rows()
+            while True:
+                batch = list(itertools.islice(row_iter, batch_size))
+                if not batch:
+                    break
+                conn.executemany(insert_stmt, batch)
+
+            try:
+                conn.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {rtree} "
+                             f"USING rtree(id, min_lat, max_lat, min_lon, max_lon)")
+                conn.execute(f"INSERT OR REPLACE INTO {rtree} "
+                             f"SELECT rowid, lat, lat, lon, lon FROM {table}")
+            except sqlite3.OperationalError as e:
+                print(f"Warning: Spatial index not created: {e}", file=sys.stderr)
+
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+        if compression:
+            with open(database, "rb") as src, open_binary_output(output_file, compression) as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+
+        exported = True
+        print(f"SQLite database exported to: {describe_output(output_file)}", file=sys.stderr)
+        return True
+
+    except SourceError:
+        raise
+
+    except Exception as e:
+        print(f"Error exporting SQLite database: {e}", file=sys.stderr)
+        return False
+
+    finally:
+        if compression or (created and not exported and os.path.exists(database)):
+            os.remove(database)
+
+
+def export_parquet(data: Iterable[Dict], keys: List[str], output_file: str,
+                   row_group_size: int = 65536, compression: Optional[str] = None) -> bool:
+    """
+    Export POI data to a columnar Parquet file
+
+    lat/lon and computed numeric columns are stored as float64 columns and
+    every tag key as a dictionary-encoded string column, with nulls for
+    missing tags. Rows are
+    written in row groups, so only one row group is held in memory at a time.
+    Pages are compressed inside the file with zstd unless gzip is requested.
+    Requires the optional pyarrow dependency.
+
+    Args:
+        data: Iterable of POI dictionaries or a POIStore
+        keys: List of OSM keys to include as columns
         output_file: Output file path
+        row_group_size: Number of rows per Parquet row group
+        compression: Page compression codec, gzip or zstd (default: zstd)
 
     Returns:
         True if export successful, False otherwise
     """
     try:
-        # Build JSON structure
-        json_data = []
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        print("Error exporting Parquet: pyarrow is not installed "
+              "(install with: pip install poi-harvester[parquet])", file=sys.stderr)
+        return False
 
-        for item in data:
-            # Get coordinates
-            lat = item.get("lat")
-            lon = item.get("lon")
-
-            # Skip items without coordinates
-            if lat is None or lon is None:
-                continue
-
-            # Build JSON object
-            json_item = {
-                "lat": lat,
-                "lon": lon
-            }
-
-            # Add tag values
-            tags = item.get("tags", {})
-            for key in keys:
-                value = tags.get(key, "")
-                if value:  # Only include non-empty values
-                    json_item[key] = value
-
-            json_data.append(json_item)
-
-        # Write JSON file
-        with open(output_file, "w", encoding="utf-8") as f:
-            json.dump(json_data, f, indent=2, ensure_ascii=False)
-
-        print(f"JSON exported to: {output_file}", file=sys.stderr)
+    try:
+        schema = pa.schema(
+            [("lat", pa.float64()), ("lon", pa.float64())] +
+            [(key, pa.float64() if is_numeric_column(data, key) else pa.dictionary(pa.int32(), pa.string()))
+             for key in keys]
+        )
+
+        def write_row_group(writer, lats, lons, columns):
+            arrays = [pa.array(lats, pa.float64()), pa.array(lons, pa.float64())]
+            for field, values in zip(list(schema)[2:], columns):
+                if pa.types.is_dictionary(field.type):
+                    arrays.append(pa.array(values, pa.string()).dictionary_encode())
+                else:
+                    arrays.append(pa.array(values, field.type))
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+
+        with replace_on_success(output_file) as path, \
+                pq.ParquetWriter(path, schema, compression=compression or "zstd",
+                                 compression_level=_compress_level) as writer:
+            lats, lons, columns = [], [], [[] for _ in keys]
+
+            for lat, lon, values in iter_export_rows(data, keys):
+                lats.append(lat)
+                lons.append(lon)
+
+                for column, value in zip(columns, values):
+                    column.append(value)
+
+                if len(lats) >= row_group_size:
+                    write_row_group(writer, lats, lons, columns)
+                    lats, lons, columns = [], [], [[] for _ in keys]
+
+            if lats:
+                write_row_group(writer, lats, lons, columns)
+
+        print(f"Parquet exported to: {output_file}", file=sys.stderr)
         return True
 
+    except SourceError:
+        raise
+
     except Exception as e:
-        print(f"Error exporting JSON: {e}", file=sys.stderr)
+        print(f"Error exporting Parquet: {e}", file=sys.stderr)
         return False
 
 
-def get_all_keys_from_data(data: List[Dict]) -> List[str]:
+def get_all_keys_from_data(data: Iterable[Dict]) -> List[str]:
     """
     Extract all unique tag keys from POI data
 
     Args:
-        data: List of POI dictionaries
+        data: Iterable of POI dictionaries or a POIStore
 
     Returns:
         Sorted list of unique tag keys
     """
+    if isinstance(data, POIStore):
+        return data.keys()
+
     all_keys = set()
     for item in data:
         tags = item.get("tags", {})
         all_keys.update(tags.keys())
 
-    return sorted(all_keys)
\ No newline at end of file
+    return sorted(all_keys)
+
+
+def spill_with_keys(data: Iterable[Dict]) -> Tuple[List[str], Iterator[Dict]]:
+    """
+    Collect all tag keys of a POI stream while spilling the stream to disk
+
+    The stream is written to a temporary file as JSON lines in a first pass,
+    and the returned iterator replays it, so exporters that need the full key
+    set up front still run in constant memory.
+
+    Args:
+        data: Iterable of POI dictionaries
+
+    Returns:
+        Tuple of sorted unique tag keys and an iterator over the spilled POIs
+    """
+    spill = tempfile.TemporaryFile("w+", encoding="utf-8")
+    all_keys = set()
+
+    try:
+        for item in data:
+            all_keys.update(item.get("tags", {}).keys())
+            spill.write(json.dumps(item, ensure_ascii=False) + "\n")
+        spill.seek(0)
+    except BaseException:
+        spill.close()
+        raise
+
+    def replay() -> Iterator[Dict]:
+        with spill:
+            for line in spill:
+                yield json.loads(line)
+
+    return sorted(all_keys), replay()
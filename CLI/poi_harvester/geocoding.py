@@ -2,37 +2,108 @@
 Geocoding module for POI-Harvester CLI
 """
 
+import json
 import requests
 import sys
-from typing import Optional, Tuple
+from typing import Dict, Iterable, Optional, Tuple
+from .cache import ResponseCache, make_cache_key
+from .network import RateLimiter, get_session
 
+NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
 
-def geocode_location(query: str) -> Optional[Tuple[float, float]]:
+# Nominatim usage policy allows at most one request per second
+_rate_limiter = RateLimiter(1.0)
+
+# Places rarely move, failed lookups are retried after an hour
+GEOCODE_CACHE_TTL = 30 * 24 * 3600
+NEGATIVE_CACHE_TTL = 3600
+
+_cache: Optional[ResponseCache] = None
+
+
+def configure_geocode_cache(cache: Optional[ResponseCache]) -> None:
     """
-    Geocode a location string to lat/lon coordinates using Nominatim API
+    Set the persistent cache used for geocoding results
 
     Args:
-        query: Location string (e.g., "Berlin", "10115", "New York")
+        cache: Response cache or None to disable caching
+    """
+    global _cache
+    _cache = cache
+
+
+def normalize_location(query: str) -> str:
+    """
+    Normalize a location string so trivially different spellings share a cache entry
+
+    Args:
+        query: Location string
 
     Returns:
-        Tuple of (lat, lon) or None if geocoding failed
+        Case-folded query with collapsed whitespace
+    """
+    return " ".join(query.casefold().split())
+
+
+def _query_nominatim(query: str) -> Optional[Tuple[float, float]]:
+    """
+    Look up a location with the Nominatim API
+
+    Args:
+        query: Location string
+
+    Returns:
+        Tuple of (lat, lon) or None if the location is unknown
+
+    Raises:
+        requests.RequestException: On network errors
     """
-    url = "https://nominatim.openstreetmap.org/search"
     params = {
         "q": query,
         "format": "json",
         "limit": 1
     }
 
+    _rate_limiter.acquire()
+    res = get_session().get(NOMINATIM_URL, params=params, timeout=30)
+    res.raise_for_status()
+    data = res.json()
+
+    if data:
+        return float(data[0]["lat"]), float(data[0]["lon"])
+
+    return None
+
+
+def geocode_location(query: str) -> Optional[Tuple[float, float]]:
+    """
+    Geocode a location string to lat/lon coordinates using Nominatim API
+
+    Results, including failed lookups, are served from the geocoding cache when available.
+
+    Args:
+        query: Location string (e.g., "Berlin", "10115", "New York")
+
+    Returns:
+        Tuple of (lat, lon) or None if geocoding failed
+    """
+    cache = _cache
+    key = make_cache_key("nominatim", normalize_location(query))
+
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            coords = json.loads(cached)
+            return tuple(coords) if coords else None
+
     try:
-        res = requests.get(url, params=params, headers={"User-Agent": "POI-Harvester-CLI"})
-        res.raise_for_status()
-        data = res.json()
+        coords = _query_nominatim(query)
+
+        if cache is not None:
+            ttl = GEOCODE_CACHE_TTL if coords else NEGATIVE_CACHE_TTL
+            cache.put(key, json.dumps(coords).encode("utf-8"), ttl=ttl)
 
-        if data:
-            lat = float(data[0]["lat"])
-            lon = float(data[0]["lon"])
-            return lat, lon
+        return coords
 
     except requests.RequestException as e:
         print(f"Network error during geocoding: {e}", file=sys.stderr)
@@ -41,4 +112,29 @@ def geocode_location(query: str) -> Optional[Tuple[float, float]]:
     except Exception as e:
         print(f"Unexpected error during geocoding: {e}", file=sys.stderr)
 
-    return None
\ No newline at end of file
+    return None
+
+
+def geocode_locations(queries: Iterable[str]) -> Dict[str, Optional[Tuple[float, float]]]:
+    """
+    Geocode many location strings over one keep-alive session
+
+    Queries that normalize to the same location are looked up only once, and
+    requests are spaced to honor Nominatim's limit of one request per second.
+
+    Args:
+        queries: Location strings
+
+    Returns:
+        Dictionary mapping each query to (lat, lon) or None if geocoding failed
+    """
+    results = {}
+    resolved = {}
+
+    for query in queries:
+        normalized = normalize_location(query)
+        if normalized not in resolved:
+            resolved[normalized] = geocode_location(query)
+        results[query] = resolved[normalized]
+
+    return results
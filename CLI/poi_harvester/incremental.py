@@ -0,0 +1,219 @@
+"""
+Incremental harvesting module for POI-Harvester CLI
+"""
+
+import json
+import sqlite3
+import sys
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+from .overpass import iter_poi_data
+
+# Suffix of the state database stored next to the output file
+STATE_SUFFIX = ".state.sqlite3"
+
+
+def get_state_path(output_file: str) -> str:
+    """
+    Get the path of the harvest state belonging to an output file
+
+    Args:
+        output_file: Output file path
+
+    Returns:
+        Path of the state database
+    """
+    return output_file + STATE_SUFFIX
+
+
+def make_signature(bbox: Tuple[float, float, float, float],
+                   poi_types: List[str],
+                   osm_types: List[str]) -> str:
+    """
+    Describe a harvest so a state is only reused for the same query
+
+    Args:
+        bbox: Bounding box (south, west, north, east)
+        poi_types: List of POI types
+        osm_types: List of OSM object types
+
+    Returns:
+        JSON string identifying the harvest
+    """
+    return json.dumps([[round(value, 7) for value in bbox], sorted(poi_types), sorted(osm_types)])
+
+
+class HarvestState:
+    """
+    SQLite store of the elements of the last harvest and the timestamp of its data
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Path of the state database
+        """
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS elements (
+                type TEXT NOT NULL,
+                id INTEGER NOT NULL,
+                lat REAL,
+                lon REAL,
+                tags TEXT NOT NULL,
+                PRIMARY KEY (type, id)
+            )
+        """)
+        self._conn.commit()
+
+    def get_meta(self, key: str) -> Optional[str]:
+        """
+        Look up a metadata value
+
+        Args:
+            key: Metadata key
+
+        Returns:
+            Stored value or None
+        """
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        """
+        Store a metadata value (committed with the next apply)
+
+        Args:
+            key: Metadata key
+            value: Value to store
+        """
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    @property
+    def timestamp(self) -> Optional[str]:
+        """Timestamp of the OSM data of the last harvest"""
+        return self.get_meta("timestamp")
+
+    def reset(self, signature: str) -> None:
+        """
+        Drop all elements and start a new harvest (committed with the next apply)
+
+        Args:
+            signature: Signature of the new harvest (see make_signature)
+        """
+        self._conn.execute("DELETE FROM elements")
+        self._conn.execute("DELETE FROM meta")
+        self.set_meta("signature", signature)
+
+    def rollback(self) -> None:
+        """Discard all changes since the last apply"""
+        self._conn.rollback()
+
+    def apply(self, elements: List[Dict], present: Optional[set] = None) -> Tuple[int, int]:
+        """
+        Store new or changed elements and drop deleted ones in one transaction
+
+        Args:
+            elements: Elements to insert or replace
+            present: (type, id) of every element that still exists, None to keep all
+
+        Returns:
+            Tuple of (number of stored elements, number of deleted elements)
+        """
+        def rows():
+            for element in elements:
+                lat = element.get("lat")
+                lon = element.get("lon")
+                if lat is None or lon is None:
+                    center = element.get("center", {})
+                    lat = center.get("lat")
+                    lon = center.get("lon")
+                yield (element["type"], element["id"], lat, lon,
+                       json.dumps(element.get("tags", {}), ensure_ascii=False))
+
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO elements (type, id, lat, lon, tags) VALUES (?, ?, ?, ?, ?)",
+                rows()
+            )
+
+            deleted = []
+            if present is not None:
+                deleted = [key for key in self._conn.execute("SELECT type, id FROM elements")
+                           if key not in present]
+                self._conn.executemany("DELETE FROM elements WHERE type = ? AND id = ?", deleted)
+
+        return len(elements), len(deleted)
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM elements").fetchone()[0]
+
+    def iter_elements(self) -> Iterator[Dict]:
+        """
+        Iterate over the stored elements in a stable order
+
+        Yields:
+            Elements in the shape returned by the Overpass API
+        """
+        cursor = self._conn.execute("SELECT type, id, lat, lon, tags FROM elements ORDER BY type, id")
+        for element_type, element_id, lat, lon, tags in cursor:
+            yield {"type": element_type, "id": element_id, "lat": lat, "lon": lon, "tags": json.loads(tags)}
+
+    def close(self) -> None:
+        """Close the underlying database connection"""
+        self._conn.close()
+
+
+def update_state(state: HarvestState,
+                 bbox: Tuple[float, float, float, float],
+                 poi_types: List[str],
+                 osm_types: List[str],
+                 **fetch_options) -> Tuple[int, int]:
+    """
+    Bring a harvest state up to date with the Overpass API
+
+    The first harvest downloads everything. Later harvests only download
+    elements changed since the stored data timestamp in full, plus the ids
+    of all matching elements to detect deletions. Nothing is changed if the
+    download fails.
+
+    Args:
+        state: Harvest state
+        bbox: Bounding box (south, west, north, east)
+        poi_types: List of POI types to query
+        osm_types: List of OSM object types (node, way, relation)
+        fetch_options: Further options passed to iter_poi_data
+
+    Returns:
+        Tuple of (number of new or changed elements, number of deleted elements)
+    """
+    signature = make_signature(bbox, poi_types, osm_types)
+    newer = state.timestamp
+    if newer and state.get_meta("signature") != signature:
+        print("Harvest parameters changed, starting a full harvest", file=sys.stderr)
+        newer = None
+    if not newer:
+        state.reset(signature)
+
+    started = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+    timestamps = []
+    changed = []
+    present = set()
+
+    try:
+        for element in iter_poi_data(bbox, poi_types, osm_types, newer=newer, timestamps=timestamps,
+                                     **fetch_options):
+            present.add((element["type"], element["id"]))
+            # Unchanged elements are only listed by type and id
+            if "lat" in element or "center" in element:
+                changed.append(element)
+    except BaseException:
+        # Keep the previous harvest, including when a full harvest replaced it
+        state.rollback()
+        raise
+
+    # The oldest tile decides where the next harvest has to continue
+    state.set_meta("timestamp", min(timestamps) if timestamps else started)
+    return state.apply(changed, present if newer else None)
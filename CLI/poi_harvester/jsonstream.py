@@ -0,0 +1,116 @@
+"""
+Incremental JSON parsing module for POI-Harvester CLI
+"""
+
+import codecs
+import json
+import re
+from typing import Dict, Iterable, Iterator
+
+# Buffered text is compacted once this many characters have been consumed
+_COMPACT_THRESHOLD = 1 << 16
+
+_WHITESPACE = re.compile(r"[\s,]*")
+
+
+class JSONArrayStream:
+    """
+    Iterate over the items of one top-level array in a JSON document without
+    loading the whole document into memory.
+
+    The other top-level members are parsed as well: those before the array are
+    available as ``header`` once iteration starts, those after it as
+    ``trailer`` once iteration has finished.
+    """
+
+    def __init__(self, chunks: Iterable[bytes], key: str = "elements"):
+        """
+        Args:
+            chunks: Raw UTF-8 encoded document in chunks of any size
+            key: Name of the top-level array to iterate over
+        """
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._json = json.JSONDecoder()
+        self._start = re.compile(r'"%s"\s*:\s*\[' % re.escape(key))
+        self._buffer = ""
+        self._exhausted = False
+        self.header = {}
+        self.trailer = {}
+
+    def _read(self) -> bool:
+        """
+        Append the next chunk to the buffer
+
+        Returns:
+            False if the document has been read completely
+        """
+        if self._exhausted:
+            return False
+
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self._buffer += self._decoder.decode(b"", final=True)
+            self._exhausted = True
+        else:
+            self._buffer += self._decoder.decode(chunk)
+        return True
+
+    def __iter__(self) -> Iterator[Dict]:
+        # Locate the start of the array
+        match = self._start.search(self._buffer)
+        while match is None:
+            if not self._read():
+                raise ValueError("Array not found in JSON document")
+            match = self._start.search(self._buffer)
+
+        self.header = self._parse_members(self._buffer[:match.start()] + "}")
+        pos = match.end()
+
+        while True:
+            # Skip separators between items, making sure the next token is buffered
+            pos = _WHITESPACE.match(self._buffer, pos).end()
+            if pos >= len(self._buffer):
+                if not self._read():
+                    raise ValueError("Unexpected end of JSON document")
+                continue
+
+            if self._buffer[pos] == "]":
+                pos += 1
+                break
+
+            try:
+                item, end = self._json.raw_decode(self._buffer, pos)
+            except json.JSONDecodeError:
+                # Item is incomplete, wait for more data
+                if not self._read():
+                    raise
+                continue
+
+            yield item
+            pos = end
+
+            if pos > _COMPACT_THRESHOLD:
+                self._buffer = self._buffer[pos:]
+                pos = 0
+
+        # Parse whatever follows the array, e.g. an Overpass runtime error remark
+        while self._read():
+            pass
+        self.trailer = self._parse_members("{" + self._buffer[pos:].lstrip().lstrip(","))
+
+    @staticmethod
+    def _parse_members(text: str) -> Dict:
+        """
+        Parse a fragment of top-level object members
+
+        Args:
+            text: Members wrapped in braces, possibly with a dangling comma
+
+        Returns:
+            Dictionary of the parsed members
+        """
+        text = re.sub(r",\s*}\s*$", "}", text.strip())
+        if not text.startswith("{"):
+            text = "{" + text
+        return json.loads(text)
@@ -5,18 +5,110 @@ Command-line interface for fetching POI data via Overpass API
 """
 
 import argparse
+import itertools
 import os
+import sqlite3
 import sys
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 
 # Import modules
-from .geocoding import geocode_location
-from .utils import get_bbox, generate_filename, parse_column_mapping, clean_poi_data
+from .geocoding import geocode_location, configure_geocode_cache
+from .utils import get_bbox, generate_filename, parse_column_mapping, iter_clean_poi_data, CountingIterator
 from .poi_types import POI_DISPLAY_MAPPING, list_poi_types
-from .overpass import fetch_poi_data, validate_poi_types
-from .export import export_csv, export_sql, export_json, get_all_keys_from_data
+from .overpass import iter_poi_data, report_fetch_error, validate_poi_types, configure_cache, configure_endpoints, \
+    DEFAULT_MAX_SPLIT_DEPTH, DEFAULT_MAX_RETRIES, OVERPASS_URL
+from .network import configure_rate_limit, DEFAULT_RATE_LIMIT
+from .incremental import HarvestState, get_state_path, update_state
+from .store import POIStore
+from .processing import filter_poi_store, sort_by_distance
+from .cache import ResponseCache, get_default_cache_dir, DEFAULT_CACHE_TTL, DEFAULT_CACHE_MAX_SIZE
+from .export import export_csv, export_sql, export_json, export_sqlite, export_parquet, get_all_keys_from_data, spill_with_keys, \
+    describe_output, configure_compression, get_compression, guard_source, SourceError, COMPRESSION_SUFFIXES
 
-def main():
+def add_runtime_arguments(parser: argparse.ArgumentParser) -> None:
+    """
+    Add the rate limit, endpoint, cache and compression options shared by all harvests of a process
+
+    Args:
+        parser: Parser to extend
+    """
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=DEFAULT_RATE_LIMIT,
+        help=f"Maximum requests per second per endpoint (default: {DEFAULT_RATE_LIMIT})"
+    )
+
+    parser.add_argument(
+        "--endpoint",
+        action="append",
+        metavar="URL",
+        help="Overpass interpreter URL of a mirror or local instance; repeat to fail over "
+             f"between several (default: {OVERPASS_URL})"
+    )
+
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=DEFAULT_MAX_RETRIES,
+        help=f"Retries of a failed request, with backoff and endpoint failover (default: {DEFAULT_MAX_RETRIES})"
+    )
+
+    # Cache options
+    parser.add_argument(
+        "--cache-dir",
+        default=get_default_cache_dir(),
+        help="Directory for cached Overpass responses (default: %(default)s)"
+    )
+
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not read or write cached responses"
+    )
+
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Ignore cached responses and store fresh ones"
+    )
+
+    parser.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=DEFAULT_CACHE_TTL / 3600,
+        help="Lifetime of cached responses in hours (default: %(default)s)"
+    )
+
+    parser.add_argument(
+        "--cache-max-size",
+        type=int,
+        default=DEFAULT_CACHE_MAX_SIZE // (1024 * 1024),
+        help="Maximum cache size in MB before least recently used entries are evicted (default: %(default)s)"
+    )
+
+    # Compression options
+    parser.add_argument(
+        "--compress-level",
+        type=int,
+        help="Compression level of compressed outputs (default: 6 for gzip and xz, 3 for zstd)"
+    )
+
+    parser.add_argument(
+        "--compress-threads",
+        type=int,
+        default=0,
+        help="Worker threads for zstd compression, 0 for one per CPU core (default: 0)"
+    )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Build the argument parser for a single harvest
+
+    Returns:
+        Parser shared by the command line and batch job manifests
+    """
     parser = argparse.ArgumentParser(
         description="POI-Harvester CLI Tool - Fetch POI data from OpenStreetMap",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -25,6 +117,8 @@ Examples:
   %(prog)s --location "Berlin" --radius 1.5 --poi-types pharmacy --format csv
   %(prog)s --location "63571" --radius 2 --poi-types bakery --format sql --table-name bakeries
   %(prog)s --bbox 50.0 8.0 50.1 8.1 --poi-types restaurant cafe --format json
+  %(prog)s batch jobs.jsonl --output-dir exports
+  %(prog)s serve --port 8080
         """
     )
 
@@ -49,6 +143,13 @@ Examples:
         help="Search radius in km (default: 1.0, only used with --location)"
     )
 
+    parser.add_argument(
+        "--distance",
+        action="store_true",
+        help="Add a distance_km column and sort POIs by distance from the location "
+             "(or the bbox center); implies --in-memory"
+    )
+
     # POI selection
     parser.add_argument(
         "--keys",
@@ -73,29 +174,77 @@ Examples:
         help="OSM object types to query (default: ['node', 'way'])"
     )
 
+    # Fetch options
+    parser.add_argument(
+        "--tile-size",
+        type=float,
+        help="Split the area into tiles of at most this size in degrees (default: single request)"
+    )
+
+    parser.add_argument(
+        "--max-split-depth",
+        type=int,
+        default=DEFAULT_MAX_SPLIT_DEPTH,
+        help=f"How often a tile rejected as too large may be split into quadrants (default: {DEFAULT_MAX_SPLIT_DEPTH})"
+    )
+
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of tiles fetched concurrently (default: 1)"
+    )
+
+    add_runtime_arguments(parser)
+
     # Export options
     parser.add_argument(
         "--format",
-        choices=["csv", "sql", "json"],
+        choices=["csv", "sql", "json", "sqlite", "parquet"],
         default="csv",
         help="Export format (default: csv)"
     )
 
     parser.add_argument(
         "--output",
-        help="Output file path (auto-generated if not specified)"
+        help="Output file path, '-' for standard output (auto-generated if not specified)"
+    )
+
+    parser.add_argument(
+        "--compress",
+        choices=list(COMPRESSION_SUFFIXES),
+        help="Compress the output; also selected by a .gz, .xz or .zst output suffix"
     )
 
     parser.add_argument(
         "--table-name",
         default="poi_data",
-        help="SQL table name (default: poi_data, only used with --format sql)"
+        help="SQL table name (default: poi_data, only used with --format sql/sqlite)"
     )
 
     parser.add_argument(
         "--column-map",
         default="",
-        help="Column mapping for SQL export (e.g., 'name=poi_name website=url')"
+        help="Column mapping for SQL/SQLite export (e.g., 'name=poi_name website=url')"
+    )
+
+    parser.add_argument(
+        "--append",
+        action="store_true",
+        help="Append to an existing SQLite table instead of replacing it (only used with --format sqlite)"
+    )
+
+    parser.add_argument(
+        "--sql-batch-size",
+        type=int,
+        default=1,
+        help="Rows per INSERT statement; values above 1 also wrap the inserts in a transaction (default: 1)"
+    )
+
+    parser.add_argument(
+        "--sql-copy",
+        action="store_true",
+        help="Write a PostgreSQL COPY block instead of INSERT statements"
     )
 
     # Additional options
@@ -117,83 +266,376 @@ Examples:
         help="Export all available keys from the data"
     )
 
-    args = parser.parse_args()
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Keep a state file next to the output and only download changes on later runs "
+             "(requires --output)"
+    )
 
-    # List POI types if requested
-    if args.list_poi_types:
-        list_poi_types()
-        return 0
+    parser.add_argument(
+        "--no-projection",
+        action="store_true",
+        help="Download all tags even if only --keys are exported"
+    )
 
-    # Redirect stderr to null if quiet mode
-    if args.quiet:
-        sys.stderr = open(os.devnull, 'w')
+    parser.add_argument(
+        "--in-memory",
+        action="store_true",
+        help="Collect POIs in a compact in-memory store before export instead of streaming them"
+    )
 
-    # Validate POI types
-    valid_poi_types = validate_poi_types(args.poi_types)
-    if not valid_poi_types:
-        print("Error: No valid POI types specified", file=sys.stderr)
-        return 1
+    return parser
 
-    # Determine bounding box
+
+def validate_args(args: argparse.Namespace) -> Optional[str]:
+    """
+    Check parsed arguments for invalid combinations
+
+    Args:
+        args: Parsed arguments
+
+    Returns:
+        Error message or None if the arguments are valid
+    """
+    if args.tile_size is not None and args.tile_size <= 0:
+        return "--tile-size must be positive"
+
+    if args.sql_batch_size < 1:
+        return "--sql-batch-size must be positive"
+
+    if args.workers < 1 or args.rate_limit <= 0:
+        return "--workers and --rate-limit must be positive"
+
+    if args.retries < 0:
+        return "--retries must not be negative"
+
+    if args.incremental and (not args.output or args.output == "-"):
+        return "--incremental requires --output with a file path"
+
+    if args.append and (args.incremental or get_compression(args.output) or args.compress):
+        return "--append cannot be combined with --incremental or compression"
+
+    if args.output == "-" and args.format in ("sqlite", "parquet"):
+        return "--output - requires --format csv, json or sql"
+
+    if args.format == "parquet" and args.compress == "xz":
+        return "Parquet files support gzip and zstd compression only"
+
+    if args.format == "parquet" and get_compression(args.output):
+        # The file would keep the suffix without being a compressed stream
+        return "Parquet files are compressed inside the file, use --compress gzip or zstd with a .parquet output"
+
+    if args.compress_level is not None and args.compress_level < 0:
+        return "--compress-level must not be negative"
+
+    if args.compress_threads < 0:
+        return "--compress-threads must not be negative"
+
+    return None
+
+
+def configure_runtime(args: argparse.Namespace) -> Optional[ResponseCache]:
+    """
+    Set up rate limiting, endpoints and caches shared by all harvests of this process
+
+    Args:
+        args: Parsed arguments
+
+    Returns:
+        Overpass response cache or None if caching is disabled
+    """
+    configure_rate_limit(args.rate_limit)
+    configure_endpoints(args.endpoint, max_retries=args.retries)
+    configure_compression(args.compress_level, args.compress_threads)
+
+    # Open response and geocoding caches
+    cache = None
+    geocode_cache = None
+    if not args.no_cache:
+        try:
+            cache = ResponseCache(
+                os.path.join(args.cache_dir, "overpass.sqlite3"),
+                ttl=args.cache_ttl * 3600,
+                max_size=args.cache_max_size * 1024 * 1024
+            )
+            geocode_cache = ResponseCache(os.path.join(args.cache_dir, "geocode.sqlite3"))
+        except (OSError, sqlite3.Error) as e:
+            print(f"Warning: Response cache disabled: {e}", file=sys.stderr)
+    configure_cache(cache, refresh=args.refresh)
+    configure_geocode_cache(geocode_cache)
+
+    return cache
+
+
+def resolve_area(args: argparse.Namespace,
+                 coords: Optional[Tuple[float, float]] = None) -> Tuple[Tuple[float, float, float, float],
+                                                                       Tuple[float, float],
+                                                                       Optional[float], str]:
+    """
+    Determine the area of a harvest
+
+    Args:
+        args: Parsed arguments
+        coords: Already geocoded coordinates of args.location
+
+    Returns:
+        Tuple of (bbox, center, radius in km or None, location used in file names)
+
+    Raises:
+        ValueError: If the location cannot be geocoded
+    """
     if args.location:
-        coords = geocode_location(args.location)
+        if coords is None:
+            coords = geocode_location(args.location)
         if not coords:
-            print(f"Error: Failed to geocode location '{args.location}'", file=sys.stderr)
-            return 1
+            raise ValueError(f"Failed to geocode location '{args.location}'")
 
         lat, lon = coords
         bbox = get_bbox(lat, lon, args.radius)
-        location_for_filename = args.location
+        # The bbox only bounds the query, POIs in its corners are dropped by distance
+        return bbox, coords, args.radius, args.location
+
+    bbox = tuple(args.bbox)
+    center = ((bbox[0] + bbox[2]) / 2, (bbox[1] + bbox[3]) / 2)
+    # Use coordinates for filename if no location specified
+    return bbox, center, None, f"{args.bbox[0]}-{args.bbox[1]}-{args.bbox[2]}-{args.bbox[3]}"
+
+
+def get_projection(args: argparse.Namespace) -> Optional[List[str]]:
+    """
+    Get the tag keys the server should project the result onto
+
+    Args:
+        args: Parsed arguments
+
+    Returns:
+        Keys to fetch or None to fetch all tags
+    """
+    # Let the server drop every tag that is not exported
+    if args.all_keys or args.no_projection or args.incremental:
+        return None
+    return args.keys
+
+
+def get_fetch_options(args: argparse.Namespace) -> Dict:
+    """
+    Get the tiling and concurrency options passed to iter_poi_data
+
+    Args:
+        args: Parsed arguments
+
+    Returns:
+        Dictionary of keyword arguments
+    """
+    return {
+        "max_tile_size": args.tile_size,
+        "max_depth": args.max_split_depth,
+        "workers": args.workers,
+    }
+
+
+def _job_failed(message: str, output_file: Optional[str] = None) -> Dict:
+    """Print an error and build the result of a failed harvest"""
+    print(f"Error: {message}", file=sys.stderr)
+    return {"status": "failed", "pois": 0, "output": output_file, "error": message}
+
+
+def run_job(args: argparse.Namespace,
+            area: Optional[Tuple] = None,
+            elements: Optional[Iterable[Dict]] = None,
+            cache: Optional[ResponseCache] = None,
+            output_dir: str = "") -> Dict:
+    """
+    Fetch, filter and export the POIs of one harvest
+
+    Args:
+        args: Parsed and validated arguments
+        area: Result of resolve_area (resolved here if not given)
+        elements: Already fetched Overpass elements covering the area (fetched here if not given)
+        cache: Response cache whose statistics are reported
+        output_dir: Directory for auto-generated output file names
+
+    Returns:
+        Dictionary with status ("ok" or "failed"), pois, output and error
+    """
+    # Sorting needs all POIs at once
+    if args.distance:
+        args.in_memory = True
+
+    # Validate POI types
+    valid_poi_types = validate_poi_types(args.poi_types)
+    if not valid_poi_types:
+        return _job_failed("No valid POI types specified")
+
+    # Determine bounding box
+    if area is None:
+        try:
+            area = resolve_area(args)
+        except ValueError as e:
+            return _job_failed(str(e))
+    bbox, center, radius_km, location_for_filename = area
+
+    state = None
+    if elements is not None:
+        data = iter(elements)
+    elif args.incremental:
+        # Update the state next to the output, then export everything it holds
+        state = HarvestState(get_state_path(args.output))
+        if state.timestamp:
+            print(f"Fetching changes since {state.timestamp} from Overpass API...", file=sys.stderr)
+        else:
+            print("Fetching data from Overpass API...", file=sys.stderr)
+
+        try:
+            changed, deleted = update_state(state, bbox, valid_poi_types, args.osm_types,
+                                            **get_fetch_options(args))
+            print(f"{changed} new or changed, {deleted} deleted POIs", file=sys.stderr)
+        except Exception as e:
+            report_fetch_error(e)
+            state.close()
+            return _job_failed(f"Fetching failed: {e}")
+
+        data = state.iter_elements()
     else:
-        bbox = tuple(args.bbox)
-        # Use coordinates for filename if no location specified
-        location_for_filename = f"{args.bbox[0]}-{args.bbox[1]}-{args.bbox[2]}-{args.bbox[3]}"
-
-    # Fetch data
-    data = fetch_poi_data(bbox, valid_poi_types, args.osm_types)
-    if not data:
-        print("Error: No data retrieved", file=sys.stderr)
-        return 1
+        # Fetch data as a stream, peeking at the first element to detect empty results
+        print("Fetching data from Overpass API...", file=sys.stderr)
+        data = iter_poi_data(bbox, valid_poi_types, args.osm_types, keys=get_projection(args),
+                             **get_fetch_options(args))
+
+    try:
+        first = next(data, None)
+    except Exception as e:
+        report_fetch_error(e)
+        first = None
+
+    if cache is not None:
+        stats = cache.stats()
+        print(f"Cache: {stats['hits']} hits, {stats['misses']} misses", file=sys.stderr)
+
+    if first is None:
+        if state is not None:
+            state.close()
+        return _job_failed("No data retrieved")
 
-    # Clean data (remove id and type fields)
-    clean_data = clean_poi_data(data)
+    # Errors of the streamed fetch surface while exporting and are reported as fetch errors
+    data = guard_source(itertools.chain([first], data))
+
+    try:
+        return _export_job(args, data, bbox, center, radius_km, location_for_filename,
+                           valid_poi_types, output_dir)
+    except SourceError as e:
+        report_fetch_error(e.error)
+        return _job_failed(f"Fetching failed: {e.error}")
+    finally:
+        if state is not None:
+            state.close()
+
+
+def _export_job(args: argparse.Namespace, data: Iterable[Dict], bbox: Tuple, center: Tuple,
+                radius_km: Optional[float], location_for_filename: str,
+                valid_poi_types: List[str], output_dir: str) -> Dict:
+    """Filter the fetched elements of a harvest and export them, see run_job"""
+    if args.in_memory:
+        # Collect into a compact columnar store, then drop invalid, duplicate and out-of-area POIs
+        clean_data = filter_poi_store(POIStore.from_elements(data), bbox=bbox,
+                                      center=center, radius_km=radius_km)
+        if args.distance:
+            clean_data = sort_by_distance(clean_data, center)
+    else:
+        # Clean data lazily (remove id and type fields and out-of-area POIs)
+        clean_data = iter_clean_poi_data(data, bbox=bbox, center=center, radius_km=radius_km)
 
     # Determine keys to export
-    if args.all_keys:
+    if args.all_keys and args.in_memory:
         export_keys = get_all_keys_from_data(clean_data)
         print(f"Exporting all {len(export_keys)} keys found in data", file=sys.stderr)
+    elif args.all_keys:
+        export_keys, clean_data = spill_with_keys(clean_data)
+        print(f"Exporting all {len(export_keys)} keys found in data", file=sys.stderr)
     else:
         export_keys = args.keys
 
+    if args.distance:
+        export_keys = ["distance_km"] + [key for key in export_keys if key != "distance_km"]
+
+    if not args.in_memory:
+        clean_data = CountingIterator(clean_data)
+
     # Generate output filename if not specified
     if args.output:
         output_file = args.output
     else:
-        output_file = generate_filename(
+        output_file = os.path.join(output_dir, generate_filename(
             location_for_filename,
             args.radius,
             valid_poi_types,
             args.format
-        )
+        ))
+
+    # Parquet compresses inside the file, other formats get the suffix of their compression
+    compression = args.compress or get_compression(output_file)
+    if args.compress and args.format != "parquet" and isinstance(output_file, str) and output_file != "-" \
+            and not output_file.endswith(COMPRESSION_SUFFIXES[args.compress]):
+        output_file += COMPRESSION_SUFFIXES[args.compress]
 
     # Export data based on format
     success = False
     if args.format == "csv":
-        success = export_csv(clean_data, export_keys, output_file)
+        success = export_csv(clean_data, export_keys, output_file, compression=compression)
     elif args.format == "json":
-        success = export_json(clean_data, export_keys, output_file)
+        success = export_json(clean_data, export_keys, output_file, compression=compression)
     elif args.format == "sql":
         # Parse column mapping
         column_map = parse_column_mapping(args.column_map)
-        success = export_sql(clean_data, export_keys, output_file, args.table_name, column_map)
+        success = export_sql(clean_data, export_keys, output_file, args.table_name, column_map,
+                             batch_size=args.sql_batch_size, copy=args.sql_copy, compression=compression)
+    elif args.format == "sqlite":
+        column_map = parse_column_mapping(args.column_map)
+        success = export_sqlite(clean_data, export_keys, output_file, args.table_name, column_map,
+                                compression=compression, append=args.append)
+    elif args.format == "parquet":
+        success = export_parquet(clean_data, export_keys, output_file, compression=compression)
 
     if not success:
-        print("Error: Export failed", file=sys.stderr)
+        return _job_failed("Export failed", describe_output(output_file))
+
+    exported = len(clean_data) if args.in_memory else clean_data.count
+    print(f"Successfully exported {exported} POIs to {describe_output(output_file)}", file=sys.stderr)
+    return {"status": "ok", "pois": exported, "output": describe_output(output_file), "error": None}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+
+    if argv[:1] == ["batch"]:
+        from .batch import main_batch
+        return main_batch(argv[1:])
+
+    if argv[:1] == ["serve"]:
+        from .server import main_serve
+        return main_serve(argv[1:])
+
+    args = build_parser().parse_args(argv)
+
+    # List POI types if requested
+    if args.list_poi_types:
+        list_poi_types()
+        return 0
+
+    # Redirect stderr to null if quiet mode
+    if args.quiet:
+        sys.stderr = open(os.devnull, 'w')
+
+    error = validate_args(args)
+    if error:
+        print(f"Error: {error}", file=sys.stderr)
         return 1
 
-    print(f"Successfully exported {len(clean_data)} POIs to {output_file}", file=sys.stderr)
-    return 0
+    cache = configure_runtime(args)
+    result = run_job(args, cache=cache)
+    return 0 if result["status"] == "ok" else 1
 
 
 if __name__ == "__main__":
-    sys.exit(main())
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,248 @@
+"""
+Network module for POI-Harvester CLI
+"""
+
+import random
+import re
+import threading
+import time
+from typing import Dict, Iterable, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+USER_AGENT = "POI-Harvester-CLI"
+
+# Connections kept alive per host in the shared session
+DEFAULT_POOL_SIZE = 8
+
+# Overpass grants a small number of query slots per client, so stay well below that
+DEFAULT_RATE_LIMIT = 1.0
+DEFAULT_BURST = 2
+
+# Retry delays double per attempt up to the cap, with random jitter
+DEFAULT_BACKOFF_BASE = 1.0
+DEFAULT_BACKOFF_CAP = 60.0
+
+# Weight of the newest sample in the moving average of endpoint latency
+LATENCY_SMOOTHING = 0.3
+
+
+class RateLimiter:
+    """Thread-safe token bucket limiting how often requests may be started"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        """
+        Args:
+            rate: Sustained number of requests per second
+            burst: Number of requests that may be started back to back
+        """
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a token is available and consume it"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                wait = (1 - self._tokens) / self.rate
+
+            time.sleep(wait)
+
+
+class Endpoint:
+    """Health statistics of one API endpoint"""
+
+    def __init__(self, url: str):
+        """
+        Args:
+            url: Endpoint URL
+        """
+        self.url = url
+        self.latency: Optional[float] = None
+        self.failures = 0
+        self.available_at = 0.0
+
+
+class EndpointPool:
+    """
+    Thread-safe set of interchangeable endpoints, e.g. Overpass mirrors
+
+    Requests go to the endpoint with the fewest consecutive failures and the
+    lowest moving average latency. Endpoints that failed are skipped until
+    their retry delay has passed.
+    """
+
+    def __init__(self, urls: Iterable[str]):
+        """
+        Args:
+            urls: Endpoint URLs in order of preference
+        """
+        self.endpoints = [Endpoint(url) for url in urls]
+        if not self.endpoints:
+            raise ValueError("At least one endpoint is required")
+        self._lock = threading.Lock()
+
+    def choose(self) -> Endpoint:
+        """
+        Pick the healthiest endpoint
+
+        Returns:
+            Available endpoint, or the one available soonest if all are backing off
+        """
+        now = time.monotonic()
+
+        with self._lock:
+            ready = [endpoint for endpoint in self.endpoints if endpoint.available_at <= now]
+            if not ready:
+                return min(self.endpoints, key=lambda endpoint: endpoint.available_at)
+
+            # Endpoints without a latency sample yet are tried first
+            return min(ready, key=lambda endpoint: (endpoint.failures, endpoint.latency or 0.0))
+
+    def record_success(self, endpoint: Endpoint, latency: float) -> None:
+        """
+        Record a successful request
+
+        Args:
+            endpoint: Endpoint that answered
+            latency: Time until the response arrived in seconds
+        """
+        with self._lock:
+            if endpoint.latency is None:
+                endpoint.latency = latency
+            else:
+                endpoint.latency += LATENCY_SMOOTHING * (latency - endpoint.latency)
+            endpoint.failures = 0
+
+    def record_failure(self, endpoint: Endpoint, delay: float) -> None:
+        """
+        Record a failed request and keep the endpoint idle for a while
+
+        Args:
+            endpoint: Endpoint that failed
+            delay: Seconds before the endpoint may be used again
+        """
+        with self._lock:
+            endpoint.failures += 1
+            endpoint.available_at = max(endpoint.available_at, time.monotonic() + delay)
+
+
+def backoff_delay(attempt: int, base: float = DEFAULT_BACKOFF_BASE,
+                  cap: float = DEFAULT_BACKOFF_CAP) -> float:
+    """
+    Calculate the delay before a retry
+
+    Args:
+        attempt: Number of the failed attempt, starting at 0
+        base: Delay after the first failure in seconds
+        cap: Maximum delay in seconds
+
+    Returns:
+        Exponentially growing delay with jitter, so clients do not retry in lockstep
+    """
+    delay = min(cap, base * 2 ** attempt)
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def get_slot_delay(url: str) -> Optional[float]:
+    """
+    Ask an Overpass endpoint how long to wait for a free query slot
+
+    Args:
+        url: Interpreter URL of the endpoint
+
+    Returns:
+        Seconds until a slot is available (0 if one is free now), None if unknown
+    """
+    status_url = re.sub(r"/interpreter/?$", "/status", url)
+
+    try:
+        response = get_session().get(status_url, timeout=10)
+        response.raise_for_status()
+    except requests.exceptions.RequestException:
+        return None
+
+    text = response.text
+    if re.search(r"\d+ slots? available now", text) or re.search(r"Rate limit: 0\b", text):
+        return 0.0
+
+    delays = [float(seconds) for seconds in re.findall(r"in (-?\d+) seconds", text)]
+    return max(0.0, min(delays)) if delays else None
+
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+_rate_limiters: Dict[str, RateLimiter] = {}
+_rate_limit = DEFAULT_RATE_LIMIT
+_burst = DEFAULT_BURST
+
+
+def get_session() -> requests.Session:
+    """
+    Get the shared HTTP session, creating it on first use
+
+    Returns:
+        Session with pooled keep-alive connections
+    """
+    global _session
+
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=DEFAULT_POOL_SIZE, pool_maxsize=DEFAULT_POOL_SIZE)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers["User-Agent"] = USER_AGENT
+            _session = session
+
+    return _session
+
+
+def configure_rate_limit(rate: float, burst: int = DEFAULT_BURST) -> None:
+    """
+    Set the request rate allowed per endpoint
+
+    Args:
+        rate: Sustained number of requests per second per endpoint
+        burst: Number of requests that may be started back to back
+    """
+    global _rate_limit, _burst
+
+    with _session_lock:
+        _rate_limit = rate
+        _burst = burst
+        _rate_limiters.clear()
+
+
+def get_rate_limiter(url: str) -> RateLimiter:
+    """
+    Get the rate limiter for the endpoint serving the given URL
+
+    Args:
+        url: Request URL
+
+    Returns:
+        Rate limiter shared by all requests to the same host
+    """
+    host = urlsplit(url).netloc
+
+    with _session_lock:
+        limiter = _rate_limiters.get(host)
+        if limiter is None:
+            limiter = RateLimiter(_rate_limit, _burst)
+            _rate_limiters[host] = limiter
+
+    return limiter
@@ -2,96 +2,671 @@
 Overpass API module for POI-Harvester CLI
 """
 
+import codecs
+import itertools
+import re
 import requests
 import sys
-from typing import List, Dict, Tuple
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import List, Dict, Iterable, Iterator, Optional, Tuple
 from .poi_types import POI_DISPLAY_MAPPING
+from .cache import ResponseCache, make_cache_key, normalize_query, CHUNK_SIZE
+from .jsonstream import JSONArrayStream
+from .network import EndpointPool, backoff_delay, get_rate_limiter, get_session, get_slot_delay
+from .store import OSM_TYPE_CODES
+from .utils import split_bbox, tile_bbox
+
+OVERPASS_URL = "https://overpass-api.de/api/interpreter"
+
+# Number of times a tile may be split into quadrants before giving up
+DEFAULT_MAX_SPLIT_DEPTH = 6
+
+# Number of times a failed request is retried, on any endpoint
+DEFAULT_MAX_RETRIES = 4
+
+# Status codes of overloaded or temporarily unavailable servers, a gateway timeout
+# usually means an overloaded mirror rather than a query that is too large
+_RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+_cache: Optional[ResponseCache] = None
+_refresh_cache = False
+_endpoints: Optional[EndpointPool] = None
+_max_retries = DEFAULT_MAX_RETRIES
+
+
+class QueryTooLargeError(Exception):
+    """Raised when the Overpass server rejects a query as too expensive"""
+
+
+class MalformedCSVError(ValueError):
+    """Raised when a projected CSV response cannot be split into rows reliably"""
+
+
+# Overpass type selectors for every combination of OSM object types
+_TYPE_SELECTORS = {
+    ("node",): "node",
+    ("way",): "way",
+    ("relation",): "relation",
+    ("node", "way"): "nw",
+    ("node", "relation"): "nr",
+    ("way", "relation"): "wr",
+    ("node", "way", "relation"): "nwr",
+}
+
+
+def _quote(value: str) -> str:
+    """Quote a string for use in Overpass QL"""
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def _tag_filter(key: str, values: List[str]) -> str:
+    """
+    Build a tag filter matching any of several values of one key
+
+    Args:
+        key: OSM key
+        values: Accepted values
+
+    Returns:
+        Exact filter for a single value, anchored regex filter otherwise
+    """
+    if len(values) == 1:
+        return f"[{_quote(key)}={_quote(values[0])}]"
+
+    alternatives = "|".join(re.escape(value) for value in values)
+    return f"[{_quote(key)}~{_quote(f'^({alternatives})$')}]"
 
 
 def build_overpass_query(bbox: Tuple[float, float, float, float],
                          poi_types: List[str],
-                         osm_types: List[str]) -> str:
+                         osm_types: List[str],
+                         keys: Optional[List[str]] = None,
+                         newer: Optional[str] = None) -> str:
     """
     Build Overpass API query string
 
+    Tag filters are merged into one statement per key, using a regex for keys
+    with several values, and all OSM types share one selector such as nwr.
+    The bbox is declared once as a global filter. Ways and relations are
+    returned with their center and tags only, without node and member lists.
+
+    With keys, the server projects the result onto type, id, coordinates and
+    those tags in tab-separated CSV output instead of JSON.
+
+    With newer, only elements changed since that date are returned in full,
+    followed by the bare type and id of every matching element so deleted
+    elements can be detected.
+
     Args:
         bbox: Bounding box (south, west, north, east)
         poi_types: List of POI types to query
         osm_types: List of OSM object types (node, way, relation)
+        keys: Only return these tag keys (None for all tags)
+        newer: ISO 8601 date, return only elements changed after it in full
 
     Returns:
         Overpass query string
     """
     s, w, n, e = bbox
 
-    query_parts = []
+    # Accepted values per key, in order of first appearance
+    values_by_key: Dict[str, List[str]] = {}
     for poi_type in poi_types:
-        if poi_type in POI_DISPLAY_MAPPING:
-            for key, value in POI_DISPLAY_MAPPING[poi_type]:
-                for osm_type in osm_types:
-                    query_parts.append(f'{osm_type}["{key}"="{value}"]({s},{w},{n},{e});')
+        for key, value in POI_DISPLAY_MAPPING.get(poi_type, []):
+            values = values_by_key.setdefault(key, [])
+            if value not in values:
+                values.append(value)
 
-    if not query_parts:
+    types = tuple(osm_type for osm_type in ("node", "way", "relation") if osm_type in osm_types)
+    if not values_by_key or not types:
         return ""
 
+    selector = _TYPE_SELECTORS[types]
+    query_parts = [f"{selector}{_tag_filter(key, values)};" for key, values in values_by_key.items()]
+
+    # Nodes carry their own coordinates, ways and relations need a computed center
+    changed = f'(newer:"{newer}")' if newer else ""
+    output_parts = []
+    if "node" in types:
+        output_parts.append(f"node.pois{changed};")
+        output_parts.append("out qt;")
+    others = [osm_type for osm_type in types if osm_type != "node"]
+    if others:
+        statements = " ".join(f"{osm_type}.pois{changed};" for osm_type in others)
+        output_parts.append(statements if len(others) == 1 else f"({statements});")
+        output_parts.append("out tags center qt;")
+    if newer:
+        output_parts.append(".pois out ids qt;")
+
+    if keys is not None:
+        columns = ",".join(["::type", "::id", "::lat", "::lon"] + [_quote(key) for key in keys])
+        output_format = f'out:csv({columns}; true; "\\t")'
+    else:
+        output_format = "out:json"
+
     query_body = "\n  ".join(query_parts)
+    output_body = "\n".join(output_parts)
     query = f"""
-[out:json][timeout:25];
+[{output_format}][timeout:25][bbox:{s},{w},{n},{e}];
 (
   {query_body}
-);
-out center;
+)->.pois;
+{output_body}
 """
 
     return query
 
 
+def configure_cache(cache: Optional[ResponseCache], refresh: bool = False) -> None:
+    """
+    Set the response cache used for Overpass queries
+
+    Args:
+        cache: Response cache or None to disable caching
+        refresh: Ignore cached responses but store fresh ones
+    """
+    global _cache, _refresh_cache
+    _cache = cache
+    _refresh_cache = refresh
+
+
+def configure_endpoints(urls: Optional[List[str]] = None,
+                        max_retries: int = DEFAULT_MAX_RETRIES) -> None:
+    """
+    Set the Overpass endpoints queries are sent to
+
+    Args:
+        urls: Interpreter URLs of the main server, mirrors or a local instance
+              (defaults to OVERPASS_URL)
+        max_retries: Number of times a failed request is retried
+    """
+    global _endpoints, _max_retries
+    _endpoints = EndpointPool(urls or [OVERPASS_URL])
+    _max_retries = max_retries
+
+
+def get_endpoint_pool() -> EndpointPool:
+    """
+    Get the configured Overpass endpoints
+
+    Returns:
+        Endpoint pool, defaulting to OVERPASS_URL only
+    """
+    if _endpoints is None:
+        configure_endpoints()
+    return _endpoints
+
+
+def _post_query(query: str) -> requests.Response:
+    """
+    Send a query to the healthiest endpoint, retrying on other endpoints on failure
+
+    Connection errors and overload responses, including gateway timeouts, are
+    retried with exponential backoff. After a 429 response the endpoint's
+    /api/status is polled to wait exactly until a query slot is free.
+
+    Args:
+        query: Overpass query string
+
+    Returns:
+        Streaming response with a successful status
+
+    Raises:
+        QueryTooLargeError: If the server timed out or ran out of memory,
+                            or the last attempt ended in a gateway timeout
+        requests.exceptions.RequestException: If all attempts failed
+    """
+    pool = get_endpoint_pool()
+    error = None
+
+    for attempt in range(_max_retries + 1):
+        endpoint = pool.choose()
+        wait_time = endpoint.available_at - time.monotonic()
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+        get_rate_limiter(endpoint.url).acquire()
+
+        try:
+            response = get_session().post(endpoint.url, data={"data": query}, timeout=30, stream=True)
+        except requests.exceptions.ConnectionError as e:
+            # Also covers connect timeouts, the endpoint is unreachable
+            error = e
+            pool.record_failure(endpoint, backoff_delay(attempt))
+            print(f"Overpass endpoint {endpoint.url} unreachable, retrying...", file=sys.stderr)
+            continue
+        except requests.exceptions.Timeout:
+            raise QueryTooLargeError("Request to Overpass API timed out")
+
+        if response.status_code in _RETRY_STATUS_CODES:
+            response.close()
+            error = requests.exceptions.HTTPError(
+                f"{response.status_code} Error from {endpoint.url}", response=response
+            )
+
+            delay = get_slot_delay(endpoint.url) if response.status_code == 429 else None
+            pool.record_failure(endpoint, backoff_delay(attempt) if delay is None else delay)
+            print(f"Overpass endpoint {endpoint.url} returned {response.status_code}, retrying...",
+                  file=sys.stderr)
+            continue
+
+        pool.record_success(endpoint, response.elapsed.total_seconds())
+        return response
+
+    if isinstance(error, requests.exceptions.HTTPError) and error.response.status_code == 504:
+        # Gateway timeouts on every retry hint at a query too expensive for any endpoint
+        raise QueryTooLargeError(f"Overpass API gateway timeout: {error}")
+    raise error
+
+
+def _stream_query(query: str, projected: bool = False,
+                  timestamps: Optional[List[str]] = None, use_cache: bool = True) -> Iterator[Dict]:
+    """
+    Send a single query to the Overpass API and yield elements while the response arrives
+
+    Responses are answered from the cache if possible. Fresh responses are
+    stored in the cache once they have been read completely.
+
+    Args:
+        query: Overpass query string
+        projected: The query requests CSV output (see build_overpass_query keys)
+        timestamps: List the data timestamp of a JSON response is appended to
+        use_cache: Look up and store the response in the cache
+
+    Yields:
+        Elements returned by the server
+
+    Raises:
+        QueryTooLargeError: If the server timed out or ran out of memory
+    """
+    cache = _cache if use_cache else None
+    key = make_cache_key(normalize_query(query))
+    if projected:
+        parse = _iter_csv_elements
+    else:
+        def parse(chunks):
+            return _iter_elements(chunks, timestamps)
+
+    chunks = None
+    if cache is not None and not _refresh_cache:
+        chunks = cache.iter_chunks(key)
+
+    if chunks is not None:
+        yield from parse(chunks)
+        return
+
+    response = _post_query(query)
+
+    with response:
+        response.raise_for_status()
+
+        writer = cache.writer(key) if cache is not None else None
+
+        def read_chunks() -> Iterator[bytes]:
+            try:
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    if writer is not None:
+                        writer.write(chunk)
+                    yield chunk
+            except requests.exceptions.Timeout:
+                raise QueryTooLargeError("Request to Overpass API timed out")
+
+        try:
+            yield from parse(read_chunks())
+        except BaseException:
+            if writer is not None:
+                writer.discard()
+            raise
+
+        if writer is not None:
+            writer.commit()
+
+
+def _iter_elements(chunks: Iterable[bytes], timestamps: Optional[List[str]] = None) -> Iterator[Dict]:
+    """
+    Parse an Overpass JSON response incrementally
+
+    Args:
+        chunks: Raw response body in chunks
+        timestamps: List the timestamp of the server's OSM data is appended to
+
+    Yields:
+        Elements of the response
+
+    Raises:
+        QueryTooLargeError: If the server timed out or ran out of memory
+    """
+    stream = JSONArrayStream(chunks, "elements")
+    yield from stream
+
+    timestamp = stream.header.get("osm3s", {}).get("timestamp_osm_base")
+    if timestamps is not None and timestamp:
+        timestamps.append(timestamp)
+
+    # Overpass reports timeouts and memory exhaustion in-band after a partial result
+    remark = stream.trailer.get("remark", "")
+    if "runtime error" in remark:
+        raise QueryTooLargeError(remark)
+
+
+def _iter_csv_elements(chunks: Iterable[bytes]) -> Iterator[Dict]:
+    """
+    Parse a projected Overpass CSV response incrementally
+
+    Overpass writes tabs and line breaks inside tag values unescaped, which
+    shifts the columns of a row or splits it in two. Every row is checked
+    against the header, and a row is only yielded once the line after it
+    parsed as well, since a line break in its last value is only noticed
+    on the next line.
+
+    Args:
+        chunks: Raw tab-separated response body in chunks, starting with a header line
+
+    Yields:
+        Elements in the same shape as JSON elements, with empty tags omitted
+
+    Raises:
+        QueryTooLargeError: If the server timed out or ran out of memory
+        MalformedCSVError: If a row does not match the header
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    header = None
+    buffer = ""
+    previous = None
+
+    def parse_line(line: str) -> Dict:
+        fields = line.rstrip("\r").split("\t")
+        element_type, element_id, lat, lon = (fields + ["", "", "", ""])[:4]
+        if len(fields) != len(header) or element_type not in OSM_TYPE_CODES or not element_id.isdigit():
+            raise MalformedCSVError(f"row does not match the header: {line[:80]!r}")
+
+        element = {"type": element_type, "id": int(element_id)}
+        if lat and lon:
+            try:
+                element["lat"] = float(lat)
+                element["lon"] = float(lon)
+            except ValueError:
+                raise MalformedCSVError(f"row does not match the header: {line[:80]!r}")
+        element["tags"] = {key: value for key, value in zip(header[4:], fields[4:]) if value}
+        return element
+
+    for chunk in itertools.chain(chunks, [None]):
+        buffer += decoder.decode(b"", final=True) if chunk is None else decoder.decode(chunk)
+        lines = buffer.split("\n")
+        buffer = lines.pop() if chunk is not None else ""
+
+        for line in lines:
+            if not line:
+                continue
+            # CSV output has no remark member, runtime errors end up as a line of text
+            if line.count("\t") < 3 and "runtime error" in line:
+                raise QueryTooLargeError(line.strip())
+            if header is None:
+                header = line.rstrip("\r").split("\t")
+                continue
+            element = parse_line(line)
+            if previous is not None:
+                yield previous
+            previous = element
+
+    if previous is not None:
+        yield previous
+
+
+def _stream_tile(tile: Tuple[float, float, float, float],
+                 poi_types: List[str],
+                 osm_types: List[str],
+                 keys: Optional[List[str]] = None,
+                 newer: Optional[str] = None,
+                 timestamps: Optional[List[str]] = None) -> Iterator[Dict]:
+    """
+    Query the POIs of a single tile and yield them while the response arrives
+
+    If a projected CSV response turns out to be malformed, the tile is fetched
+    again as JSON and the tags are projected onto keys here instead. The JSON
+    response lists the elements in the same order, so those already yielded
+    from CSV rows are skipped. Change queries bypass the response cache, as
+    the changes since a date keep growing.
+
+    Args:
+        tile: Tile bounding box (south, west, north, east)
+        poi_types: List of POI types to query
+        osm_types: List of OSM object types (node, way, relation)
+        keys: Only fetch these tag keys (None for all tags)
+        newer: Only fetch elements changed after this date in full
+        timestamps: List the data timestamp of a JSON response is appended to
+
+    Yields:
+        POI dictionaries
+
+    Raises:
+        ValueError: If the data changed between the CSV and the JSON response
+    """
+    query = build_overpass_query(tile, poi_types, osm_types, keys=keys, newer=newer)
+    # A cached answer to a change query would hide newer changes
+    use_cache = newer is None
+    if keys is None:
+        yield from _stream_query(query, timestamps=timestamps, use_cache=use_cache)
+        return
+
+    yielded = 0
+    last_key = None
+    try:
+        for element in _stream_query(query, projected=True, use_cache=use_cache):
+            yielded += 1
+            last_key = _element_key(element)
+            yield element
+        return
+    except MalformedCSVError as e:
+        print(f"Malformed CSV response ({e}), fetching the tile as JSON instead...", file=sys.stderr)
+
+    query = build_overpass_query(tile, poi_types, osm_types, newer=newer)
+    for index, element in enumerate(_stream_query(query, timestamps=timestamps, use_cache=use_cache)):
+        if index < yielded:
+            if index == yielded - 1 and _element_key(element) != last_key:
+                raise ValueError("Overpass data changed while the tile was fetched again as JSON")
+            continue
+        tags = element.get("tags", {})
+        element["tags"] = {key: tags[key] for key in keys if tags.get(key)}
+        yield element
+
+
+def _fetch_tile(tile: Tuple[float, float, float, float],
+                poi_types: List[str],
+                osm_types: List[str],
+                keys: Optional[List[str]] = None,
+                newer: Optional[str] = None,
+                timestamps: Optional[List[str]] = None) -> List[Dict]:
+    """
+    Fetch the POIs of a single tile
+
+    Args:
+        tile: Tile bounding box (south, west, north, east)
+        poi_types: List of POI types to query
+        osm_types: List of OSM object types (node, way, relation)
+        keys: Only fetch these tag keys (None for all tags)
+        newer: Only fetch elements changed after this date in full
+        timestamps: List the data timestamp of the response is appended to
+
+    Returns:
+        List of POI dictionaries
+    """
+    return list(_stream_tile(tile, poi_types, osm_types, keys, newer, timestamps))
+
+
+def _element_key(element: Dict) -> int:
+    """
+    Build a compact identifier unique across OSM object types
+
+    Args:
+        element: Overpass element
+
+    Returns:
+        Integer combining the element id and type
+    """
+    return element.get("id", 0) * 4 + OSM_TYPE_CODES.get(element.get("type"), 0)
+
+
+def iter_poi_data(bbox: Tuple[float, float, float, float],
+                  poi_types: List[str],
+                  osm_types: List[str],
+                  max_tile_size: Optional[float] = None,
+                  max_depth: int = DEFAULT_MAX_SPLIT_DEPTH,
+                  workers: int = 1,
+                  keys: Optional[List[str]] = None,
+                  newer: Optional[str] = None,
+                  timestamps: Optional[List[str]] = None) -> Iterator[Dict]:
+    """
+    Fetch POI data from Overpass API as a stream of elements
+
+    A single-request area is parsed incrementally and its elements are yielded
+    while the response is still downloading. Large areas are fetched as a grid
+    of tiles by a pool of worker threads, and elements are yielded as soon as
+    their tile is complete. Any tile the server rejects as too expensive is
+    split into quadrants. Elements returned by several tiles are yielded once.
+    A single request is streamed without remembering its elements, so memory
+    stays flat; if the server gives up after elements were yielded, the error
+    is raised instead of splitting, as the quadrants would repeat them.
+    With keys, only those tags are requested, which shrinks the responses
+    considerably when few keys are exported.
+
+    Args:
+        bbox: Bounding box (south, west, north, east)
+        poi_types: List of POI types to query
+        osm_types: List of OSM object types (node, way, relation)
+        max_tile_size: Maximum tile edge length in degrees (None for a single request)
+        max_depth: Maximum number of times a tile may be split
+        workers: Number of tiles fetched concurrently
+        keys: Only fetch these tag keys (None for all tags)
+        newer: Only fetch elements changed after this date in full, others as bare ids
+               (bypasses the response cache)
+        timestamps: List the data timestamp of every JSON response is appended to
+
+    Yields:
+        POI dictionaries
+
+    Raises:
+        QueryTooLargeError: If a tile is still too large after max_depth splits
+        requests.exceptions.RequestException: On network errors
+        ValueError: If a response cannot be parsed
+    """
+    tiles = tile_bbox(bbox, max_tile_size) if max_tile_size else [bbox]
+    depth = 0
+
+    if len(tiles) == 1:
+        streamed = False
+        try:
+            for element in _stream_tile(bbox, poi_types, osm_types, keys, newer, timestamps):
+                streamed = True
+                yield element
+            return
+        except QueryTooLargeError as e:
+            if max_depth < 1 or streamed:
+                raise
+            print(f"Area too large ({e}), splitting into quadrants...", file=sys.stderr)
+            tiles = split_bbox(bbox)
+            depth = 1
+    else:
+        print(f"Splitting area into {len(tiles)} tiles", file=sys.stderr)
+
+    seen = set()
+
+    def unseen(elements: Iterable[Dict]) -> Iterator[Dict]:
+        # Ways and relations crossing tile borders are returned once per tile
+        for element in elements:
+            element_key = _element_key(element)
+            if element_key not in seen:
+                seen.add(element_key)
+                yield element
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        pending = {
+            executor.submit(_fetch_tile, tile, poi_types, osm_types, keys, newer, timestamps): (tile, depth)
+            for tile in tiles
+        }
+
+        try:
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    tile, depth = pending.pop(future)
+                    try:
+                        elements = future.result()
+                    except QueryTooLargeError as e:
+                        if depth >= max_depth:
+                            raise
+
+                        print(f"Tile too large ({e}), splitting into quadrants...", file=sys.stderr)
+                        for quadrant in split_bbox(tile):
+                            future = executor.submit(_fetch_tile, quadrant, poi_types, osm_types, keys,
+                                                     newer, timestamps)
+                            pending[future] = (quadrant, depth + 1)
+                        continue
+
+                    yield from unseen(elements)
+        finally:
+            for future in pending:
+                future.cancel()
+
+
 def fetch_poi_data(bbox: Tuple[float, float, float, float],
                    poi_types: List[str],
-                   osm_types: List[str]) -> List[Dict]:
+                   osm_types: List[str],
+                   max_tile_size: Optional[float] = None,
+                   max_depth: int = DEFAULT_MAX_SPLIT_DEPTH,
+                   workers: int = 1) -> List[Dict]:
     """
     Fetch POI data from Overpass API
 
+    Large areas are fetched as a grid of tiles. Any tile the server rejects as
+    too expensive is split into quadrants, and the results of all tiles are
+    merged without duplicates. Tiles are fetched by a pool of worker threads.
+
     Args:
         bbox: Bounding box (south, west, north, east)
         poi_types: List of POI types to query
         osm_types: List of OSM object types (node, way, relation)
+        max_tile_size: Maximum tile edge length in degrees (None for a single request)
+        max_depth: Maximum number of times a tile may be split
+        workers: Number of tiles fetched concurrently
 
     Returns:
         List of POI dictionaries
     """
-    query = build_overpass_query(bbox, poi_types, osm_types)
-
-    if not query:
+    if not build_overpass_query(bbox, poi_types, osm_types):
         print("No valid POI types selected.", file=sys.stderr)
         return []
 
     try:
         print("Fetching data from Overpass API...", file=sys.stderr)
-        response = requests.post(
-            "https://overpass-api.de/api/interpreter",
-            data={"data": query},
-            headers={"User-Agent": "POI-Harvester-CLI"},
-            timeout=30
-        )
-        response.raise_for_status()
-
-        data = response.json().get("elements", [])
+        data = list(iter_poi_data(bbox, poi_types, osm_types, max_tile_size, max_depth, workers))
         print(f"Found {len(data)} POIs", file=sys.stderr)
         return data
 
-    except requests.exceptions.Timeout:
-        print("Request to Overpass API timed out", file=sys.stderr)
-    except requests.exceptions.RequestException as e:
-        print(f"Network error during Overpass query: {e}", file=sys.stderr)
-    except ValueError as e:
-        print(f"Error parsing Overpass response: {e}", file=sys.stderr)
     except Exception as e:
-        print(f"Unexpected error during Overpass query: {e}", file=sys.stderr)
+        report_fetch_error(e)
 
     return []
 
 
+def report_fetch_error(error: Exception) -> None:
+    """
+    Print a readable message for an error raised while fetching POI data
+
+    Args:
+        error: Exception raised by iter_poi_data
+    """
+    if isinstance(error, QueryTooLargeError):
+        print(f"Overpass query failed even after splitting: {error}", file=sys.stderr)
+    elif isinstance(error, requests.exceptions.RequestException):
+        print(f"Network error during Overpass query: {error}", file=sys.stderr)
+    elif isinstance(error, ValueError):
+        print(f"Error parsing Overpass response: {error}", file=sys.stderr)
+    else:
+        print(f"Unexpected error during Overpass query: {error}", file=sys.stderr)
+
+
 def validate_poi_types(poi_types: List[str]) -> List[str]:
     """
     Validate and filter POI types
@@ -0,0 +1,203 @@
+"""
+Spatial query planning module for POI-Harvester CLI
+"""
+
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+from .overpass import iter_poi_data
+
+BBox = Tuple[float, float, float, float]
+
+# Completed regions kept for reuse before the oldest ones are dropped
+DEFAULT_MAX_REGIONS = 256
+
+
+def intersects(a: BBox, b: BBox) -> bool:
+    """Check whether two bounding boxes overlap with a non-zero area"""
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def subtract_bbox(bbox: BBox, other: BBox) -> List[BBox]:
+    """
+    Remove one bounding box from another
+
+    Args:
+        bbox: Bounding box (south, west, north, east)
+        other: Bounding box to cut out of bbox
+
+    Returns:
+        Up to four non-overlapping boxes covering bbox outside of other
+    """
+    if not intersects(bbox, other):
+        return [bbox]
+
+    s, w, n, e = bbox
+    pieces = []
+
+    # Full-width bands below and above, then the parts left and right in between
+    if other[0] > s:
+        pieces.append((s, w, other[0], e))
+    if other[2] < n:
+        pieces.append((other[2], w, n, e))
+
+    band_s = max(s, other[0])
+    band_n = min(n, other[2])
+    if other[1] > w:
+        pieces.append((band_s, w, band_n, other[1]))
+    if other[3] < e:
+        pieces.append((band_s, other[3], band_n, e))
+
+    return pieces
+
+
+def subtract_bboxes(bbox: BBox, others: List[BBox]) -> List[BBox]:
+    """
+    Remove several bounding boxes from another
+
+    Args:
+        bbox: Bounding box (south, west, north, east)
+        others: Bounding boxes to cut out of bbox
+
+    Returns:
+        Non-overlapping boxes covering the part of bbox outside of all others
+    """
+    remainder = [bbox]
+    for other in others:
+        remainder = [piece for part in remainder for piece in subtract_bbox(part, other)]
+        if not remainder:
+            break
+    return remainder
+
+
+class Region:
+    """Area fetched for one query filter, with its elements once the download is complete"""
+
+    def __init__(self, bbox: BBox, expires: float):
+        self.bbox = bbox
+        self.expires = expires
+        self.future: Future = Future()
+
+
+class CoveragePlanner:
+    """
+    Fetch overlapping areas without downloading any part twice
+
+    The planner remembers which areas have been downloaded, or are being
+    downloaded by another thread, for each combination of POI types, OSM
+    types and projected keys. A request only downloads the part of its bbox
+    no such area covers yet, waits for overlapping downloads in flight, and
+    clips its result from the union. Elements are selected by the point the
+    exporters use, so the result matches a download of the full bbox.
+    """
+
+    def __init__(self, ttl: Optional[float] = None, max_regions: int = DEFAULT_MAX_REGIONS):
+        """
+        Args:
+            ttl: Seconds a downloaded area is reused (None to reuse it for the lifetime of the planner)
+            max_regions: Maximum number of completed areas kept in memory
+        """
+        self.ttl = ttl
+        self.max_regions = max_regions
+        self._regions: Dict[Tuple, List[Region]] = {}
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "downloads": 0, "reused": 0, "waited": 0}
+
+    def _plan(self, signature: Tuple, bbox: BBox) -> Tuple[List[Region], List[Region]]:
+        """
+        Register the uncovered parts of bbox as new regions
+
+        Returns:
+            Tuple of (new regions to download, existing regions overlapping bbox)
+        """
+        now = time.monotonic()
+
+        with self._lock:
+            regions = [region for region in self._regions.get(signature, [])
+                       if region.expires > now and not (region.future.done() and region.future.exception())]
+
+            overlapping = [region for region in regions if intersects(region.bbox, bbox)]
+            expires = now + self.ttl if self.ttl is not None else float("inf")
+            new = [Region(piece, expires) for piece in subtract_bboxes(bbox, [region.bbox for region in overlapping])]
+
+            regions.extend(new)
+            completed = [region for region in regions if region.future.done()]
+            for region in completed[:max(0, len(completed) - self.max_regions)]:
+                regions.remove(region)
+            self._regions[signature] = regions
+
+            self.stats["requests"] += 1
+            self.stats["downloads"] += len(new)
+            self.stats["reused"] += sum(1 for region in overlapping if region.future.done())
+            self.stats["waited"] += sum(1 for region in overlapping if not region.future.done())
+
+        return new, overlapping
+
+    def fetch(self,
+              bbox: BBox,
+              poi_types: List[str],
+              osm_types: List[str],
+              keys: Optional[List[str]] = None,
+              **fetch_options) -> List[Dict]:
+        """
+        Get the elements of an area, downloading only what is not yet known
+
+        Args:
+            bbox: Bounding box (south, west, north, east)
+            poi_types: List of POI types to query
+            osm_types: List of OSM object types (node, way, relation)
+            keys: Only fetch these tag keys (None for all tags)
+            fetch_options: Further options passed to iter_poi_data
+
+        Returns:
+            Elements whose point lies inside bbox
+
+        Raises:
+            Any error of iter_poi_data, for own downloads and awaited ones
+        """
+        signature = (tuple(sorted(poi_types)), tuple(sorted(osm_types)), tuple(keys) if keys is not None else None)
+        new, overlapping = self._plan(signature, bbox)
+
+        if overlapping:
+            print(f"Reusing {len(overlapping)} overlapping areas, downloading {len(new)} remaining parts",
+                  file=sys.stderr)
+
+        for region in new:
+            try:
+                region.future.set_result(list(iter_poi_data(region.bbox, poi_types, osm_types, keys=keys,
+                                                            **fetch_options)))
+            except Exception as e:
+                region.future.set_exception(e)
+                # Parts nobody downloads any more must not keep other requests waiting
+                for pending in new:
+                    if not pending.future.done():
+                        pending.future.set_exception(e)
+                raise
+
+        result = []
+        seen = set()
+        for region in new + overlapping:
+            for element in region.future.result():
+                lat = element.get("lat")
+                lon = element.get("lon")
+                if lat is None or lon is None:
+                    center = element.get("center", {})
+                    lat = center.get("lat")
+                    lon = center.get("lon")
+                if lat is None or lon is None or not (bbox[0] <= lat <= bbox[2] and bbox[1] <= lon <= bbox[3]):
+                    continue
+
+                key = (element.get("type"), element.get("id"))
+                if key in seen:
+                    continue
+                seen.add(key)
+                result.append(element)
+
+        return result
+
+    def clear(self) -> None:
+        """Forget all downloaded areas"""
+        with self._lock:
+            self._regions.clear()
@@ -0,0 +1,175 @@
+"""
+Vectorized POI processing module for POI-Harvester CLI
+"""
+
+import math
+from typing import List, Optional, Sequence, Tuple
+from .store import POIStore
+from .utils import EARTH_RADIUS_KM, haversine_km
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, a pure Python path is used without it
+    np = None
+
+
+def haversine_km_array(lat: float, lon: float, lats, lons):
+    """
+    Calculate great-circle distances from one point to many points with NumPy
+
+    Args:
+        lat: Latitude of the reference point
+        lon: Longitude of the reference point
+        lats: Array of latitudes
+        lons: Array of longitudes
+
+    Returns:
+        NumPy array of distances in kilometers
+    """
+    phi1 = math.radians(lat)
+    phi2 = np.radians(lats)
+    a = np.sin((phi2 - phi1) / 2) ** 2 + \
+        math.cos(phi1) * np.cos(phi2) * np.sin(np.radians(lons - lon) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(1.0, np.sqrt(a)))
+
+
+def _select_indices_numpy(store: POIStore,
+                          bbox: Optional[Tuple[float, float, float, float]],
+                          center: Optional[Tuple[float, float]],
+                          radius_km: Optional[float],
+                          dedup: bool):
+    """NumPy implementation of select_poi_indices"""
+    # Zero-copy views on the store columns
+    lats = np.frombuffer(store.lats, dtype=np.float64)
+    lons = np.frombuffer(store.lons, dtype=np.float64)
+
+    mask = np.isfinite(lats) & np.isfinite(lons) & (np.abs(lats) <= 90) & (np.abs(lons) <= 180)
+
+    if bbox is not None:
+        s, w, n, e = bbox
+        mask &= (lats >= s) & (lats <= n) & (lons >= w) & (lons <= e)
+
+    if center is not None and radius_km is not None:
+        mask &= haversine_km_array(center[0], center[1], lats, lons) <= radius_km
+
+    indices = np.flatnonzero(mask)
+
+    if dedup and len(indices):
+        keys = np.frombuffer(store.ids, dtype=np.int64)[indices] * 4 + \
+            np.frombuffer(store.osm_types, dtype=np.int8)[indices]
+        # Rows without OSM identity must never collapse into each other
+        anonymous = keys == 0
+        keys[anonymous] = -1 - indices[anonymous]
+
+        _, first = np.unique(keys, return_index=True)
+        indices = indices[np.sort(first)]
+
+    return indices
+
+
+def _select_indices_python(store: POIStore,
+                           bbox: Optional[Tuple[float, float, float, float]],
+                           center: Optional[Tuple[float, float]],
+                           radius_km: Optional[float],
+                           dedup: bool) -> List[int]:
+    """Pure Python implementation of select_poi_indices"""
+    indices = []
+    seen = set()
+
+    for i, (lat, lon) in enumerate(zip(store.lats, store.lons)):
+        if not (math.isfinite(lat) and math.isfinite(lon) and abs(lat) <= 90 and abs(lon) <= 180):
+            continue
+
+        if bbox is not None:
+            s, w, n, e = bbox
+            if not (s <= lat <= n and w <= lon <= e):
+                continue
+
+        if center is not None and radius_km is not None:
+            if haversine_km(center[0], center[1], lat, lon) > radius_km:
+                continue
+
+        if dedup:
+            key = store.ids[i] * 4 + store.osm_types[i]
+            if key:
+                if key in seen:
+                    continue
+                seen.add(key)
+
+        indices.append(i)
+
+    return indices
+
+
+def select_poi_indices(store: POIStore,
+                       bbox: Optional[Tuple[float, float, float, float]] = None,
+                       center: Optional[Tuple[float, float]] = None,
+                       radius_km: Optional[float] = None,
+                       dedup: bool = True) -> Sequence[int]:
+    """
+    Find the rows of a store with valid coordinates inside the requested area
+
+    Uses array operations on the store columns when NumPy is installed.
+
+    Args:
+        store: POI store
+        bbox: Keep only rows inside this bounding box (south, west, north, east)
+        center: Center point (lat, lon) of a radius filter
+        radius_km: Keep only rows within this distance of center
+        dedup: Keep only the first row of each OSM element (type and id)
+
+    Returns:
+        Ascending row numbers of the rows to keep
+    """
+    if np is not None:
+        return _select_indices_numpy(store, bbox, center, radius_km, dedup)
+    return _select_indices_python(store, bbox, center, radius_km, dedup)
+
+
+def filter_poi_store(store: POIStore,
+                     bbox: Optional[Tuple[float, float, float, float]] = None,
+                     center: Optional[Tuple[float, float]] = None,
+                     radius_km: Optional[float] = None,
+                     dedup: bool = True) -> POIStore:
+    """
+    Drop invalid, out-of-area and duplicate rows from a store
+
+    Args:
+        store: POI store
+        bbox: Keep only rows inside this bounding box (south, west, north, east)
+        center: Center point (lat, lon) of a radius filter
+        radius_km: Keep only rows within this distance of center
+        dedup: Keep only the first row of each OSM element (type and id)
+
+    Returns:
+        New store with the remaining rows
+    """
+    return store.select(select_poi_indices(store, bbox, center, radius_km, dedup))
+
+
+def sort_by_distance(store: POIStore, center: Tuple[float, float]) -> POIStore:
+    """
+    Sort a store by distance from a center point and add a distance_km column
+
+    Args:
+        store: POI store
+        center: Reference point (lat, lon)
+
+    Returns:
+        New store ordered by ascending distance
+    """
+    if np is not None:
+        lats = np.frombuffer(store.lats, dtype=np.float64)
+        lons = np.frombuffer(store.lons, dtype=np.float64)
+        distances = np.round(haversine_km_array(center[0], center[1], lats, lons), 3)
+        order = np.argsort(distances, kind="stable")
+        result = store.select(order)
+        result.add_numeric_column("distance_km", distances[order].tolist())
+        return result
+
+    distances = [round(haversine_km(center[0], center[1], lat, lon), 3)
+                 for lat, lon in zip(store.lats, store.lons)]
+    order = sorted(range(len(distances)), key=distances.__getitem__)
+    result = store.select(order)
+    result.add_numeric_column("distance_km", (distances[i] for i in order))
+    return result
@@ -0,0 +1,452 @@
+"""
+HTTP service module for POI-Harvester CLI
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+from .main_cli import add_runtime_arguments, build_parser, configure_runtime, get_fetch_options, \
+    get_projection, resolve_area, run_job, validate_args
+from .overpass import validate_poi_types
+from .planner import CoveragePlanner
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+
+# Downloaded areas are kept in memory for later requests overlapping them
+DEFAULT_MEMORY_TTL = 300
+
+# Response bodies are sent in chunks of about this many bytes
+STREAM_CHUNK_SIZE = 64 * 1024
+
+CONTENT_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "json": "application/json; charset=utf-8",
+    "sql": "application/sql; charset=utf-8",
+    "sqlite": "application/vnd.sqlite3",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+# Formats whose writers need a real file, they are exported to a temporary file first
+FILE_FORMATS = {"sqlite", "parquet"}
+
+# Query parameters accepted by /harvest, with the harvest option they set
+QUERY_OPTIONS = {
+    "bbox": "--bbox",
+    "location": "--location",
+    "radius": "--radius",
+    "types": "--poi-types",
+    "poi_types": "--poi-types",
+    "keys": "--keys",
+    "osm_types": "--osm-types",
+    "format": "--format",
+    "table_name": "--table-name",
+    "column_map": "--column-map",
+    "sql_batch_size": "--sql-batch-size",
+    "tile_size": "--tile-size",
+}
+
+# Query parameters switching a harvest flag on
+QUERY_FLAGS = {
+    "all_keys": "--all-keys",
+    "distance": "--distance",
+    "in_memory": "--in-memory",
+    "no_projection": "--no-projection",
+    "sql_copy": "--sql-copy",
+}
+
+# Query parameters holding comma-separated lists
+LIST_OPTIONS = {"--bbox", "--poi-types", "--keys", "--osm-types"}
+
+
+class HTTPError(Exception):
+    """Raised while handling a request to answer with an error status"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class ResponseStream:
+    """
+    Writable text stream handing the export to the event loop in chunks
+
+    Exporters run in a worker thread and write into this stream. Every full
+    chunk is put on a bounded asyncio queue, so a slow client slows the
+    export down instead of filling memory.
+    """
+
+    name = "HTTP response"
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, queue: asyncio.Queue):
+        self._loop = loop
+        self._queue = queue
+        self._parts = []
+        self._size = 0
+        self.closed = False
+
+    def write(self, text: str) -> int:
+        if self.closed:
+            raise ConnectionError("Client disconnected")
+        self._parts.append(text)
+        self._size += len(text)
+        if self._size >= STREAM_CHUNK_SIZE:
+            self.flush()
+        return len(text)
+
+    def flush(self) -> None:
+        if self._parts:
+            data = "".join(self._parts).encode("utf-8")
+            self._parts = []
+            self._size = 0
+            asyncio.run_coroutine_threadsafe(self._queue.put(data), self._loop).result()
+
+    def finish(self) -> None:
+        """Send the remaining text and mark the end of the body"""
+        if not self.closed:
+            self.flush()
+        asyncio.run_coroutine_threadsafe(self._queue.put(None), self._loop).result()
+
+
+def _raise_bad_request(message: str) -> None:
+    """Replacement for ArgumentParser.error raising instead of exiting"""
+    raise HTTPError(400, message)
+
+
+def parse_harvest_query(query: str) -> argparse.Namespace:
+    """
+    Translate the query string of a /harvest request into harvest arguments
+
+    Args:
+        query: URL query string, e.g. "bbox=50.0,8.0,50.1,8.1&types=cafe&format=csv"
+
+    Returns:
+        Parsed and validated arguments
+
+    Raises:
+        HTTPError: If a parameter is unknown or invalid
+    """
+    argv = []
+    for name, values in parse_qs(query).items():
+        value = values[-1]
+        if name in QUERY_FLAGS:
+            if value.lower() in ("1", "true", "yes"):
+                argv.append(QUERY_FLAGS[name])
+        elif name in QUERY_OPTIONS:
+            option = QUERY_OPTIONS[name]
+            argv.append(option)
+            argv.extend(value.split(",") if option in LIST_OPTIONS else [value])
+        else:
+            raise HTTPError(400, f"Unknown parameter '{name}'")
+
+    parser = build_parser()
+    parser.error = _raise_bad_request
+    args = parser.parse_args(argv)
+
+    error = validate_args(args)
+    if error:
+        raise HTTPError(400, error)
+
+    if not validate_poi_types(args.poi_types):
+        raise HTTPError(400, "No valid POI types specified")
+
+    return args
+
+
+class HarvestServer:
+    """
+    asyncio HTTP server answering /harvest requests from warm caches
+
+    Requests with the same filters share a coverage planner, so concurrent
+    or repeated requests only download the parts of their area no other
+    request has downloaded within the last memory_ttl seconds.
+    """
+
+    def __init__(self, memory_ttl: float = DEFAULT_MEMORY_TTL, cache=None):
+        """
+        Args:
+            memory_ttl: Seconds downloaded areas are kept in memory
+            cache: Overpass response cache whose statistics are reported
+        """
+        self.memory_ttl = memory_ttl
+        self.cache = cache
+        self.planner = CoveragePlanner(ttl=memory_ttl)
+        self.stats = {"requests": 0}
+
+    async def fetch(self, args: argparse.Namespace, bbox: Tuple[float, float, float, float]) -> List[Dict]:
+        """
+        Get the Overpass elements for a request, sharing downloads between requests
+
+        Args:
+            args: Harvest arguments
+            bbox: Bounding box to fetch
+
+        Returns:
+            List of elements
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, lambda: self.planner.fetch(
+            bbox, validate_poi_types(args.poi_types), args.osm_types, keys=get_projection(args),
+            **get_fetch_options(args)
+        ))
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve one HTTP request, then close the connection"""
+        started = time.monotonic()
+        status = 500
+        target = "-"
+
+        try:
+            request_line = (await reader.readline()).decode("latin-1").strip()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+
+            parts = request_line.split()
+            if len(parts) != 3:
+                raise HTTPError(400, "Malformed request")
+            method, target, _ = parts
+            if method != "GET":
+                raise HTTPError(405, "Only GET is supported")
+
+            url = urlsplit(target)
+            self.stats["requests"] += 1
+
+            if url.path == "/harvest":
+                status = await self._harvest(url.query, writer)
+            elif url.path == "/status":
+                body = dict(self.stats, areas=self.planner.stats)
+                if self.cache is not None:
+                    body["cache"] = self.cache.stats()
+                status = await self._send_json(writer, 200, body)
+            else:
+                raise HTTPError(404, "Not found")
+
+        except HTTPError as e:
+            status = await self._send_json(writer, e.status, {"error": e.message})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            status = 499
+        except Exception as e:
+            print(f"Unexpected error while serving {target}: {e}", file=sys.stderr)
+            status = await self._send_json(writer, 500, {"error": "Internal server error"})
+        finally:
+            print(f"{request_line_summary(target)} {status} {time.monotonic() - started:.3f}s", file=sys.stderr)
+            try:
+                writer.close()
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _harvest(self, query: str, writer: asyncio.StreamWriter) -> int:
+        """
+        Run a harvest and stream the export as the response body
+
+        Returns:
+            HTTP status sent to the client
+        """
+        args = parse_harvest_query(query)
+        loop = asyncio.get_running_loop()
+
+        try:
+            area = await loop.run_in_executor(None, resolve_area, args)
+        except ValueError as e:
+            raise HTTPError(404, str(e))
+
+        try:
+            elements = await self.fetch(args, area[0])
+        except Exception as e:
+            raise HTTPError(502, f"Fetching data from Overpass API failed: {e}")
+
+        if not elements:
+            raise HTTPError(404, "No data retrieved")
+
+        await self._send_headers(writer, 200, CONTENT_TYPES[args.format], chunked=True)
+
+        if args.format in FILE_FORMATS:
+            complete = await self._stream_file_export(args, area, elements, writer)
+        else:
+            complete = await self._stream_text_export(args, area, elements, writer)
+
+        if complete:
+            writer.write(b"0\r\n\r\n")
+            await writer.drain()
+            return 200
+
+        # Without the final chunk the client can tell the body is incomplete
+        return 500
+
+    async def _stream_text_export(self, args: argparse.Namespace, area: Tuple,
+                                  elements: List[Dict], writer: asyncio.StreamWriter) -> bool:
+        """Export in a worker thread while sending each chunk as soon as it is written"""
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=4)
+        stream = ResponseStream(loop, queue)
+        args.output = stream
+
+        def export() -> Dict:
+            try:
+                return run_job(args, area=area, elements=elements)
+            finally:
+                stream.finish()
+
+        job = loop.run_in_executor(None, export)
+
+        try:
+            while True:
+                chunk = await queue.get()
+                if chunk is None:
+                    break
+                writer.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+                await writer.drain()
+        except ConnectionError:
+            # Stop the export, then drain the queue so the worker thread can finish
+            stream.closed = True
+            while await queue.get() is not None:
+                pass
+            raise
+        finally:
+            result = await job
+
+        return result["status"] == "ok"
+
+    async def _stream_file_export(self, args: argparse.Namespace, area: Tuple,
+                                  elements: List[Dict], writer: asyncio.StreamWriter) -> bool:
+        """Export to a temporary file in a worker thread, then send the file in chunks"""
+        loop = asyncio.get_running_loop()
+        fd, path = tempfile.mkstemp(suffix="." + args.format)
+        os.close(fd)
+        os.remove(path)
+        args.output = path
+
+        try:
+            result = await loop.run_in_executor(None, lambda: run_job(args, area=area, elements=elements))
+            if result["status"] != "ok":
+                return False
+
+            with open(path, "rb") as f:
+                while True:
+                    chunk = await loop.run_in_executor(None, f.read, STREAM_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    writer.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+                    await writer.drain()
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+
+        return True
+
+    @staticmethod
+    async def _send_headers(writer: asyncio.StreamWriter, status: int, content_type: str,
+                            chunked: bool = False, length: Optional[int] = None) -> None:
+        """Send the status line and headers of a response"""
+        reasons = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+                   500: "Internal Server Error", 502: "Bad Gateway"}
+        headers = [f"HTTP/1.1 {status} {reasons.get(status, 'Error')}",
+                   f"Content-Type: {content_type}",
+                   "Connection: close"]
+        if chunked:
+            headers.append("Transfer-Encoding: chunked")
+        if length is not None:
+            headers.append(f"Content-Length: {length}")
+        writer.write(("\r\n".join(headers) + "\r\n\r\n").encode("latin-1"))
+        await writer.drain()
+
+    async def _send_json(self, writer: asyncio.StreamWriter, status: int, body: Dict) -> int:
+        """Send a complete JSON response, returning its status"""
+        data = json.dumps(body).encode("utf-8")
+        try:
+            await self._send_headers(writer, status, CONTENT_TYPES["json"], length=len(data))
+            writer.write(data)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        return status
+
+
+def request_line_summary(target: str) -> str:
+    """Shorten a request target for the access log"""
+    return target if len(target) <= 200 else target[:197] + "..."
+
+
+async def serve(host: str, port: int, server: HarvestServer) -> None:
+    """
+    Accept connections until cancelled
+
+    Args:
+        host: Interface to listen on
+        port: TCP port to listen on
+        server: Request handler
+    """
+    listener = await asyncio.start_server(server.handle, host, port)
+    print(f"Serving on http://{host}:{port}/harvest", file=sys.stderr)
+    async with listener:
+        await listener.serve_forever()
+
+
+def main_serve(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="poi-harvester serve",
+        description="Serve harvests over HTTP with warm caches",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Example request:
+  curl "http://127.0.0.1:8080/harvest?bbox=50.0,8.0,50.1,8.1&types=cafe,bank&keys=name,website&format=csv"
+        """
+    )
+
+    parser.add_argument(
+        "--host",
+        default=DEFAULT_HOST,
+        help=f"Interface to listen on (default: {DEFAULT_HOST})"
+    )
+
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=DEFAULT_PORT,
+        help=f"Port to listen on (default: {DEFAULT_PORT})"
+    )
+
+    parser.add_argument(
+        "--memory-ttl",
+        type=float,
+        default=DEFAULT_MEMORY_TTL,
+        help=f"Seconds fetched areas are kept in memory for repeated requests (default: {DEFAULT_MEMORY_TTL})"
+    )
+
+    parser.add_argument(
+        "--quiet", "-q",
+        action="store_true",
+        help="Suppress status messages"
+    )
+
+    add_runtime_arguments(parser)
+
+    args = parser.parse_args(argv)
+
+    if args.quiet:
+        sys.stderr = open(os.devnull, 'w')
+
+    if args.rate_limit <= 0:
+        print("Error: --rate-limit must be positive", file=sys.stderr)
+        return 1
+
+    cache = configure_runtime(args)
+    server = HarvestServer(memory_ttl=args.memory_ttl, cache=cache)
+
+    try:
+        asyncio.run(serve(args.host, args.port, server))
+    except KeyboardInterrupt:
+        pass
+    except OSError as e:
+        print(f"Error: Cannot listen on {args.host}:{args.port}: {e}", file=sys.stderr)
+        return 1
+
+    return 0
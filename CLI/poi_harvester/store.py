@@ -0,0 +1,250 @@
+"""
+Compact in-memory POI store for POI-Harvester CLI
+"""
+
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, a pure Python path is used without it
+    np = None
+
+# Type codes used in the osm_types column
+OSM_TYPE_CODES = {"node": 1, "way": 2, "relation": 3}
+OSM_TYPE_NAMES = {code: name for name, code in OSM_TYPE_CODES.items()}
+
+
+class POIStore:
+    """
+    Column-oriented store of POIs
+
+    Coordinates, OSM types and ids live in typed arrays. Tag keys are interned
+    once, and each key owns a sparse column holding the ascending row numbers
+    that carry the tag together with the (interned) values. Derived values
+    such as distances are kept as dense float columns in numeric_columns.
+    Iterating over rows yields plain tuples, so no dictionary is allocated
+    per POI.
+    """
+
+    def __init__(self):
+        self.osm_types = array("b")
+        self.ids = array("q")
+        self.lats = array("d")
+        self.lons = array("d")
+        self._key_index: Dict[str, int] = {}
+        self._keys: List[str] = []
+        self._rows: List[array] = []
+        self._values: List[List[str]] = []
+        self._strings: Dict[str, str] = {}
+        self.numeric_columns: Dict[str, array] = {}
+
+    @classmethod
+    def from_elements(cls, elements: Iterable[Dict]) -> "POIStore":
+        """
+        Build a store from Overpass elements or cleaned POI dictionaries
+
+        Args:
+            elements: Iterable of POI dictionaries
+
+        Returns:
+            Store holding every element with valid coordinates
+        """
+        store = cls()
+        for element in elements:
+            store.append(element)
+        return store
+
+    def append(self, element: Dict) -> bool:
+        """
+        Add a POI, taking coordinates from lat/lon or the way/relation center
+
+        Args:
+            element: Overpass element or cleaned POI dictionary
+
+        Returns:
+            True if the POI was added, False if it has no coordinates
+        """
+        lat = element.get("lat")
+        lon = element.get("lon")
+        if lat is None or lon is None:
+            center = element.get("center", {})
+            lat = center.get("lat")
+            lon = center.get("lon")
+        if lat is None or lon is None:
+            return False
+
+        row = len(self.lats)
+        self.osm_types.append(OSM_TYPE_CODES.get(element.get("type"), 0))
+        self.ids.append(element.get("id", 0))
+        self.lats.append(lat)
+        self.lons.append(lon)
+
+        for key, value in element.get("tags", {}).items():
+            column = self._key_index.get(key)
+            if column is None:
+                column = len(self._keys)
+                self._key_index[key] = column
+                self._keys.append(key)
+                self._rows.append(array("I"))
+                self._values.append([])
+            self._rows[column].append(row)
+            self._values[column].append(self._strings.setdefault(value, value))
+
+        return True
+
+    def __len__(self) -> int:
+        return len(self.lats)
+
+    def keys(self) -> List[str]:
+        """
+        Get all tag keys present in the store
+
+        Returns:
+            Sorted list of unique tag keys
+        """
+        return sorted(self._keys)
+
+    def iter_rows(self, keys: Sequence[str]) -> Iterator[Tuple[float, float, List[Optional[str]]]]:
+        """
+        Iterate over rows restricted to the given tag keys
+
+        Keys naming a numeric column yield its float values.
+
+        Args:
+            keys: Tag keys to extract
+
+        Yields:
+            Tuples of (lat, lon, values) with None for missing tags
+        """
+        columns = []
+        for key in keys:
+            column = self._key_index.get(key)
+            if key in self.numeric_columns:
+                # Dense columns have a value in every row
+                numeric = self.numeric_columns[key]
+                columns.append((range(len(numeric)), numeric))
+            elif column is None:
+                columns.append((array("I"), []))
+            else:
+                columns.append((self._rows[column], self._values[column]))
+
+        # Sparse columns are sorted by row, so one cursor per column suffices
+        cursors = [0] * len(columns)
+        lats = self.lats
+        lons = self.lons
+
+        for row in range(len(lats)):
+            values = []
+            for i, (rows, column_values) in enumerate(columns):
+                cursor = cursors[i]
+                if cursor < len(rows) and rows[cursor] == row:
+                    values.append(column_values[cursor])
+                    cursors[i] = cursor + 1
+                else:
+                    values.append(None)
+            yield lats[row], lons[row], values
+
+    def __iter__(self) -> Iterator[Dict]:
+        """
+        Iterate over the POIs as cleaned POI dictionaries
+
+        Prefer iter_rows where possible, it does not allocate a dictionary per row.
+        """
+        for lat, lon, values in self.iter_rows(self._keys):
+            tags = {key: value for key, value in zip(self._keys, values) if value is not None}
+            item = {"lat": lat, "lon": lon}
+            if tags:
+                item["tags"] = tags
+            yield item
+
+    def add_numeric_column(self, name: str, values: Iterable[float]) -> None:
+        """
+        Attach a dense float column, e.g. a computed distance
+
+        Args:
+            name: Column name used in place of a tag key when exporting
+            values: One value per row
+        """
+        column = array("d", values)
+        if len(column) != len(self):
+            raise ValueError(f"Column '{name}' has {len(column)} values for {len(self)} rows")
+        self.numeric_columns[name] = column
+
+    def select(self, indices: Iterable[int]) -> "POIStore":
+        """
+        Build a new store from a subset of rows
+
+        Args:
+            indices: Row numbers to keep, in the order they should appear
+
+        Returns:
+            Store holding the selected rows
+        """
+        if np is not None:
+            return self._select_numpy(np.asarray(indices, dtype=np.int64))
+
+        indices = array("I", indices)
+        result = POIStore()
+        result.osm_types = array("b", (self.osm_types[i] for i in indices))
+        result.ids = array("q", (self.ids[i] for i in indices))
+        result.lats = array("d", (self.lats[i] for i in indices))
+        result.lons = array("d", (self.lons[i] for i in indices))
+        result._strings = self._strings
+
+        for name, column in self.numeric_columns.items():
+            result.numeric_columns[name] = array("d", (column[i] for i in indices))
+
+        for key, rows, values in zip(self._keys, self._rows, self._values):
+            lookup = dict(zip(rows, values))
+            new_rows = array("I")
+            new_values = []
+            for new_row, row in enumerate(indices):
+                value = lookup.get(row)
+                if value is not None:
+                    new_rows.append(new_row)
+                    new_values.append(value)
+
+            result._add_column(key, new_rows, new_values)
+
+        return result
+
+    def _select_numpy(self, indices) -> "POIStore":
+        """NumPy implementation of select"""
+        result = POIStore()
+        result._strings = self._strings
+
+        for name, typecode, dtype in (("osm_types", "b", np.int8), ("ids", "q", np.int64),
+                                      ("lats", "d", np.float64), ("lons", "d", np.float64)):
+            column = np.frombuffer(getattr(self, name), dtype=dtype)[indices]
+            setattr(result, name, array(typecode, column.tobytes()))
+
+        for name, column in self.numeric_columns.items():
+            selected = np.frombuffer(column, dtype=np.float64)[indices]
+            result.numeric_columns[name] = array("d", selected.tobytes())
+
+        # Position of every old row in the new store, -1 for dropped rows
+        new_positions = np.full(len(self), -1, dtype=np.int64)
+        new_positions[indices] = np.arange(len(indices))
+
+        for key, rows, values in zip(self._keys, self._rows, self._values):
+            mapped = new_positions[np.frombuffer(rows, dtype=np.uint32)]
+            kept = np.flatnonzero(mapped >= 0)
+            if not len(kept):
+                continue
+
+            # Selections may reorder rows, sparse columns must stay sorted
+            order = kept[np.argsort(mapped[kept], kind="stable")]
+            new_rows = array("I", mapped[order].astype(np.uint32).tobytes())
+            result._add_column(key, new_rows, [values[i] for i in order.tolist()])
+
+        return result
+
+    def _add_column(self, key: str, rows: array, values: List[str]) -> None:
+        """Attach a complete sparse column for a key not yet in the store"""
+        if not rows:
+            return
+        self._key_index[key] = len(self._keys)
+        self._keys.append(key)
+        self._rows.append(rows)
+        self._values.append(values)
@@ -2,11 +2,18 @@
 Utility functions for POI-Harvester CLI
 """
 
-from typing import Tuple, List, Dict
+import math
+from typing import Tuple, List, Dict, Iterable, Iterator, Optional
+
+# Mean earth radius in kilometers
+EARTH_RADIUS_KM = 6371.0088
+
 
 def get_bbox(lat: float, lon: float, radius_km: float) -> Tuple[float, float, float, float]:
     """
-    Calculate bounding box from center point and radius
+    Calculate the smallest bounding box containing a circle around a center point
+
+    The longitude extent grows with latitude as meridians converge.
 
     Args:
         lat: Latitude of center point
@@ -16,8 +23,91 @@ def get_bbox(lat: float, lon: float, radius_km: float) -> Tuple[float, float, fl
     Returns:
         Tuple of (south, west, north, east) coordinates
     """
-    delta = radius_km / 111  # rough conversion from km to degrees
-    return lat - delta, lon - delta, lat + delta, lon + delta
+    angular_radius = radius_km / EARTH_RADIUS_KM
+    delta_lat = math.degrees(angular_radius)
+
+    south = max(-90.0, lat - delta_lat)
+    north = min(90.0, lat + delta_lat)
+
+    # Widest longitude extent of the circle, or all longitudes if it contains a pole
+    ratio = math.sin(angular_radius) / max(math.cos(math.radians(lat)), 1e-12)
+    if ratio >= 1 or south <= -90 or north >= 90:
+        return south, -180.0, north, 180.0
+
+    delta_lon = math.degrees(math.asin(ratio))
+    return south, lon - delta_lon, north, lon + delta_lon
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """
+    Calculate the great-circle distance between two points
+
+    Args:
+        lat1: Latitude of the first point
+        lon1: Longitude of the first point
+        lat2: Latitude of the second point
+        lon2: Longitude of the second point
+
+    Returns:
+        Distance in kilometers
+    """
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    a = math.sin((phi2 - phi1) / 2) ** 2 + \
+        math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def split_bbox(bbox: Tuple[float, float, float, float]) -> List[Tuple[float, float, float, float]]:
+    """
+    Split a bounding box into four equally sized quadrants
+
+    Args:
+        bbox: Bounding box (south, west, north, east)
+
+    Returns:
+        List of four quadrant bounding boxes (SW, SE, NW, NE)
+    """
+    s, w, n, e = bbox
+    mid_lat = (s + n) / 2
+    mid_lon = (w + e) / 2
+    return [
+        (s, w, mid_lat, mid_lon),
+        (s, mid_lon, mid_lat, e),
+        (mid_lat, w, n, mid_lon),
+        (mid_lat, mid_lon, n, e),
+    ]
+
+
+def tile_bbox(bbox: Tuple[float, float, float, float],
+              max_tile_size: float) -> List[Tuple[float, float, float, float]]:
+    """
+    Divide a bounding box into a grid of equally sized tiles
+
+    Args:
+        bbox: Bounding box (south, west, north, east)
+        max_tile_size: Maximum tile edge length in degrees
+
+    Returns:
+        List of tile bounding boxes covering the input bbox
+    """
+    s, w, n, e = bbox
+    # Small tolerance so float noise does not add an extra row or column
+    rows = max(1, math.ceil((n - s) / max_tile_size - 1e-9))
+    cols = max(1, math.ceil((e - w) / max_tile_size - 1e-9))
+    lat_step = (n - s) / rows
+    lon_step = (e - w) / cols
+
+    tiles = []
+    for row in range(rows):
+        for col in range(cols):
+            tiles.append((
+                s + row * lat_step,
+                w + col * lon_step,
+                n if row == rows - 1 else s + (row + 1) * lat_step,
+                e if col == cols - 1 else w + (col + 1) * lon_step,
+            ))
+    return tiles
 
 
 def generate_filename(location: str, radius: float, poi_types: List[str], format_ext: str) -> str:
@@ -64,18 +154,46 @@ def parse_column_mapping(mapping_str: str) -> Dict[str, str]:
     return mapping
 
 
-def clean_poi_data(data: List[Dict]) -> List[Dict]:
+def is_in_area(lat: float, lon: float,
+               bbox: Optional[Tuple[float, float, float, float]] = None,
+               center: Optional[Tuple[float, float]] = None,
+               radius_km: Optional[float] = None) -> bool:
     """
-    Clean POI data by removing id and type fields
+    Check whether a point lies inside the area of a harvest
 
     Args:
-        data: List of POI dictionaries from Overpass API
+        lat: Latitude of the point
+        lon: Longitude of the point
+        bbox: Bounding box (south, west, north, east) the point must lie in
+        center: Center point (lat, lon) of a radius filter
+        radius_km: Maximum distance from center
 
     Returns:
-        Cleaned data without id and type fields
+        True if the point passes the bbox and radius filters
+    """
+    # Ways and relations intersecting the bbox may have their center outside of it
+    if bbox is not None and not (bbox[0] <= lat <= bbox[2] and bbox[1] <= lon <= bbox[3]):
+        return False
+
+    return center is None or radius_km is None or haversine_km(center[0], center[1], lat, lon) <= radius_km
+
+
+def iter_clean_poi_data(data: Iterable[Dict],
+                        bbox: Optional[Tuple[float, float, float, float]] = None,
+                        center: Optional[Tuple[float, float]] = None,
+                        radius_km: Optional[float] = None) -> Iterator[Dict]:
     """
-    cleaned_data = []
+    Lazily clean POI data by removing id and type fields
 
+    Args:
+        data: Iterable of POI dictionaries from Overpass API
+        bbox: Drop POIs whose point lies outside this bounding box (south, west, north, east)
+        center: Center point (lat, lon) of a radius filter
+        radius_km: Drop POIs farther than this from center
+
+    Yields:
+        Cleaned POI dictionaries without id and type fields
+    """
     for item in data:
         # Create a copy without id and type fields
         cleaned_item = {}
@@ -93,7 +211,41 @@ def clean_poi_data(data: List[Dict]) -> List[Dict]:
             cleaned_item['tags'] = item['tags']
 
         # Skip items without coordinates
-        if cleaned_item.get('lat') is not None and cleaned_item.get('lon') is not None:
-            cleaned_data.append(cleaned_item)
+        lat = cleaned_item.get('lat')
+        lon = cleaned_item.get('lon')
+        if lat is None or lon is None:
+            continue
+
+        if not is_in_area(lat, lon, bbox, center, radius_km):
+            continue
+
+        yield cleaned_item
+
+
+def clean_poi_data(data: List[Dict]) -> List[Dict]:
+    """
+    Clean POI data by removing id and type fields
+
+    Args:
+        data: List of POI dictionaries from Overpass API
+
+    Returns:
+        Cleaned data without id and type fields
+    """
+    return list(iter_clean_poi_data(data))
+
+
+class CountingIterator:
+    """Iterator wrapper that counts the items passed through it"""
+
+    def __init__(self, items: Iterable):
+        self._items = iter(items)
+        self.count = 0
+
+    def __iter__(self) -> "CountingIterator":
+        return self
 
-    return cleaned_data
\ No newline at end of file
+    def __next__(self):
+        item = next(self._items)
+        self.count += 1
+        return item
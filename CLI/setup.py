@@ -12,6 +12,12 @@ setup(
     install_requires=[
         'requests>=2.0.0',
     ],
+    extras_require={
+        'parquet': ['pyarrow>=10.0.0'],
+        'numpy': ['numpy>=1.20'],
+        'yaml': ['PyYAML>=5.1'],
+        'zstd': ['zstandard>=0.18'],
+    },
     entry_points={
         'console_scripts': [
             'poi-harvester=poi_harvester.main_cli:main',
@@ -0,0 +1,146 @@
+import math
+
+# Clusters are merged within this distance in screen pixels
+CLUSTER_RADIUS = 60
+TILE_SIZE = 256
+# Above this zoom level every POI gets its own marker
+MAX_CLUSTER_ZOOM = 16
+# Interval in ms in which the map viewport is checked for changes
+VIEWPORT_POLL_INTERVAL = 150
+
+def project(lat, lon):
+    # Web Mercator world coordinates in [0, 1], the same projection the map tiles use
+    lat = max(-85.05112878, min(85.05112878, lat))
+    x = (lon + 180.0) / 360.0
+    sin_lat = math.sin(math.radians(lat))
+    y = 0.5 - math.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)
+    return x, y
+
+def unproject(x, y):
+    lon = x * 360.0 - 180.0
+    lat = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y))))
+    return lat, lon
+
+class ClusterIndex:
+    # Grid clusters for every zoom level, each level built by merging the clusters of the level above.
+    # A cluster is (x, y, count, point index or -1); every level keeps a dict from grid cell to its
+    # clusters, so a viewport query only looks at the few cells visible on screen.
+
+    def __init__(self, points, radius=CLUSTER_RADIUS, max_zoom=MAX_CLUSTER_ZOOM):
+        self.points = points
+        self.radius = radius
+        self.max_zoom = max_zoom
+        self.levels = {}
+
+        clusters = []
+        for i, (lat, lon, _) in enumerate(points):
+            x, y = project(lat, lon)
+            clusters.append((x, y, 1, i))
+        self.levels[max_zoom + 1] = self._index(clusters, max_zoom + 1)
+
+        for zoom in range(max_zoom, -1, -1):
+            cell = self._cell_size(zoom)
+            merged = {}
+            for x, y, count, index in clusters:
+                key = (int(x / cell), int(y / cell))
+                current = merged.get(key)
+                if current is None:
+                    merged[key] = (x * count, y * count, count, index)
+                else:
+                    merged[key] = (current[0] + x * count, current[1] + y * count, current[2] + count, -1)
+            clusters = [(sx / count, sy / count, count, index) for sx, sy, count, index in merged.values()]
+            self.levels[zoom] = self._index(clusters, zoom)
+
+    def _cell_size(self, zoom):
+        return self.radius / (TILE_SIZE * 2 ** zoom)
+
+    def _index(self, clusters, zoom):
+        cell = self._cell_size(zoom)
+        grid = {}
+        for cluster in clusters:
+            grid.setdefault((int(cluster[0] / cell), int(cluster[1] / cell)), []).append(cluster)
+        return grid
+
+    def get_clusters(self, zoom, x0, y0, x1, y1):
+        # Clusters and single points inside the viewport given in world coordinates
+        level = min(max(int(zoom), 0), self.max_zoom + 1)
+        grid = self.levels[level]
+        cell = self._cell_size(level)
+        result = []
+        for cx in range(int(x0 / cell), int(x1 / cell) + 1):
+            for cy in range(int(y0 / cell), int(y1 / cell) + 1):
+                for cluster in grid.get((cx, cy), ()):
+                    if x0 <= cluster[0] <= x1 and y0 <= cluster[1] <= y1:
+                        result.append((level, cluster))
+        return result
+
+class MarkerLayer:
+    # Shows the clusters of a ClusterIndex on a TkinterMapView. Only markers inside the viewport
+    # exist, and on pan or zoom only the markers that appear or disappear are created or deleted.
+
+    def __init__(self, map_widget):
+        self.map = map_widget
+        self.index = None
+        self.markers = {}
+        self.viewport = None
+        self.map.after(VIEWPORT_POLL_INTERVAL, self._poll)
+
+    def set_points(self, points):
+        # points: list of (lat, lon, text)
+        self.clear()
+        self.index = ClusterIndex(points)
+        self.refresh()
+
+    def clear(self):
+        for marker in self.markers.values():
+            marker.delete()
+        self.markers = {}
+        self.index = None
+        self.viewport = None
+
+    def _get_viewport(self):
+        zoom = round(self.map.zoom)
+        scale = 2 ** zoom
+        (x0, y0), (x1, y1) = self.map.upper_left_tile_pos, self.map.lower_right_tile_pos
+        return zoom, x0 / scale, y0 / scale, x1 / scale, y1 / scale
+
+    def _poll(self):
+        if self.index is not None and self._get_viewport() != self.viewport:
+            self.refresh()
+        self.map.after(VIEWPORT_POLL_INTERVAL, self._poll)
+
+    def refresh(self):
+        if self.index is None:
+            return
+        self.viewport = self._get_viewport()
+        zoom, x0, y0, x1, y1 = self.viewport
+
+        # Keep a margin of half a screen, so small pans do not create markers at the edge
+        margin_x = (x1 - x0) / 2
+        margin_y = (y1 - y0) / 2
+        visible = {}
+        for level, cluster in self.index.get_clusters(zoom, x0 - margin_x, y0 - margin_y,
+                                                      x1 + margin_x, y1 + margin_y):
+            visible[(level, cluster[0], cluster[1])] = cluster
+
+        for key in [key for key in self.markers if key not in visible]:
+            self.markers.pop(key).delete()
+
+        for key, (x, y, count, index) in visible.items():
+            if key in self.markers:
+                continue
+            if count == 1:
+                lat, lon, text = self.index.points[index]
+                self.markers[key] = self.map.set_marker(lat, lon, text=text)
+            else:
+                lat, lon = unproject(x, y)
+                self.markers[key] = self.map.set_marker(
+                    lat, lon, text=str(count),
+                    marker_color_circle="#1F4E79", marker_color_outside="#2E86C1",
+                    command=lambda marker, zoom=zoom: self._zoom_to(marker, zoom)
+                )
+
+    def _zoom_to(self, marker, zoom):
+        # Clicking a cluster zooms in until it splits up
+        self.map.set_position(*marker.position)
+        self.map.set_zoom(zoom + 2)
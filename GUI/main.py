@@ -1,14 +1,27 @@
 import customtkinter as ctk
+import tkinter.filedialog
 from tkintermapview import TkinterMapView
-import requests
-from geocoding import geocode_location
-from utils import get_bbox
-from export import export_csv
-from export_sql import export_sql_file
-from poi_types import poi_display_mapping
+from clustering import MarkerLayer
+from virtual_list import VirtualCheckList
+from selection import SelectionModel
+from poi_harvester.geocoding import geocode_location
+from poi_harvester.utils import get_bbox, generate_filename, iter_clean_poi_data, is_in_area
+from poi_harvester.planner import CoveragePlanner
+from poi_harvester.export import export_csv, export_sql
+from poi_harvester.poi_types import POI_DISPLAY_MAPPING
+from poi_harvester.main_cli import add_runtime_arguments, configure_runtime
+from concurrent.futures import ThreadPoolExecutor
+import argparse
 import sys
 import os
 
+# Interval in ms in which finished background tasks are picked up
+POLL_INTERVAL = 100
+# The GUI lists the tags of nodes, ways and relations
+OSM_TYPES = ["node", "way", "relation"]
+# Seconds a fetched area is reused by overlapping fetches
+MEMORY_TTL = 300
+
 ctk.set_appearance_mode("System")
 ctk.set_default_color_theme("blue")
 
@@ -16,6 +29,19 @@ def resource_path(relative_path):
     base_path = getattr(sys, '_MEIPASS', os.path.abspath("."))
     return os.path.join(base_path, relative_path)
 
+def configure_core():
+    # Same rate limit, endpoint, retry, cache and compression options as the CLI, e.g. --endpoint URL
+    parser = argparse.ArgumentParser(description="POI-Harvester GUI")
+    add_runtime_arguments(parser)
+    configure_runtime(parser.parse_known_args()[0])
+
+def in_fetch_area(el, area):
+    lat, lon = SelectionModel.coordinates(el)
+    return lat is not None and lon is not None and is_in_area(lat, lon, *area[:3])
+
+def poi_label(poi_type):
+    return poi_type.replace("-", " ").title()
+
 class POIDataMiner(ctk.CTk):
     def __init__(self):
         super().__init__()
@@ -41,6 +67,11 @@ class POIDataMiner(ctk.CTk):
         self.map.pack(fill="both", expand=True)
         self.map.set_position(50.15, 9.1)
         self.map.set_zoom(10)
+        self.marker_layer = MarkerLayer(self.map)
+        # Two right clicks on the map span a rectangle whose POIs are selected
+        self.map.add_right_click_menu_command("Selection corner", self.add_selection_corner, pass_coords=True)
+        self.selection_corner = None
+        self.selection_polygon = None
 
         # Location + Radius
         ctk.CTkLabel(self.left_panel, text="City or postal code and area").pack(pady=(10, 5))
@@ -64,8 +95,16 @@ class POIDataMiner(ctk.CTk):
         self.north.grid(row=1, column=0, padx=5, pady=5)
         self.east.grid(row=1, column=1, padx=5, pady=5)
 
-        self.query_btn = ctk.CTkButton(self.left_panel, text="Fetch data", command=self.fetch_data)
-        self.query_btn.pack(pady=10)
+        self.fetch_frame = ctk.CTkFrame(self.left_panel, fg_color="transparent")
+        self.fetch_frame.pack(pady=10)
+        self.query_btn = ctk.CTkButton(self.fetch_frame, text="Fetch data", command=self.fetch_data)
+        self.query_btn.grid(row=0, column=0, padx=5)
+        self.cancel_btn = ctk.CTkButton(self.fetch_frame, text="Cancel", command=self.cancel_fetch, state="disabled")
+        self.cancel_btn.grid(row=0, column=1, padx=5)
+
+        self.progress = ctk.CTkProgressBar(self.left_panel, mode="indeterminate", width=300)
+        self.progress.set(0)
+        self.progress.pack(pady=(0, 5))
 
         self.status = ctk.CTkLabel(self.left_panel, text="Ready", wraplength=380)
         self.status.pack(pady=5)
@@ -74,45 +113,45 @@ class POIDataMiner(ctk.CTk):
         self.toggle_tags_btn = ctk.CTkButton(self.left_panel, text="Toggle all tags", command=self.toggle_all_tags)
         self.toggle_tags_btn.pack(pady=(5, 0))
 
-        self.tag_box = ctk.CTkScrollableFrame(self.left_panel, width=420, height=300)
-        self.tag_box.pack(pady=5)
-        self.tag_vars = {}
+        self.tag_list = VirtualCheckList(self.left_panel, width=420, height=300, placeholder="Search keys",
+                                         command=self.on_tags_changed)
+        self.tag_list.pack(pady=5)
+        self.tag_keys = []
 
         # Right Panel POI options
         ctk.CTkLabel(self.right_panel, text="Select POI types").pack(pady=(10, 5))
         self.type_box = ctk.CTkScrollableFrame(self.right_panel, width=280, height=350)
         self.type_box.pack(fill="both", padx=5)
-        self.poi_display_mapping = poi_display_mapping
         self.poi_vars = {}
 
-        # Gruppierte POI-Checkboxen mit Überschriften
+        # Same POI types as the CLI, grouped by their first tag key
         grouped_pois = {
-            "Amenities": {},
-            "Leisure": {},
-            "Shops": {},
-            "Other": {}
+            "Amenities": [],
+            "Leisure": [],
+            "Shops": [],
+            "Other": []
         }
 
-        for label, tags in self.poi_display_mapping.items():
+        for poi_type, tags in POI_DISPLAY_MAPPING.items():
             key = tags[0][0] if tags else ""
             if key == "amenity":
-                grouped_pois["Amenities"][label] = tags
+                grouped_pois["Amenities"].append(poi_type)
             elif key == "leisure":
-                grouped_pois["Leisure"][label] = tags
+                grouped_pois["Leisure"].append(poi_type)
             elif key == "shop":
-                grouped_pois["Shops"][label] = tags
+                grouped_pois["Shops"].append(poi_type)
             else:
-                grouped_pois["Other"][label] = tags
+                grouped_pois["Other"].append(poi_type)
 
-        for category, items in grouped_pois.items():
-            if items:
+        for category, poi_types in grouped_pois.items():
+            if poi_types:
                 ctk.CTkLabel(self.type_box, text=category, font=ctk.CTkFont(weight="bold")).pack(anchor="w", padx=10,
                                                                                                  pady=(10, 2))
-                for label in sorted(items):
+                for poi_type in sorted(poi_types, key=poi_label):
                     var = ctk.BooleanVar(value=False)
-                    cb = ctk.CTkCheckBox(self.type_box, text=label, variable=var)
+                    cb = ctk.CTkCheckBox(self.type_box, text=poi_label(poi_type), variable=var)
                     cb.pack(anchor="w", padx=20)
-                    self.poi_vars[label] = var
+                    self.poi_vars[poi_type] = var
 
         export_frame = ctk.CTkFrame(self.right_panel)
         export_frame.pack(pady=10)
@@ -140,6 +179,16 @@ class POIDataMiner(ctk.CTk):
         self.export_sql_file_btn.pack_forget()
 
         self.data = []
+        self.selection = SelectionModel([])
+
+        # Fetches and exports run in worker threads, the Tk main loop only polls for their results
+        self.executor = ThreadPoolExecutor(max_workers=4)
+        self.tasks = []
+        self.latest_query = 0
+        # Areas fetched within the last minutes are reused when a new fetch overlaps them
+        self.planner = CoveragePlanner(ttl=MEMORY_TTL)
+        self.fetch_area = None
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
 
     def fetch_data(self):
         location = self.location_entry.get().strip()
@@ -155,79 +204,117 @@ class POIDataMiner(ctk.CTk):
             use_coordinates = False
 
         if use_coordinates:
-            pass  # s, w, n, e sind schon gesetzt
+            radius = None
         elif location and radius_str:
             try:
-                lat, lon = geocode_location(location)
                 radius = float(radius_str)
-                s, w, n, e = get_bbox(lat, lon, radius)
-            except Exception:
+            except ValueError:
                 self.status.configure(text="❌ Error in geocoding or radius")
                 return
+            s = w = n = e = None
         else:
             self.status.configure(text="❌ Please provide either valid coordinates or location + radius")
             return
 
-        self.status.configure(text="🔎 Query running...")
-        self.update_idletasks()
-
-        self.map.delete_all_polygon()
-        self.map.delete_all_marker()
-        # Pass bounding box points in (north, west), (south, east) order for fit_bounding_box
-        self.map.fit_bounding_box((n, w), (s, e))
-        self.map.set_polygon([(n, w), (n, e), (s, e), (s, w)], outline_color="red", border_width=3)
-
-        query_parts = []
-        for label, var in self.poi_vars.items():
-            if var.get():
-                for key, value in self.poi_display_mapping[label]:
-                    for typ in ["node", "way", "relation"]:
-                        query_parts.append(f'{typ}["{key}"="{value}"]({s},{w},{n},{e});')
-
-        if not query_parts:
+        poi_types = [poi_type for poi_type, var in self.poi_vars.items() if var.get()]
+        if not poi_types:
             self.status.configure(text="⚠️ No POI types selected.")
             return
 
-        query_body = "\n  ".join(query_parts)
-        query = f"""
-[out:json][timeout:25];
-(
-  {query_body}
-);
-out center;
-"""
+        # Earlier queries keep running, but only the latest one is shown
+        self.latest_query += 1
+        self.run_in_background(
+            lambda *result, query_id=self.latest_query: self.on_fetch_done(query_id, *result),
+            self.run_fetch, location, radius, (s, w, n, e), poi_types
+        )
+
+        self.status.configure(text="🔎 Query running...")
+        self.cancel_btn.configure(state="normal")
+        self.progress.start()
+
+    def run_fetch(self, location, radius, bbox, poi_types):
+        # Runs in a worker thread and must not touch any widget.
+        # The area is (bbox, center, radius, location for file names), like in the CLI
+        if radius is not None:
+            center = geocode_location(location)
+            if center is None:
+                return "❌ Error in geocoding or radius", None, None
+            area = (get_bbox(center[0], center[1], radius), center, radius, location)
+        else:
+            area = (bbox, None, None, "-".join(str(value) for value in bbox))
 
         try:
-            response = requests.post("https://overpass-api.de/api/interpreter", data={"data": query})
-            response.raise_for_status()
-            self.data = response.json().get("elements", [])
+            # Shared CLI engine: endpoint failover, retries, response cache and tiling of large areas
+            data = self.planner.fetch(area[0], poi_types, OSM_TYPES)
+            # Drop what an export would drop (e.g. the bbox corners outside the radius),
+            # so the list, map and selection hold exactly the POIs that can be exported
+            return None, area, [el for el in data if in_fetch_area(el, area)]
         except Exception:
-            self.status.configure(text="❌ Overpass query failed")
+            return "❌ Overpass query failed", None, None
+
+    def run_in_background(self, callback, function, *args):
+        # callback is called on the Tk main loop with the result tuple of function
+        self.tasks.append((self.executor.submit(function, *args), callback))
+        if len(self.tasks) == 1:
+            self.after(POLL_INTERVAL, self.poll_tasks)
+
+    def poll_tasks(self):
+        for task in [task for task in self.tasks if task[0].done()]:
+            self.tasks.remove(task)
+            future, callback = task
+            callback(*future.result())
+
+        if self.tasks:
+            self.after(POLL_INTERVAL, self.poll_tasks)
+
+    def on_fetch_done(self, query_id, error, area, data):
+        if query_id != self.latest_query:
             return
+        self.progress.stop()
+        self.progress.set(0)
+        self.cancel_btn.configure(state="disabled")
+        if error:
+            self.status.configure(text=error)
+            return
+        # Exports clean the results with the area they were fetched for
+        self.fetch_area = area
+        self.show_results(area[0], data)
+
+    def cancel_fetch(self):
+        # A running request cannot be interrupted, its result is dropped when it arrives
+        self.latest_query += 1
+        self.progress.stop()
+        self.progress.set(0)
+        self.cancel_btn.configure(state="disabled")
+        self.status.configure(text="Query cancelled")
+
+    def on_close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.destroy()
+
+    def show_results(self, bbox, data):
+        s, w, n, e = bbox
+        self.map.delete_all_polygon()
+        self.marker_layer.clear()
+        # Pass bounding box points in (north, west), (south, east) order for fit_bounding_box
+        self.map.fit_bounding_box((n, w), (s, e))
+        self.map.set_polygon([(n, w), (n, e), (s, e), (s, w)], outline_color="red", border_width=3)
 
+        self.data = data
         if not self.data:
             self.status.configure(text="⚠️ No entries found.")
             return
 
+        # Markers are clustered and only created for the visible part of the map
+        points = []
         for el in self.data:
-            lat = el.get("lat") or el.get("center", {}).get("lat")
-            lon = el.get("lon") or el.get("center", {}).get("lon")
-            name = el.get("tags", {}).get("name", "POI")
-            if lat and lon:
-                self.map.set_marker(lat, lon, text=name)
-
-        all_keys = set()
+            lat, lon = SelectionModel.coordinates(el)
+            points.append((lat, lon, el.get("tags", {}).get("name", "POI")))
+        self.marker_layer.set_points(points)
 
-        # Clear existing tag checkboxes
-        all_keys = sorted({key for el in self.data for key in el.get('tags', {}).keys()})
-        for widget in self.tag_box.winfo_children():
-            widget.destroy()
-        self.tag_vars = {}
-        for i, key in enumerate(sorted(all_keys)):
-            var = ctk.BooleanVar(value=True)
-            cb = ctk.CTkCheckBox(self.tag_box, text=key, variable=var)
-            cb.grid(row=i // 2, column=i % 2, sticky="w", padx=5, pady=2)
-            self.tag_vars[key] = var
+        # The lists only draw their visible rows, so filling them costs the same for any number of results
+        self.tag_keys = sorted({key for el in self.data for key in el.get('tags', {}).keys()})
+        self.tag_list.set_items(self.tag_keys)
 
         if self.sql_options_visible:
             self.update_sql_mapping_fields()
@@ -242,31 +329,86 @@ out center;
         #self.coord_frame.pack_forget()
 
         # Ergebnis-Checkboxen anzeigen
-        if not hasattr(self, 'result_frame'):
-            self.result_frame = ctk.CTkScrollableFrame(self.left_panel, width=420, height=300)
-            self.result_frame.pack(pady=10)
-        else:
-            for widget in self.result_frame.winfo_children():
-                widget.destroy()
-            self.result_frame.pack(pady=10)
-
-        self.result_vars = {}
+        if not hasattr(self, 'result_list'):
+            self.result_list = VirtualCheckList(self.left_panel, width=420, height=300,
+                                                placeholder="Search names and tags")
+            self.build_selection_controls()
+        self.result_list.pack(pady=10)
+        self.selection_frame.pack(pady=(0, 10))
+
+        labels = []
+        search_texts = []
         for i, el in enumerate(self.data):
-            name = el.get("tags", {}).get("name", f"POI {i + 1}")
-            var = ctk.BooleanVar(value=True)
-            cb = ctk.CTkCheckBox(self.result_frame, text=name, variable=var)
-            cb.pack(anchor="w", padx=10, pady=2)
-            self.result_vars[name] = var
+            tags = el.get("tags", {})
+            labels.append(tags.get("name", f"POI {i + 1}"))
+            # Matches names as well as tags written as key=value
+            search_texts.append(" ".join([labels[-1]] + [f"{key}={value}" for key, value in tags.items()]))
+        # The list shows and edits the bits of the selection model directly
+        self.selection = SelectionModel(self.data)
+        self.result_list.set_items(labels, search_texts, selection=self.selection.bits)
+
+    def build_selection_controls(self):
+        self.selection_frame = ctk.CTkFrame(self.left_panel)
+        # Bulk operations apply to the POIs matching the search of the result list
+        for column, (text, command) in enumerate((
+                ("All", lambda: self.selection.select_all(True, self.result_list.visible)),
+                ("None", lambda: self.selection.select_all(False, self.result_list.visible)),
+                ("Invert", lambda: self.selection.invert(self.result_list.visible)))):
+            button = ctk.CTkButton(self.selection_frame, text=text, width=80,
+                                   command=lambda command=command: self.apply_selection(command))
+            button.grid(row=0, column=column, padx=5, pady=5)
+
+        self.selection_tag_entry = ctk.CTkEntry(self.selection_frame, placeholder_text="key or key=value")
+        self.selection_tag_entry.grid(row=1, column=0, columnspan=2, padx=5, pady=5, sticky="we")
+        ctk.CTkButton(self.selection_frame, text="Select tag", width=80,
+                      command=self.select_by_tag).grid(row=1, column=2, padx=5, pady=5)
+
+    def apply_selection(self, operation):
+        operation()
+        self.result_list.redraw()
+
+    def select_by_tag(self):
+        key, _, value = self.selection_tag_entry.get().strip().partition("=")
+        if not key:
+            return
+        changed = self.selection.select_by_tag(key.strip(), value.strip() or None)
+        self.result_list.redraw()
+        self.status.configure(text=f"✅ {changed} entries with '{self.selection_tag_entry.get().strip()}' selected")
+
+    def add_selection_corner(self, coords):
+        if self.selection_corner is None:
+            self.selection_corner = coords
+            self.status.configure(text="Right click the opposite corner of the selection")
+            return
 
-    def toggle_all_tags(self):
-        if not self.tag_vars:
+        (lat1, lon1), (lat2, lon2) = self.selection_corner, coords
+        self.selection_corner = None
+        s, n = min(lat1, lat2), max(lat1, lat2)
+        w, e = min(lon1, lon2), max(lon1, lon2)
+
+        if self.selection_polygon is not None:
+            self.selection_polygon.delete()
+        self.selection_polygon = self.map.set_polygon([(n, w), (n, e), (s, e), (s, w)],
+                                                      outline_color="blue", border_width=2)
+        if not hasattr(self, 'result_list'):
             return
-        all_selected = all(var.get() for var in self.tag_vars.values())
-        for var in self.tag_vars.values():
-            var.set(not all_selected)
+
+        selected = self.selection.select_in_region(s, w, n, e)
+        self.result_list.redraw()
+        self.status.configure(text=f"✅ {selected} entries in the marked area selected")
+
+    def get_selected_keys(self):
+        return [self.tag_keys[i] for i in self.tag_list.selected_indices()]
+
+    def on_tags_changed(self):
         if self.sql_options_visible:
             self.update_sql_mapping_fields()
 
+    def toggle_all_tags(self):
+        if not self.tag_keys:
+            return
+        self.tag_list.toggle_all()
+
     def toggle_sql_options(self):
         self.sql_options_visible = not self.sql_options_visible
         if self.sql_options_visible:
@@ -285,51 +427,56 @@ out center;
         for widget in self.sql_mapping_box.winfo_children():
             widget.destroy()
         self.sql_column_map = {}
-        for i, (key, var) in enumerate(self.tag_vars.items()):
-            if var.get():
-                label = ctk.CTkLabel(self.sql_mapping_box, text=key)
-                label.grid(row=i, column=0, padx=5, pady=2, sticky="w")
-                entry = ctk.CTkEntry(self.sql_mapping_box, placeholder_text=f"Column name for '{key}'")
-                entry.grid(row=i, column=1, padx=5, pady=2)
-                self.sql_column_map[key] = entry
-
-    def get_selected_entries(self):
-        selected = []
-        for el in self.data:
-            name = el.get("tags", {}).get("name", "POI")
-            # Fallback für POIs ohne Namen (gleicher Name wie Checkbox)
-            checkbox_name = name if name in self.result_vars else f"POI {self.data.index(el) + 1}"
-            if self.result_vars.get(checkbox_name, ctk.BooleanVar(value=False)).get():
-                selected.append(el)
-        return selected
+        for i, key in enumerate(self.get_selected_keys()):
+            label = ctk.CTkLabel(self.sql_mapping_box, text=key)
+            label.grid(row=i, column=0, padx=5, pady=2, sticky="w")
+            entry = ctk.CTkEntry(self.sql_mapping_box, placeholder_text=f"Column name for '{key}'")
+            entry.grid(row=i, column=1, padx=5, pady=2)
+            self.sql_column_map[key] = entry
+
+    def ask_export_path(self, extension, filetypes, title):
+        poi_types = [poi_type for poi_type, var in self.poi_vars.items() if var.get()]
+        _, _, radius, location = self.fetch_area
+        return tkinter.filedialog.asksaveasfilename(
+            defaultextension=f".{extension}",
+            filetypes=filetypes,
+            initialfile=generate_filename(location, radius or 0, poi_types, extension),
+            title=title
+        )
+
+    def export_in_background(self, export_function, keys, filepath, *args):
+        # The selection is copied here, cleaning and streaming it into the file happens in a worker thread
+        bbox, center, radius, _ = self.fetch_area
+        data = iter_clean_poi_data(list(self.selection.iter_selected()), bbox, center, radius)
+        self.status.configure(text="💾 Exporting...")
+        self.run_in_background(self.on_export_done,
+                               lambda: (export_function(data, keys, filepath, *args), filepath))
+
+    def on_export_done(self, success, filepath):
+        if success:
+            self.status.configure(text=f"✅ Saved as '{os.path.basename(filepath)}'")
+        else:
+            self.status.configure(text="❌ Error during export")
 
     def export_csv(self):
-        selected_data = self.get_selected_entries()
-        location = self.location_entry.get()
-        radius = self.radius_entry.get()
-        export_csv(
-            data=selected_data,
-            tag_vars=self.tag_vars,
-            location=location,
-            radius=radius,
-            type_options=self.poi_vars,
-            status_label=self.status
-        )
+        filepath = self.ask_export_path("csv", [("CSV files", "*.csv")], "Save POI data as CSV")
+        if not filepath:
+            self.status.configure(text="⚠️ Export cancelled")
+            return
+        self.export_in_background(export_csv, self.get_selected_keys(), filepath)
 
     def export_sql_file(self):
-        selected_data = self.get_selected_entries()
-        table_name = self.table_name_entry.get().strip()
-        export_sql_file(
-            data=selected_data,
-            tag_vars=self.tag_vars,
-            column_map=self.sql_column_map,
-            table_name=table_name,
-            status_label=self.status,
-            location=self.location_entry.get(),
-            radius=self.radius_entry.get(),
-            type_options=self.poi_vars
-        )
+        filepath = self.ask_export_path("sql", [("SQL Script", "*.sql")], "Save SQL script")
+        if not filepath:
+            self.status.configure(text="⚠️ SQL file export cancelled")
+            return
+        keys = self.get_selected_keys()
+        column_map = {key: self.sql_column_map[key].get().strip() or key
+                      for key in keys if key in self.sql_column_map}
+        table_name = self.table_name_entry.get().strip() or "poi_data"
+        self.export_in_background(export_sql, keys, filepath, table_name, column_map)
 
 if __name__ == "__main__":
+    configure_core()
     app = POIDataMiner()
     app.mainloop()
@@ -1,31 +0,0 @@
-poi_display_mapping = {
-
-    #AMENITY – Public facilities and services useful for daily life
-    "Drinking Water": [("amenity", "drinking_water")],
-    "Hospital": [("amenity", "hospital")],
-    "School": [("amenity", "school")],
-    "Library": [("amenity", "library")],
-    "Pharmacy": [("amenity", "pharmacy")],
-    "Restaurant": [("amenity", "restaurant")],
-    "Cafe": [("amenity", "cafe")],
-    "Toilets": [("amenity", "toilets")],
-    "Bench": [("amenity", "bench")],
-    "Graveyard": [("amenity", "grave_yard")],
-
-    #LEISURE – Recreational and entertainment facilities
-    "Fitness Centre": [("leisure", "fitness_centre")],
-    "Park": [("leisure", "park")],
-    "Playground": [("leisure", "playground")],
-    "Swimming Pool": [("leisure", "swimming_pool")],
-    "Dog Park": [("leisure", "dog_park")],
-    "Stadium": [("leisure", "stadium")],
-
-    #SHOP – Retail stores and commercial outlets
-    "Supermarket": [("shop", "supermarket")],
-    "Bakery": [("shop", "bakery")],
-    "Hairdresser": [("shop", "hairdresser")],
-    "Clothes Store": [("shop", "clothes")],
-    "Electronics Store": [("shop", "electronics")],
-    "Bookstore": [("shop", "books")],
-
-}
\ No newline at end of file
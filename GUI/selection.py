@@ -0,0 +1,79 @@
+# Byte translation table flipping 0 and 1
+INVERT_TABLE = bytes([1, 0]) + bytes(254)
+
+class SelectionModel:
+    # Selection state of fetched elements keyed by their OSM (type, id), stored as one byte per element.
+    # Lookups by key are O(1) and bulk operations touch the bytearray only, never a widget.
+
+    def __init__(self, elements):
+        self.elements = elements
+        self.positions = {}
+        for i, el in enumerate(elements):
+            # Elements without an id still get a key of their own
+            self.positions.setdefault(self.key_of(el, i), i)
+        self.bits = bytearray([1]) * len(elements)
+
+    @staticmethod
+    def key_of(el, index=None):
+        if el.get("id") is None:
+            return "index", index
+        return el.get("type"), el["id"]
+
+    def __len__(self):
+        return len(self.elements)
+
+    def count(self):
+        return sum(self.bits)
+
+    def is_selected(self, key):
+        return bool(self.bits[self.positions[key]])
+
+    def set(self, key, selected=True):
+        self.bits[self.positions[key]] = 1 if selected else 0
+
+    def toggle(self, key):
+        self.bits[self.positions[key]] ^= 1
+
+    def select_all(self, selected=True, indices=None):
+        if indices is None:
+            self.bits[:] = bytearray([1 if selected else 0]) * len(self.bits)
+        else:
+            for i in indices:
+                self.bits[i] = 1 if selected else 0
+
+    def invert(self, indices=None):
+        if indices is None:
+            self.bits[:] = self.bits.translate(INVERT_TABLE)
+        else:
+            for i in indices:
+                self.bits[i] ^= 1
+
+    def select_by_tag(self, key, value=None, selected=True):
+        # Elements carrying the tag (with the given value, if any) are (de)selected, others stay as they are
+        changed = 0
+        for i, el in enumerate(self.elements):
+            tags = el.get("tags", {})
+            if key in tags and (value is None or tags[key] == value):
+                self.bits[i] = 1 if selected else 0
+                changed += 1
+        return changed
+
+    def select_in_region(self, south, west, north, east):
+        # Selects exactly the elements inside the region
+        for i, el in enumerate(self.elements):
+            lat, lon = self.coordinates(el)
+            inside = lat is not None and lon is not None and south <= lat <= north and west <= lon <= east
+            self.bits[i] = 1 if inside else 0
+        return self.count()
+
+    @staticmethod
+    def coordinates(el):
+        if "lat" in el and "lon" in el:
+            return el["lat"], el["lon"]
+        center = el.get("center", {})
+        return center.get("lat"), center.get("lon")
+
+    def iter_selected(self):
+        for el, selected in zip(self.elements, self.bits):
+            if selected:
+                yield el
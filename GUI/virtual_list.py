@@ -0,0 +1,118 @@
+import tkinter
+import customtkinter as ctk
+
+ROW_HEIGHT = 24
+BOX_SIZE = 14
+
+class VirtualCheckList(ctk.CTkFrame):
+    # Checkbox list drawn on a canvas: only the rows on screen are drawn, whatever the number of items.
+    # The checked state lives in a bytearray with one byte per item instead of one BooleanVar each.
+
+    def __init__(self, master, width=420, height=300, placeholder="Search", command=None):
+        super().__init__(master)
+        self.command = command
+        self.labels = []
+        self.search_texts = []
+        self.selection = bytearray()
+        # Item indices matching the search, in display order
+        self.visible = []
+        self.first_row = 0
+
+        self.search_entry = ctk.CTkEntry(self, placeholder_text=placeholder, width=width)
+        self.search_entry.pack(padx=5, pady=(5, 0))
+        self.search_entry.bind("<KeyRelease>", lambda event: self.apply_filter())
+
+        self.count_label = ctk.CTkLabel(self, text="")
+        self.count_label.pack(padx=5, anchor="w")
+
+        body = ctk.CTkFrame(self, fg_color="transparent")
+        body.pack(fill="both", expand=True, padx=5, pady=(0, 5))
+        background = self._apply_appearance_mode(ctk.ThemeManager.theme["CTkFrame"]["top_fg_color"])
+        self.canvas = tkinter.Canvas(body, width=width, height=height, highlightthickness=0, bg=background)
+        self.canvas.pack(side="left", fill="both", expand=True)
+        self.scrollbar = ctk.CTkScrollbar(body, command=self.on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.canvas.bind("<Configure>", lambda event: self.redraw())
+        self.canvas.bind("<Button-1>", self.on_click)
+        self.canvas.bind("<MouseWheel>", lambda event: self.scroll_rows(-1 if event.delta > 0 else 1))
+        self.canvas.bind("<Button-4>", lambda event: self.scroll_rows(-1))
+        self.canvas.bind("<Button-5>", lambda event: self.scroll_rows(1))
+
+    def set_items(self, labels, search_texts=None, selected=True, selection=None):
+        # selection: bytearray owned by the caller, e.g. the bits of a SelectionModel, to share the checked state
+        self.labels = labels
+        # Search texts are folded once here instead of on every keystroke
+        self.search_texts = [text.casefold() for text in (search_texts or labels)]
+        self.selection = selection if selection is not None else bytearray([1 if selected else 0]) * len(labels)
+        self.apply_filter()
+
+    def apply_filter(self):
+        query = self.search_entry.get().strip().casefold()
+        if query:
+            self.visible = [i for i, text in enumerate(self.search_texts) if query in text]
+        else:
+            self.visible = list(range(len(self.labels)))
+        self.first_row = 0
+        self.redraw()
+
+    def is_selected(self, index):
+        return bool(self.selection[index])
+
+    def selected_indices(self):
+        return [i for i, selected in enumerate(self.selection) if selected]
+
+    def set_all(self, value):
+        # Applies to the items matching the search only
+        for i in self.visible:
+            self.selection[i] = value
+        self.redraw()
+        if self.command:
+            self.command()
+
+    def toggle_all(self):
+        self.set_all(0 if all(self.selection[i] for i in self.visible) else 1)
+
+    def rows_on_screen(self):
+        return max(1, self.canvas.winfo_height() // ROW_HEIGHT)
+
+    def scroll_rows(self, rows):
+        last_first_row = max(0, len(self.visible) - self.rows_on_screen())
+        self.first_row = min(max(0, self.first_row + rows), last_first_row)
+        self.redraw()
+
+    def on_scrollbar(self, action, value, unit=None):
+        if action == "moveto":
+            self.scroll_rows(int(float(value) * len(self.visible)) - self.first_row)
+        elif action == "scroll":
+            self.scroll_rows(int(value) * (self.rows_on_screen() if unit == "pages" else 1))
+
+    def on_click(self, event):
+        row = self.first_row + event.y // ROW_HEIGHT
+        if row >= len(self.visible):
+            return
+        index = self.visible[row]
+        self.selection[index] ^= 1
+        self.redraw()
+        if self.command:
+            self.command()
+
+    def redraw(self):
+        self.canvas.delete("all")
+        text_color = self._apply_appearance_mode(ctk.ThemeManager.theme["CTkLabel"]["text_color"])
+        box_color = self._apply_appearance_mode(ctk.ThemeManager.theme["CTkCheckBox"]["fg_color"])
+
+        rows = self.visible[self.first_row:self.first_row + self.rows_on_screen() + 1]
+        for row, index in enumerate(rows):
+            top = row * ROW_HEIGHT + (ROW_HEIGHT - BOX_SIZE) // 2
+            self.canvas.create_rectangle(6, top, 6 + BOX_SIZE, top + BOX_SIZE, outline=box_color, width=2,
+                                         fill=box_color if self.selection[index] else "")
+            self.canvas.create_text(12 + BOX_SIZE, row * ROW_HEIGHT + ROW_HEIGHT // 2, anchor="w",
+                                    text=self.labels[index], fill=text_color)
+
+        total = len(self.visible)
+        if total:
+            self.scrollbar.set(self.first_row / total, min(1.0, (self.first_row + self.rows_on_screen()) / total))
+        else:
+            self.scrollbar.set(0, 1)
+        self.count_label.configure(text=f"{sum(self.selection)} of {len(self.labels)} selected")